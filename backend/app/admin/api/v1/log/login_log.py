@@ -13,7 +13,8 @@ from fastapi import APIRouter, Depends, Query
 
 from backend.app.admin.schema.login_log import GetLoginLogListDetails
 from backend.app.admin.service.login_log_service import login_log_service
-from backend.common.pagination import DependsPagination, paging_data
+from backend.common.enums import PageCountType
+from backend.common.pagination import CursorPagination, DependsPagination, cursor_paging_data, paging_data
 from backend.common.response.response_schema import ResponseModel, response_base
 from backend.common.security.jwt import DependsJwtAuth
 from backend.common.security.permission import RequestPermission
@@ -38,8 +39,21 @@ async def get_pagination_login_logs(
     ip: Annotated[str | None, Query()] = None,
 ) -> ResponseModel:
     log_select = await login_log_service.get_select(username=username, status=status, ip=ip)
-    page_data = await paging_data(db, log_select, GetLoginLogListDetails)
-    return response_base.success(data=page_data)
+    page_data = await paging_data(db, log_select, GetLoginLogListDetails, PageCountType.estimate, as_struct=True)
+    return response_base.fast_success(data=page_data)
+
+
+@router.get('/cursor', summary='（模糊条件）游标分页获取登录日志', dependencies=[DependsJwtAuth])
+async def get_cursor_pagination_login_logs(
+    db: CurrentSession,
+    params: CursorPagination,
+    username: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+    ip: Annotated[str | None, Query()] = None,
+) -> ResponseModel:
+    log_select = await login_log_service.get_select(username=username, status=status, ip=ip)
+    page_data = await cursor_paging_data(db, log_select, GetLoginLogListDetails, params, as_struct=True)
+    return response_base.fast_success(data=page_data)
 
 
 @router.delete(
@@ -10,8 +10,9 @@
 from fastapi import APIRouter, Depends
 from starlette.concurrency import run_in_threadpool
 
+from backend.app.admin.service.opera_log_service import opera_log_writer
 from backend.common.response.response_schema import ResponseModel, response_base
-from backend.common.security.jwt import DependsJwtAuth
+from backend.common.security.jwt import DependsJwtAuth, password_hasher
 from backend.common.security.permission import RequestPermission
 from backend.utils.server_info import server_info
 
@@ -34,5 +35,7 @@ async def get_server_info() -> ResponseModel:
         'sys': await run_in_threadpool(server_info.get_sys_info),
         'disk': await run_in_threadpool(server_info.get_disk_info),
         'service': await run_in_threadpool(server_info.get_service_info),
+        'password_hasher': password_hasher.stats(),
+        'opera_log_writer': opera_log_writer.stats(),
     }
     return response_base.success(data=data)
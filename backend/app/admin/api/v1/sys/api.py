@@ -13,7 +13,8 @@ from fastapi import APIRouter, Depends, Path, Query, Request
 
 from backend.app.admin.schema.api import CreateApiParam, GetApiListDetails, UpdateApiParam
 from backend.app.admin.service.api_service import api_service
-from backend.common.pagination import DependsPagination, paging_data
+from backend.common.enums import PageCountType
+from backend.common.pagination import CursorPagination, DependsPagination, cursor_paging_data, paging_data
 from backend.common.response.response_schema import ResponseModel, response_base
 from backend.common.security.jwt import DependsJwtAuth
 from backend.common.security.permission import RequestPermission
@@ -29,6 +30,20 @@ async def get_all_apis() -> ResponseModel:
     return response_base.success(data=data)
 
 
+@router.get('/cursor', summary='（模糊条件）游标分页获取所有接口', dependencies=[DependsJwtAuth])
+async def get_cursor_pagination_apis(
+    request: Request,
+    db: CurrentSession,
+    params: CursorPagination,
+    name: Annotated[str | None, Query()] = None,
+    method: Annotated[str | None, Query()] = None,
+    path: Annotated[str | None, Query()] = None,
+) -> ResponseModel:
+    api_select = await api_service.get_select(request=request, name=name, method=method, path=path)
+    page_data = await cursor_paging_data(db, api_select, GetApiListDetails, params, as_struct=True)
+    return response_base.fast_success(data=page_data)
+
+
 @router.get('/{pk}', summary='获取接口详情', dependencies=[DependsJwtAuth])
 async def get_api(pk: Annotated[int, Path(...)]) -> ResponseModel:
     api = await api_service.get(pk=pk)
@@ -51,8 +66,8 @@ async def get_pagination_apis(
     path: Annotated[str | None, Query()] = None,
 ) -> ResponseModel:
     api_select = await api_service.get_select(request=request, name=name, method=method, path=path)
-    page_data = await paging_data(db, api_select, GetApiListDetails)
-    return response_base.success(data=page_data)
+    page_data = await paging_data(db, api_select, GetApiListDetails, PageCountType.cached, as_struct=True)
+    return response_base.fast_success(data=page_data)
 
 
 @router.post(
@@ -36,13 +36,14 @@ async def get_dept(pk: Annotated[int, Path(...)]) -> ResponseModel:
 
 @router.get('', summary='获取所有部门展示树', dependencies=[DependsJwtAuth])
 async def get_all_depts_tree(
+        request: Request,
         name: Annotated[str | None, Query()] = None,
         leader: Annotated[str | None, Query()] = None,
         phone: Annotated[str | None, Query()] = None,
         status: Annotated[int | None, Query()] = None,
 ) -> ResponseModel:
     dept = await dept_service.get_dept_tree(name=name, leader=leader, phone=phone, status=status)
-    return response_base.success(data=dept)
+    return response_base.encoded_success(request=request, data=dept)
 
 
 @router.post(
@@ -25,7 +25,7 @@ router = APIRouter()
 @router.get('/sidebar', summary='获取用户菜单展示树', dependencies=[DependsJwtAuth])
 async def get_user_sidebar_tree(request: Request) -> ResponseModel:
     menu = await menu_service.get_user_menu_tree(request=request)
-    return response_base.success(data=menu)
+    return response_base.encoded_success(request=request, data=menu)
 
 
 @router.get('/{pk}', summary='获取菜单详情', dependencies=[DependsJwtAuth])
@@ -37,10 +37,10 @@ async def get_menu(pk: Annotated[int, Path(...)]) -> ResponseModel:
 
 @router.get('', summary='获取所有菜单展示树', dependencies=[DependsJwtAuth])
 async def get_all_menus(
-    title: Annotated[str | None, Query()] = None, status: Annotated[int | None, Query()] = None
+    request: Request, title: Annotated[str | None, Query()] = None, status: Annotated[int | None, Query()] = None
 ) -> ResponseModel:
     menu = await menu_service.get_menu_tree(title=title, status=status)
-    return response_base.success(data=menu)
+    return response_base.encoded_success(request=request, data=menu)
 
 
 @router.post(
@@ -47,9 +47,9 @@ async def get_user_all_roles(pk: Annotated[int, Path(...)]) -> ResponseModel:
 
 
 @router.get('/{pk}/menus', summary='获取角色所有菜单', dependencies=[DependsJwtAuth])
-async def get_role_all_menus(pk: Annotated[int, Path(...)]) -> ResponseModel:
+async def get_role_all_menus(request: Request, pk: Annotated[int, Path(...)]) -> ResponseModel:
     menu = await menu_service.get_role_menu_tree(pk=pk)
-    return response_base.success(data=menu)
+    return response_base.encoded_success(request=request, data=menu)
 
 
 @router.get('/{pk}/rules', summary='获取角色所有数据规则', dependencies=[DependsJwtAuth])
@@ -16,13 +16,15 @@ from backend.app.admin.schema.user import (
     AvatarParam,
     GetCurrentUserInfoDetail,
     GetUserInfoListDetails,
+    GetUserListDetails,
     RegisterUserParam,
     ResetPasswordParam,
     UpdateUserParam,
     UpdateUserRoleParam,
 )
 from backend.app.admin.service.user_service import user_service
-from backend.common.pagination import DependsPagination, paging_data
+from backend.common.enums import PageCountType
+from backend.common.pagination import CursorPagination, DependsPagination, cursor_paging_data, paging_data
 from backend.common.response.response_schema import ResponseModel, response_base
 from backend.common.security.jwt import DependsJwtAuth
 from backend.common.security.permission import RequestPermission
@@ -61,6 +63,20 @@ async def get_current_user(request: Request) -> ResponseModel:
     return response_base.success(data=data)
 
 
+@router.get('/cursor', summary='（模糊条件）游标分页获取所有用户', dependencies=[DependsJwtAuth])
+async def get_cursor_pagination_users(
+    db: CurrentSession,
+    params: CursorPagination,
+    dept: Annotated[int | None, Query()] = None,
+    username: Annotated[str | None, Query()] = None,
+    phone: Annotated[str | None, Query()] = None,
+    status: Annotated[int | None, Query()] = None,
+) -> ResponseModel:
+    user_select = await user_service.get_select(dept=dept, username=username, phone=phone, status=status)
+    page_data = await cursor_paging_data(db, user_select, GetUserListDetails, params, as_struct=True)
+    return response_base.fast_success(data=page_data)
+
+
 @router.get('/{username}', summary='查看用户信息', dependencies=[DependsJwtAuth])
 async def get_user(username: Annotated[str, Path(...)]) -> ResponseModel:
     current_user = await user_service.get_userinfo(username=username)
@@ -115,8 +131,8 @@ async def get_pagination_users(
     status: Annotated[int | None, Query()] = None,
 ):
     user_select = await user_service.get_select(dept=dept, username=username, phone=phone, status=status)
-    page_data = await paging_data(db, user_select, GetUserInfoListDetails)
-    return response_base.success(data=page_data)
+    page_data = await paging_data(db, user_select, GetUserListDetails, PageCountType.cached, as_struct=True)
+    return response_base.fast_success(data=page_data)
 
 
 @router.put('/{pk}/super', summary='修改用户超级权限', dependencies=[DependsRBAC])
@@ -24,6 +24,12 @@ class CRUDDataRule(CRUDPlus[DataRule]):
         """
         return await self.select_model(db, pk)
 
+    async def get_by_ids(self, db: AsyncSession, pks: list[int]) -> Sequence[DataRule]:
+        """
+        批量获取数据权限规则
+        """
+        return await self.select_models(db, id__in=pks)
+
     async def get_list(self, name: str = None) -> Select:
         """
         获取数据权限规则列表
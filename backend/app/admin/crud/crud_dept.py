@@ -9,13 +9,14 @@
 '''
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy_crud_plus import CRUDPlus
 
-from backend.app.admin.model import Dept, User
+from backend.app.admin.model import Dept, User, sys_dept_closure
 from backend.app.admin.schema.dept import CreateDeptParam, UpdateDeptParam
+from backend.database.closure import TreeClosure
 
 
 class CRUDDept(CRUDPlus[Dept]):
@@ -33,9 +34,9 @@ class CRUDDept(CRUDPlus[Dept]):
 
     async def get_all(
         self, db: AsyncSession, name: str = None, leader: str = None, phone: str = None, status: int = None
-    ) -> Sequence[Dept]:
+    ) -> Sequence[Row]:
         """
-        获取所有部门
+        获取所有部门，只查询表列，不实例化模型
         """
         filters = {'del_flag__eq': 0}
         if name is not None:
@@ -46,13 +47,16 @@ class CRUDDept(CRUDPlus[Dept]):
             filters.update(phone__startswith=phone)
         if status is not None:
             filters.update(status=status)
-        return await self.select_models_order(db, sort_columns='sort', **filters)
+        stmt = await self.select_order(sort_columns='sort', **filters)
+        dept = await db.execute(stmt.with_only_columns(*self.model.__table__.columns))
+        return dept.all()
 
     async def create(self, db: AsyncSession, obj_in: CreateDeptParam) -> None:
         """
         创建部门
         """
-        await self.create_model(db, obj_in)
+        dept = await self.create_model(db, obj_in, flush=True)
+        await dept_closure.insert_node(db, dept.id, dept.parent_id)
 
     async def update(self, db: AsyncSession, dept_id: int, obj_in: UpdateDeptParam) -> int:
         """
@@ -60,6 +64,18 @@ class CRUDDept(CRUDPlus[Dept]):
         """
         return await self.update_model(db, dept_id, obj_in)
 
+    async def move(self, db: AsyncSession, dept_id: int, parent_id: int | None) -> None:
+        """
+        移动部门（连同子部门）到新的父部门下
+        """
+        await dept_closure.move_node(db, dept_id, parent_id)
+
+    async def is_descendant(self, db: AsyncSession, dept_id: int, ancestor_id: int) -> bool:
+        """
+        判断部门是否为指定部门或其子部门
+        """
+        return await dept_closure.is_descendant(db, dept_id, ancestor_id)
+
     async def delete(self, db: AsyncSession, dept_id: int) -> int:
         """
         删除部门
@@ -79,10 +95,10 @@ class CRUDDept(CRUDPlus[Dept]):
         """
         获取子部门
         """
-        stmt = select(self.model).options(selectinload(self.model.children)).where(self.model.id == dept_id)
+        stmt = select(self.model).where(self.model.parent_id == dept_id)
         result = await db.execute(stmt)
-        dept = result.scalars().first()
-        return dept.children
+        return list(result.scalars().all())
 
 
+dept_closure: TreeClosure = TreeClosure(sys_dept_closure)
 dept_dao: CRUDDept = CRUDDept(Dept)
@@ -7,7 +7,9 @@
 @Author  ：imbalich
 @Date    ：2024/12/13 16:31 
 '''
-from sqlalchemy import Select
+from datetime import datetime
+
+from sqlalchemy import Select, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
@@ -54,6 +56,21 @@ class CRUDLoginLog(CRUDPlus[LoginLog]):
         """
         return await self.delete_model_by_column(db, allow_multiple=True, id__in=pk)
 
+    async def delete_before(self, db: AsyncSession, before: datetime, limit: int) -> int:
+        """
+        分批删除早于指定时间的登录日志（按 created_time 索引定位，单批最多 limit 条）
+
+        :param db:
+        :param before: 截止时间
+        :param limit: 单批删除条数
+        :return:
+        """
+        stmt = select(self.model.id).where(self.model.created_time < before).limit(limit)
+        pks = (await db.scalars(stmt)).all()
+        if pks:
+            await db.execute(delete(self.model).where(self.model.id.in_(pks)))
+        return len(pks)
+
     async def delete_all(self, db: AsyncSession) -> int:
         """
         删除所有登录日志
@@ -9,12 +9,12 @@
 '''
 from typing import Sequence
 
-from sqlalchemy import and_, asc, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Row, and_, asc, select
 from sqlalchemy_crud_plus import CRUDPlus
 
-from backend.app.admin.model import Menu
+from backend.app.admin.model import Menu, sys_menu_closure
 from backend.app.admin.schema.menu import CreateMenuParam, UpdateMenuParam
+from backend.database.closure import TreeClosure
 
 
 class CRUDMenu(CRUDPlus[Menu]):
@@ -24,40 +24,49 @@ class CRUDMenu(CRUDPlus[Menu]):
         """
         return await self.select_model(db, menu_id)
 
+    async def get_by_ids(self, db, menu_ids: list[int]) -> Sequence[Menu]:
+        """
+        批量获取菜单
+        """
+        return await self.select_models(db, id__in=menu_ids)
+
     async def get_by_title(self, db, title: str) -> Menu | None:
         """
         通过 title 获取菜单
         """
         return await self.select_model_by_column(db, title=title, menu_type__ne=2)
 
-    async def get_all(self, db, title: str | None = None, status: int | None = None) -> Sequence[Menu]:
+    async def get_all(self, db, title: str | None = None, status: int | None = None) -> Sequence[Row]:
         """
-        获取所有菜单:根据排序获取所有菜单
+        获取所有菜单:根据排序获取所有菜单，只查询表列，不实例化模型
         """
         filters = {}
         if title is not None:
             filters.update(title=f'%{title}%')
         if status is not None:
             filters.update(status=status)
-        return await self.select_models_order(db, 'sort', **filters)
+        stmt = await self.select_order('sort', **filters)
+        menu = await db.execute(stmt.with_only_columns(*self.model.__table__.columns))
+        return menu.all()
 
-    async def get_role_menus(self, db, superuser: bool, menu_ids: list[int]) -> Sequence[Menu]:
+    async def get_role_menus(self, db, superuser: bool, menu_ids: list[int]) -> Sequence[Row]:
         """
-        获取角色菜单
+        获取角色菜单，只查询表列，不实例化模型
         """
-        stmt = select(self.model).order_by(asc(self.model.sort))
+        stmt = select(*self.model.__table__.columns).order_by(asc(self.model.sort))
         where_list = [self.model.menu_type.in_([0, 1])]
         if not superuser:
             where_list.append(self.model.id.in_(menu_ids))
         stmt = stmt.where(and_(*where_list))
         menu = await db.execute(stmt)
-        return menu.scalars().all()
+        return menu.all()
 
     async def create(self, db, obj_in: CreateMenuParam) -> None:
         """
         创建菜单
         """
-        await self.create_model(db, obj_in)
+        menu = await self.create_model(db, obj_in, flush=True)
+        await menu_closure.insert_node(db, menu.id, menu.parent_id)
 
     async def update(self, db, menu_id: int, obj_in: UpdateMenuParam) -> int:
         """
@@ -65,6 +74,18 @@ class CRUDMenu(CRUDPlus[Menu]):
         """
         return await self.update_model(db, menu_id, obj_in)
 
+    async def move(self, db, menu_id: int, parent_id: int | None) -> None:
+        """
+        移动菜单（连同子菜单）到新的父菜单下
+        """
+        await menu_closure.move_node(db, menu_id, parent_id)
+
+    async def is_descendant(self, db, menu_id: int, ancestor_id: int) -> bool:
+        """
+        判断菜单是否为指定菜单或其子菜单
+        """
+        return await menu_closure.is_descendant(db, menu_id, ancestor_id)
+
     async def delete(self, db, menu_id: int) -> int:
         """
         删除菜单
@@ -75,10 +96,10 @@ class CRUDMenu(CRUDPlus[Menu]):
         """
         获取子菜单
         """
-        stmt = select(self.model).options(selectinload(self.model.children)).where(self.model.id == menu_id)
+        stmt = select(self.model).where(self.model.parent_id == menu_id)
         result = await db.execute(stmt)
-        menu = result.scalars().first()
-        return menu.children
+        return list(result.scalars().all())
 
 
+menu_closure: TreeClosure = TreeClosure(sys_menu_closure)
 menu_dao: CRUDMenu = CRUDMenu(Menu)
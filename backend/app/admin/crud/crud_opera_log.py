@@ -7,12 +7,15 @@
 @Author  : imbalich
 @Time    : 2024/12/15 21:46
 '''
-from sqlalchemy import Select
+from datetime import datetime
+
+from sqlalchemy import Select, delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy_crud_plus import CRUDPlus
 
 from backend.app.admin.model import OperaLog
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
+from backend.utils.timezone import timezone
 
 
 class CRUDOperaLogDao(CRUDPlus[OperaLog]):
@@ -44,6 +47,19 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         """
         await self.create_model(db, obj_in)
 
+    async def bulk_create(self, db: AsyncSession, objs_in: list[CreateOperaLogParam]) -> None:
+        """
+        批量创建操作日志（单条多行 INSERT）
+
+        :param db:
+        :param objs_in:
+        :return:
+        """
+        created_time = timezone.now()
+        await db.execute(
+            insert(self.model), [{**obj_in.model_dump(), 'created_time': created_time} for obj_in in objs_in]
+        )
+
     async def delete(self, db: AsyncSession, pk: list[int]) -> int:
         """
         删除操作日志
@@ -54,6 +70,21 @@ class CRUDOperaLogDao(CRUDPlus[OperaLog]):
         """
         return await self.delete_model_by_column(db, allow_multiple=True, id__in=pk)
 
+    async def delete_before(self, db: AsyncSession, before: datetime, limit: int) -> int:
+        """
+        分批删除早于指定时间的操作日志（按 created_time 索引定位，单批最多 limit 条）
+
+        :param db:
+        :param before: 截止时间
+        :param limit: 单批删除条数
+        :return:
+        """
+        stmt = select(self.model.id).where(self.model.created_time < before).limit(limit)
+        pks = (await db.scalars(stmt)).all()
+        if pks:
+            await db.execute(delete(self.model).where(self.model.id.in_(pks)))
+        return len(pks)
+
     async def delete_all(self, db: AsyncSession) -> int:
         """
         删除所有操作日志
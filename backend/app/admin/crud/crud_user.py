@@ -7,24 +7,48 @@
 @Author  ：imbalich
 @Date    ：2024/12/10 17:21 
 '''
-from sqlalchemy import and_, desc, select
+from typing import Sequence
+
+from sqlalchemy import JSON, and_, desc, func, literal_column, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import Select
+from sqlalchemy.sql.functions import Function
 from sqlalchemy_crud_plus import CRUDPlus
 
-from backend.app.admin.model import Role, User
+from backend.app.admin.crud.crud_dept import dept_closure
+from backend.app.admin.model import Dept, Role, User
+from backend.app.admin.model.m2m import sys_role_menu, sys_user_role
+from backend.app.admin.schema.dept import GetDeptListDetails
+from backend.app.admin.schema.role import GetRoleNoRelationDetail
 from backend.app.admin.schema.user import (
     AddUserParam,
     AvatarParam,
     RegisterUserParam,
     UpdateUserParam,
-    UpdateUserRoleParam,
 )
-from backend.common.security.jwt import get_hash_password
+from backend.common.schema import SchemaBase
+from backend.common.security.jwt import password_hasher
+from backend.core.conf import settings
 from backend.utils.timezone import timezone
 
 
+def _json_object(model: type, schema: type[SchemaBase]) -> Function:
+    """
+    按 schema 的字段构造模型列的 JSON 对象表达式
+
+    :param model:
+    :param schema:
+    :return:
+    """
+    args = []
+    for name in schema.model_fields:
+        args.extend((literal_column(f"'{name}'"), getattr(model, name)))
+    if settings.DATABASE_TYPE == 'mysql':
+        return func.json_object(*args, type_=JSON)
+    return func.json_build_object(*args, type_=JSON)
+
+
 class CRUDUser(CRUDPlus[User]):
     async def get(self, db: AsyncSession, user_id: int) -> User | None:
         """
@@ -60,23 +84,24 @@ class CRUDUser(CRUDPlus[User]):
         :return:
         """
         if not social:
-            obj.password = get_hash_password(obj.password)
+            obj.password = await password_hasher.hash(obj.password)
         dict_obj = obj.model_dump()
         dict_obj.update({'is_staff': True})
         new_use = self.model(**dict_obj)
         db.add(new_use)
 
-    async def add(self, db: AsyncSession, obj: AddUserParam) -> None:
+    async def add(self, db: AsyncSession, obj: AddUserParam, roles: Sequence[Role]) -> None:
         """
         后台添加用户
+
+        :param db:
+        :param obj:
+        :param roles: 已校验存在的角色
         """
-        obj.password = get_hash_password(obj.password)
+        obj.password = await password_hasher.hash(obj.password)
         dict_obj = obj.model_dump(exclude={'roles'})  # 先删除 roles 字段
         new_user = self.model(**dict_obj)
-        role_list = []
-        for role_id in obj.roles:
-            role_list.append(await db.get(Role, role_id))
-        new_user.roles.extend(role_list)
+        new_user.roles.extend(roles)
         db.add(new_user)
 
     async def update_userinfo(self, db: AsyncSession, input_user: int, obj: UpdateUserParam) -> int:
@@ -86,18 +111,15 @@ class CRUDUser(CRUDPlus[User]):
         return await self.update_model(db, input_user, obj)
 
     @staticmethod
-    async def update_role(db: AsyncSession, input_user: User, obj: UpdateUserRoleParam) -> None:
+    async def update_role(db: AsyncSession, input_user: User, roles: Sequence[Role]) -> None:
         """
         更新用户角色
+
+        :param db:
+        :param input_user:
+        :param roles: 已校验存在的角色
         """
-        # 删除用户所有角色
-        for i in list(input_user.roles):
-            input_user.roles.remove(i)
-        # 添加用户角色
-        role_list = []
-        for role_id in obj.roles:
-            role_list.append(await db.get(Role, role_id))
-        input_user.roles.extend(role_list)
+        input_user.roles = list(roles)
 
     async def update_avatar(self, db: AsyncSession, input_user: int, avatar: AvatarParam) -> int:
         """
@@ -126,21 +148,51 @@ class CRUDUser(CRUDPlus[User]):
     async def get_list(self, dept: int = None, username: str = None, phone: str = None, status: int = None) -> Select:
         """
         获取用户列表
+
+        只查询列表展示所需的列，部门和角色通过关联子查询由数据库直接构造为 JSON 对象 / 数组返回，
+        不加载角色的菜单和数据权限；子查询只对分页后的行执行，总数统计仍为单表查询
+
+        :param dept: 部门 ID，包含其子部门的用户
+        :param username:
+        :param phone:
+        :param status:
+        :return:
         """
-        stmt = (
-            select(self.model)
-            .options(
-                selectinload(self.model.dept),
-                selectinload(self.model.roles).options(
-                    selectinload(Role.menus),
-                    selectinload(Role.rules),
-                ),
-            )
-            .order_by(desc(self.model.join_time))
+        dept_object = _json_object(Dept, GetDeptListDetails)
+        role_object = _json_object(Role, GetRoleNoRelationDetail)
+        if settings.DATABASE_TYPE == 'mysql':
+            roles = func.coalesce(func.json_arrayagg(role_object), func.json_array(), type_=JSON)
+        else:
+            roles = func.coalesce(func.json_agg(role_object), literal_column("'[]'::json"), type_=JSON)
+        dept_subquery = select(dept_object).where(Dept.id == self.model.dept_id).scalar_subquery()
+        roles_subquery = (
+            select(roles)
+            .join(sys_user_role, sys_user_role.c.role_id == Role.id)
+            .where(sys_user_role.c.user_id == self.model.id)
+            .scalar_subquery()
         )
+        stmt = select(
+            self.model.id,
+            self.model.uuid,
+            self.model.dept_id,
+            self.model.username,
+            self.model.nickname,
+            self.model.email,
+            self.model.phone,
+            self.model.avatar,
+            self.model.status,
+            self.model.is_superuser,
+            self.model.is_staff,
+            self.model.is_multi_login,
+            self.model.join_time,
+            self.model.last_login_time,
+            self.model.created_time,
+            dept_subquery.label('dept'),
+            roles_subquery.label('roles'),
+        ).order_by(desc(self.model.join_time))
         where_list = []
         if dept:
-            where_list.append(self.model.dept_id == dept)
+            where_list.append(self.model.dept_id.in_(dept_closure.descendants(dept)))
         if username:
             where_list.append(self.model.username.like(f'%{username}%'))
         if phone:
@@ -222,5 +274,28 @@ class CRUDUser(CRUDPlus[User]):
         user = await db.execute(stmt.where(*filters))
         return user.scalars().first()
 
+    @staticmethod
+    async def get_ids_by_roles(db: AsyncSession, role_ids: list[int]) -> Sequence[int]:
+        """
+        获取角色关联的用户 ID
+        """
+        stmt = select(sys_user_role.c.user_id).where(sys_user_role.c.role_id.in_(role_ids)).distinct()
+        user_ids = await db.execute(stmt)
+        return user_ids.scalars().all()
+
+    @staticmethod
+    async def get_ids_by_menu(db: AsyncSession, menu_id: int) -> Sequence[int]:
+        """
+        获取菜单关联（经由角色）的用户 ID
+        """
+        stmt = (
+            select(sys_user_role.c.user_id)
+            .join(sys_role_menu, sys_role_menu.c.role_id == sys_user_role.c.role_id)
+            .where(sys_role_menu.c.menu_id == menu_id)
+            .distinct()
+        )
+        user_ids = await db.execute(stmt)
+        return user_ids.scalars().all()
+
 
 user_dao: CRUDUser = CRUDUser(User)
@@ -18,3 +18,4 @@ from backend.app.admin.model.config import Config
 from backend.app.admin.model.api import Api
 from backend.app.admin.model.login_log import LoginLog
 from backend.app.admin.model.opera_log import OperaLog
+from backend.app.admin.model.closure import sys_dept_closure, sys_menu_closure  # noqa: F401
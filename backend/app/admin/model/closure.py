@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+'''
+@Project ：fastapi-base-backend 
+@File    ：closure.py
+@IDE     ：PyCharm 
+@Author  ：imbalich
+@Date    ：2024/12/24 10:20 
+'''
+from sqlalchemy import Column, ForeignKey, Integer, Table
+
+from backend.common.model import MappedBase
+
+# 闭包表：记录每个节点与其所有祖先（含自身）的关联，子树、祖先和层级查询均为单条索引查询
+sys_dept_closure = Table(
+    'sys_dept_closure',
+    MappedBase.metadata,
+    Column('ancestor_id', Integer, ForeignKey('sys_dept.id', ondelete='CASCADE'), primary_key=True, comment='祖先部门ID'),
+    Column(
+        'descendant_id',
+        Integer,
+        ForeignKey('sys_dept.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True,
+        comment='后代部门ID',
+    ),
+    Column('depth', Integer, nullable=False, comment='层级距离（0 为自身）'),
+)
+
+sys_menu_closure = Table(
+    'sys_menu_closure',
+    MappedBase.metadata,
+    Column('ancestor_id', Integer, ForeignKey('sys_menu.id', ondelete='CASCADE'), primary_key=True, comment='祖先菜单ID'),
+    Column(
+        'descendant_id',
+        Integer,
+        ForeignKey('sys_menu.id', ondelete='CASCADE'),
+        primary_key=True,
+        index=True,
+        comment='后代菜单ID',
+    ),
+    Column('depth', Integer, nullable=False, comment='层级距离（0 为自身）'),
+)
@@ -25,7 +25,7 @@ class DataRule(Base):
     column: Mapped[str] = mapped_column(String(20), comment='数据库字段')
     operator: Mapped[int] = mapped_column(comment='运算符（0：and、1：or）')
     expression: Mapped[int] = mapped_column(
-        comment='表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in）'
+        comment='表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in、8：部门子树）'
     )
     value: Mapped[str] = mapped_column(String(255), comment='规则值')
 
@@ -43,5 +43,5 @@ class OperaLog(DataClassBase):
     cost_time: Mapped[float] = mapped_column(insert_default=0.0, comment='请求耗时（ms）')
     opera_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), comment='操作时间')
     created_time: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), init=False, default_factory=timezone.now, comment='创建时间'
+        DateTime(timezone=True), init=False, default_factory=timezone.now, index=True, comment='创建时间'
     )
\ No newline at end of file
@@ -9,7 +9,8 @@
 '''
 from datetime import datetime
 
-from pydantic import ConfigDict, Field
+from pydantic import ConfigDict, Field, model_validator
+from typing_extensions import Self
 
 from backend.common.enums import RoleDataRuleExpressionType, RoleDataRuleOperatorType
 from backend.common.schema import SchemaBase
@@ -24,11 +25,21 @@ class DataRuleSchemaBase(SchemaBase):
     value: str
 
 
-class CreateDataRuleParam(DataRuleSchemaBase):
+class DataRuleParamBase(DataRuleSchemaBase):
+    @model_validator(mode='after')
+    def check_value(self) -> Self:
+        """校验部门子树规则的值"""
+        if self.expression == RoleDataRuleExpressionType.dept_subtree:
+            if not all(value.strip().isdigit() for value in self.value.split(',')):
+                raise ValueError('部门子树规则的值须为部门 ID，多个以英文逗号分隔')
+        return self
+
+
+class CreateDataRuleParam(DataRuleParamBase):
     pass
 
 
-class UpdateDataRuleParam(DataRuleSchemaBase):
+class UpdateDataRuleParam(DataRuleParamBase):
     pass
 
 
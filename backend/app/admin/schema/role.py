@@ -39,11 +39,16 @@ class UpdateRoleRuleParam(SchemaBase):
     rules: list[int]
 
 
-class GetRoleListDetails(RoleSchemaBase):
+class GetRoleNoRelationDetail(RoleSchemaBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: int
     created_time: datetime
     updated_time: datetime | None = None
+
+
+class GetRoleListDetails(GetRoleNoRelationDetail):
+    model_config = ConfigDict(from_attributes=True)
+
     menus: list[GetMenuListDetails]
     rules: list[GetDataRuleListDetails | None] = []
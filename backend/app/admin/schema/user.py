@@ -13,7 +13,7 @@ from pydantic import ConfigDict, EmailStr, Field, HttpUrl, model_validator
 from typing_extensions import Self
 
 from backend.app.admin.schema.dept import GetDeptListDetails
-from backend.app.admin.schema.role import GetRoleListDetails
+from backend.app.admin.schema.role import GetRoleListDetails, GetRoleNoRelationDetail
 from backend.common.enums import StatusType
 from backend.common.schema import CustomPhoneNumber, SchemaBase
 
@@ -81,6 +81,15 @@ class GetUserInfoListDetails(GetUserInfoNoRelationDetail):
     roles: list[GetRoleListDetails]
 
 
+class GetUserListDetails(GetUserInfoNoRelationDetail):
+    """用户列表，与 GetUserInfoListDetails 结构一致，角色不包含菜单和数据权限"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    dept: GetDeptListDetails | None = None
+    roles: list[GetRoleNoRelationDetail] = Field(default_factory=list)
+
+
 class GetCurrentUserInfoDetail(GetUserInfoListDetails):
     model_config = ConfigDict(from_attributes=True)
 
@@ -102,6 +111,20 @@ class GetCurrentUserInfoDetail(GetUserInfoListDetails):
 class CurrentUserIns(GetUserInfoListDetails):
     model_config = ConfigDict(from_attributes=True)
 
+    perms: frozenset[str] | None = Field(default=None, description='已编译的菜单权限标识集合')
+
+    @model_validator(mode='after')
+    def compile_perms(self) -> Self:
+        """编译角色菜单权限标识，随用户缓存一起存储，鉴权时只需一次哈希查找"""
+        if self.perms is None:
+            perms = set()
+            for role in self.roles:
+                for menu in role.menus:
+                    if menu.perms and menu.status == StatusType.enable:
+                        perms.update(menu.perms.split(','))
+            self.perms = frozenset(perms)
+        return self
+
 
 class ResetPasswordParam(SchemaBase):
     old_password: str
@@ -28,7 +28,9 @@ from backend.common.security.jwt import (
     create_refresh_token,
     get_token,
     jwt_decode,
-    password_verify,
+    password_hasher,
+    revoke_token,
+    revoke_user_tokens,
 )
 from backend.core.conf import settings
 from backend.database.db import async_db_session, uuid4_str
@@ -42,10 +44,14 @@ class AuthService:
         user = await user_dao.get_by_username(db, username)
         if not user:
             raise errors.NotFoundError(msg='用户名或密码有误')
-        elif not password_verify(password, user.password):
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+        if not verified:
             raise errors.AuthorizationError(msg='用户名或密码有误')
         elif not user.status:
             raise errors.AuthorizationError(msg='用户已被锁定, 请联系统管理员')
+        # 哈希计算成本调整后，登录时透明升级
+        if new_hash:
+            await user_dao.reset_password(db, user.id, new_hash)
         return user
 
     async def swagger_login(self, *, obj: HTTPBasicCredentials) -> tuple[str, User]:
@@ -166,16 +172,8 @@ class AuthService:
         refresh_token = request.cookies.get(settings.COOKIE_REFRESH_TOKEN_KEY)
         response.delete_cookie(settings.COOKIE_REFRESH_TOKEN_KEY)
         if request.user.is_multi_login:
-            key = f'{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:{token}'
-            await redis_client.delete(key)
-            if refresh_token:
-                key = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}:{refresh_token}'
-                await redis_client.delete(key)
+            await revoke_token(request.user.id, token, refresh_token)
         else:
-            key_prefix = f'{settings.TOKEN_REDIS_PREFIX}:{request.user.id}:'
-            await redis_client.delete_prefix(key_prefix)
-            key_prefix = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}:'
-            await redis_client.delete_prefix(key_prefix)
-
+            await revoke_user_tokens(request.user.id)
 
 auth_service: AuthService = AuthService()
@@ -46,14 +46,17 @@ class CasbinService:
         data = await enforcer.add_policy(p.sub, p.path, p.method)
         if not data:
             raise errors.ForbiddenError(msg='权限已存在')
+        await rbac.notify_policy_change('add', 'p', [[p.sub, p.path, p.method]])
         return data
 
     @staticmethod
     async def create_policies(*, ps: list[CreatePolicyParam]) -> bool:
         enforcer = await rbac.enforcer()
-        data = await enforcer.add_policies([list(p.model_dump().values()) for p in ps])
+        rules = [list(p.model_dump().values()) for p in ps]
+        data = await enforcer.add_policies(rules)
         if not data:
             raise errors.ForbiddenError(msg='权限已存在')
+        await rbac.notify_policy_change('add', 'p', rules)
         return data
 
     @staticmethod
@@ -64,17 +67,21 @@ class CasbinService:
         _p = enforcer.has_policy(old_obj.sub, old_obj.path, old_obj.method)
         if not _p:
             raise errors.NotFoundError(msg='权限不存在')
-        data = await enforcer.update_policy(
-            [old_obj.sub, old_obj.path, old_obj.method], [new_obj.sub, new_obj.path, new_obj.method]
-        )
+        old_rule = [old_obj.sub, old_obj.path, old_obj.method]
+        new_rule = [new_obj.sub, new_obj.path, new_obj.method]
+        data = await enforcer.update_policy(old_rule, new_rule)
+        if data:
+            await rbac.notify_policy_change('update', 'p', [old_rule], [new_rule])
         return data
 
     @staticmethod
     async def update_policies(*, obj: UpdatePoliciesParam) -> bool:
         enforcer = await rbac.enforcer()
-        data = await enforcer.update_policies(
-            [list(o.model_dump().values()) for o in obj.old], [list(n.model_dump().values()) for n in obj.new]
-        )
+        old_rules = [list(o.model_dump().values()) for o in obj.old]
+        new_rules = [list(n.model_dump().values()) for n in obj.new]
+        data = await enforcer.update_policies(old_rules, new_rules)
+        if data:
+            await rbac.notify_policy_change('update', 'p', old_rules, new_rules)
         return data
 
     @staticmethod
@@ -84,20 +91,25 @@ class CasbinService:
         if not _p:
             raise errors.NotFoundError(msg='权限不存在')
         data = await enforcer.remove_policy(p.sub, p.path, p.method)
+        if data:
+            await rbac.notify_policy_change('remove', 'p', [[p.sub, p.path, p.method]])
         return data
 
     @staticmethod
     async def delete_policies(*, ps: list[DeletePolicyParam]) -> bool:
         enforcer = await rbac.enforcer()
-        data = await enforcer.remove_policies([list(p.model_dump().values()) for p in ps])
+        rules = [list(p.model_dump().values()) for p in ps]
+        data = await enforcer.remove_policies(rules)
         if not data:
             raise errors.NotFoundError(msg='权限不存在')
+        await rbac.notify_policy_change('remove', 'p', rules)
         return data
 
     @staticmethod
     async def delete_all_policies(*, sub: DeleteAllPoliciesParam) -> int:
         async with async_db_session.begin() as db:
             count = await casbin_dao.delete_policies_by_sub(db, sub)
+        await rbac.notify_policy_change('reload', 'p')
         return count
 
     @staticmethod
@@ -112,14 +124,17 @@ class CasbinService:
         data = await enforcer.add_grouping_policy(g.uuid, g.role)
         if not data:
             raise errors.ForbiddenError(msg='权限已存在')
+        await rbac.notify_policy_change('add', 'g', [[g.uuid, g.role]])
         return data
 
     @staticmethod
     async def create_groups(*, gs: list[CreateUserRoleParam]) -> bool:
         enforcer = await rbac.enforcer()
-        data = await enforcer.add_grouping_policies([list(g.model_dump().values()) for g in gs])
+        rules = [list(g.model_dump().values()) for g in gs]
+        data = await enforcer.add_grouping_policies(rules)
         if not data:
             raise errors.ForbiddenError(msg='权限已存在')
+        await rbac.notify_policy_change('add', 'g', rules)
         return data
 
     @staticmethod
@@ -129,20 +144,25 @@ class CasbinService:
         if not _g:
             raise errors.NotFoundError(msg='权限不存在')
         data = await enforcer.remove_grouping_policy(g.uuid, g.role)
+        if data:
+            await rbac.notify_policy_change('remove', 'g', [[g.uuid, g.role]])
         return data
 
     @staticmethod
     async def delete_groups(*, gs: list[DeleteUserRoleParam]) -> bool:
         enforcer = await rbac.enforcer()
-        data = await enforcer.remove_grouping_policies([list(g.model_dump().values()) for g in gs])
+        rules = [list(g.model_dump().values()) for g in gs]
+        data = await enforcer.remove_grouping_policies(rules)
         if not data:
             raise errors.NotFoundError(msg='权限不存在')
+        await rbac.notify_policy_change('remove', 'g', rules)
         return data
 
     @staticmethod
     async def delete_all_groups(*, uuid: UUID) -> int:
         async with async_db_session.begin() as db:
             count = await casbin_dao.delete_groups_by_uuid(db, uuid)
+        await rbac.notify_policy_change('reload', 'g')
         return count
 
 
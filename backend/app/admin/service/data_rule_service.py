@@ -17,9 +17,9 @@ from backend.app.admin.crud.crud_role import role_dao
 from backend.app.admin.model import DataRule
 from backend.app.admin.schema.data_rule import CreateDataRuleParam, UpdateDataRuleParam
 from backend.common.exception import errors
+from backend.common.security.jwt import clear_user_cache
 from backend.core.conf import settings
 from backend.database.db import async_db_session
-from backend.database.redis import redis_client
 from backend.utils.import_parse import dynamic_import
 
 
@@ -86,7 +86,7 @@ class DataRuleService:
     async def delete(*, request: Request, pk: list[int]) -> int:
         async with async_db_session.begin() as db:
             count = await data_rule_dao.delete(db, pk)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
+            await clear_user_cache(request.user.id)
             return count
 
 
@@ -15,10 +15,11 @@ from backend.app.admin.crud.crud_dept import dept_dao
 from backend.app.admin.model import Dept
 from backend.app.admin.schema.dept import CreateDeptParam, UpdateDeptParam
 from backend.common.exception import errors
-from backend.core.conf import settings
+from backend.common.security.jwt import clear_user_cache
 from backend.database.db import async_db_session
-from backend.database.redis import redis_client
 from backend.utils.build_tree import get_tree_data
+from backend.utils.serializers import EncodedJSON
+from backend.utils.tree_cache import dept_tree_cache
 
 
 class DeptService:
@@ -33,11 +34,13 @@ class DeptService:
     @staticmethod
     async def get_dept_tree(
             *, name: str | None = None, leader: str | None = None, phone: str | None = None, status: int | None = None
-    ) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            dept_select = await dept_dao.get_all(db=db, name=name, leader=leader, phone=phone, status=status)
-            tree_data = get_tree_data(dept_select)
-            return tree_data
+    ) -> EncodedJSON:
+        async def build() -> list[dict[str, Any]]:
+            async with async_db_session() as db:
+                dept_select = await dept_dao.get_all(db=db, name=name, leader=leader, phone=phone, status=status)
+                return get_tree_data(dept_select, model=Dept)
+
+        return await dept_tree_cache.get(dept_tree_cache.make_key(name, leader, phone, status), build)
 
     @staticmethod
     async def create(*, obj: CreateDeptParam) -> None:
@@ -50,6 +53,7 @@ class DeptService:
                 if not parent_dept:
                     raise errors.NotFoundError(msg='父级部门不存在')
             await dept_dao.create(db, obj)
+        await dept_tree_cache.invalidate()
 
     @staticmethod
     async def update(*, pk: int, obj: UpdateDeptParam) -> int:
@@ -66,8 +70,14 @@ class DeptService:
                     raise errors.NotFoundError(msg='父级部门不存在')
             if obj.parent_id == dept.id:
                 raise errors.ForbiddenError(msg='禁止关联自身为父级')
+            parent_changed = obj.parent_id != dept.parent_id
+            if parent_changed and obj.parent_id and await dept_dao.is_descendant(db, obj.parent_id, pk):
+                raise errors.ForbiddenError(msg='禁止关联子级为父级')
             count = await dept_dao.update(db, pk, obj)
-            return count
+            if parent_changed:
+                await dept_dao.move(db, pk, obj.parent_id)
+        await dept_tree_cache.invalidate()
+        return count
 
     @staticmethod
     async def delete(*, request: Request, pk: int) -> int:
@@ -79,8 +89,9 @@ class DeptService:
             if children:
                 raise errors.ForbiddenError(msg='部门下存在子部门，无法删除')
             count = await dept_dao.delete(db, pk)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
-            return count
+            await clear_user_cache(request.user.id)
+        await dept_tree_cache.invalidate()
+        return count
 
 
 dept_service: DeptService = DeptService()
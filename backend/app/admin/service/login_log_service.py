@@ -7,7 +7,7 @@
 @Author  ：imbalich
 @Date    ：2024/12/13 16:27 
 '''
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from fastapi import Request
 from sqlalchemy import Select
@@ -17,6 +17,9 @@ from backend.app.admin.crud.crud_login_log import login_log_dao
 from backend.app.admin.schema.login_log import CreateLoginLogParam
 from backend.common.log import log
 from backend.database.db import async_db_session
+from backend.database.partition import MonthlyPartitioner, purge_expired
+from backend.utils.request_parse import get_request_ip_info, get_request_ua_info
+from backend.utils.timezone import timezone
 
 
 class LoginLogService:
@@ -36,18 +39,20 @@ class LoginLogService:
         msg: str,
     ) -> None:
         try:
+            ip_info = await get_request_ip_info(request)
+            ua_info = get_request_ua_info(request)
             obj_in = CreateLoginLogParam(
                 user_uuid=user_uuid,
                 username=username,
                 status=status,
-                ip=request.state.ip,
-                country=request.state.country,
-                region=request.state.region,
-                city=request.state.city,
-                user_agent=request.state.user_agent,
-                browser=request.state.browser,
-                os=request.state.os,
-                device=request.state.device,
+                ip=ip_info.ip,
+                country=ip_info.country,
+                region=ip_info.region,
+                city=ip_info.city,
+                user_agent=ua_info.user_agent,
+                browser=ua_info.browser,
+                os=ua_info.os,
+                device=ua_info.device,
                 msg=msg,
                 login_time=login_time,
             )
@@ -67,5 +72,23 @@ class LoginLogService:
             count = await login_log_dao.delete_all(db)
             return count
 
+    @staticmethod
+    async def delete_expired(*, days: int, batch_size: int, precreate_months: int) -> dict:
+        """
+        清理超出保留期的登录日志
+
+        :param days: 保留天数
+        :param batch_size: 每批删除条数
+        :param precreate_months: 预建分区月数
+        :return:
+        """
+        return await purge_expired(
+            MonthlyPartitioner(login_log_dao.model.__tablename__),
+            login_log_dao.delete_before,
+            before=timezone.now() - timedelta(days=days),
+            batch_size=batch_size,
+            precreate_months=precreate_months,
+        )
+
 
 login_log_service: LoginLogService = LoginLogService()
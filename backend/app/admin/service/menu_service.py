@@ -13,13 +13,15 @@ from fastapi import Request
 
 from backend.app.admin.crud.crud_menu import menu_dao
 from backend.app.admin.crud.crud_role import role_dao
+from backend.app.admin.crud.crud_user import user_dao
 from backend.app.admin.model import Menu
 from backend.app.admin.schema.menu import CreateMenuParam, UpdateMenuParam
 from backend.common.exception import errors
-from backend.core.conf import settings
+from backend.common.security.jwt import clear_user_cache
 from backend.database.db import async_db_session
-from backend.database.redis import redis_client
 from backend.utils.build_tree import get_tree_data
+from backend.utils.serializers import EncodedJSON
+from backend.utils.tree_cache import menu_tree_cache
 
 
 class MenuService:
@@ -32,35 +34,43 @@ class MenuService:
             return menu
 
     @staticmethod
-    async def get_menu_tree(*, title: str | None = None, status: int | None = None) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            menu_select = await menu_dao.get_all(db, title=title, status=status)
-            menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    async def get_menu_tree(*, title: str | None = None, status: int | None = None) -> EncodedJSON:
+        async def build() -> list[dict[str, Any]]:
+            async with async_db_session() as db:
+                menu_select = await menu_dao.get_all(db, title=title, status=status)
+                return get_tree_data(menu_select, model=Menu)
+
+        return await menu_tree_cache.get(menu_tree_cache.make_key('all', title, status), build)
 
     @staticmethod
-    async def get_role_menu_tree(*, pk: int) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            role = await role_dao.get_with_relation(db, pk)
-            if not role:
-                raise errors.NotFoundError(msg='角色不存在')
-            menu_ids = [menu.id for menu in role.menus]
-            menu_select = await menu_dao.get_role_menus(db, False, menu_ids)
-            menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    async def get_role_menu_tree(*, pk: int) -> EncodedJSON:
+        async def build() -> list[dict[str, Any]]:
+            async with async_db_session() as db:
+                role = await role_dao.get_with_relation(db, pk)
+                if not role:
+                    raise errors.NotFoundError(msg='角色不存在')
+                menu_ids = [menu.id for menu in role.menus]
+                menu_select = await menu_dao.get_role_menus(db, False, menu_ids)
+                return get_tree_data(menu_select, model=Menu)
+
+        return await menu_tree_cache.get(menu_tree_cache.make_key('role', pk), build)
 
     @staticmethod
-    async def get_user_menu_tree(*, request: Request) -> list[dict[str, Any]]:
-        async with async_db_session() as db:
-            roles = request.user.roles
-            menu_ids = []
-            menu_tree = []
-            if roles:
-                for role in roles:
-                    menu_ids.extend([menu.id for menu in role.menus])
-                menu_select = await menu_dao.get_role_menus(db, request.user.is_superuser, menu_ids)
-                menu_tree = get_tree_data(menu_select)
-            return menu_tree
+    async def get_user_menu_tree(*, request: Request) -> EncodedJSON:
+        roles = request.user.roles
+        superuser = request.user.is_superuser
+        # 按角色菜单集合缓存，拥有相同菜单的用户共享同一棵树
+        menu_ids = sorted({menu.id for role in roles for menu in role.menus}) if roles else []
+
+        async def build() -> list[dict[str, Any]]:
+            if not roles:
+                return []
+            async with async_db_session() as db:
+                menu_select = await menu_dao.get_role_menus(db, superuser, menu_ids)
+                return get_tree_data(menu_select, model=Menu)
+
+        key = menu_tree_cache.make_key('user', bool(roles), superuser, None if superuser else menu_ids)
+        return await menu_tree_cache.get(key, build)
 
     @staticmethod
     async def create(*, obj: CreateMenuParam) -> None:
@@ -73,6 +83,7 @@ class MenuService:
                 if not parent_menu:
                     raise errors.NotFoundError(msg='父级菜单不存在')
             await menu_dao.create(db, obj)
+        await menu_tree_cache.invalidate()
 
     @staticmethod
     async def update(*, pk: int, obj: UpdateMenuParam) -> int:
@@ -89,8 +100,16 @@ class MenuService:
                     raise errors.NotFoundError(msg='父级菜单不存在')
             if obj.parent_id == menu.id:
                 raise errors.ForbiddenError(msg='禁止关联自身为父级')
+            parent_changed = obj.parent_id != menu.parent_id
+            if parent_changed and obj.parent_id and await menu_dao.is_descendant(db, obj.parent_id, pk):
+                raise errors.ForbiddenError(msg='禁止关联子级为父级')
             count = await menu_dao.update(db, pk, obj)
-            return count
+            if parent_changed:
+                await menu_dao.move(db, pk, obj.parent_id)
+            user_ids = await user_dao.get_ids_by_menu(db, pk)
+            await clear_user_cache(*user_ids)
+        await menu_tree_cache.invalidate()
+        return count
 
     @staticmethod
     async def delete(*, request: Request, pk: int) -> int:
@@ -98,9 +117,11 @@ class MenuService:
             children = await menu_dao.get_children(db, pk)
             if children:
                 raise errors.ForbiddenError(msg='菜单下存在子菜单，无法删除')
+            user_ids = await user_dao.get_ids_by_menu(db, pk)
             count = await menu_dao.delete(db, pk)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
-            return count
+            await clear_user_cache(request.user.id, *user_ids)
+        await menu_tree_cache.invalidate()
+        return count
 
 
 menu_service: MenuService = MenuService()
@@ -7,11 +7,19 @@
 @Author  : imbalich
 @Time    : 2024/12/15 21:46
 '''
+import asyncio
+
+from datetime import timedelta
+
 from sqlalchemy import Select
 
 from backend.app.admin.crud.crud_opera_log import opera_log_dao
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
+from backend.common.log import log
+from backend.core.conf import settings
 from backend.database.db import async_db_session
+from backend.database.partition import MonthlyPartitioner, purge_expired
+from backend.utils.timezone import timezone
 
 
 class OperaLogService:
@@ -36,5 +44,134 @@ class OperaLogService:
             count = await opera_log_dao.delete_all(db)
             return count
 
+    @staticmethod
+    async def delete_expired(*, days: int, batch_size: int, precreate_months: int) -> dict:
+        """
+        清理超出保留期的操作日志
+
+        :param days: 保留天数
+        :param batch_size: 每批删除条数
+        :param precreate_months: 预建分区月数
+        :return:
+        """
+        return await purge_expired(
+            MonthlyPartitioner(opera_log_dao.model.__tablename__),
+            opera_log_dao.delete_before,
+            before=timezone.now() - timedelta(days=days),
+            batch_size=batch_size,
+            precreate_months=precreate_months,
+        )
+
 
 opera_log_service: OperaLogService = OperaLogService()
+
+
+class OperaLogWriter:
+    """
+    操作日志批量写入器
+
+    请求只将日志放入有界队列，后台任务按条数或时间批量写入数据库，队列已满时丢弃新日志
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        """
+        :param maxsize: 队列容量
+        :param batch_size: 批量写入条数
+        :param flush_interval: 批量写入最长等待时间，单位：秒
+        """
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[CreateOperaLogParam] | None = None
+        self._task: asyncio.Task | None = None
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        """
+        启动后台写入任务
+
+        :return:
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, obj_in: CreateOperaLogParam) -> None:
+        """
+        添加操作日志，不等待写入
+
+        :param obj_in:
+        :return:
+        """
+        if self._task is None:
+            self.start()
+        try:
+            self._queue.put_nowait(obj_in)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                log.warning(f'操作日志队列已满，日志被丢弃: {self.stats()}')
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[CreateOperaLogParam]) -> None:
+        try:
+            async with async_db_session.begin() as db:
+                await opera_log_dao.bulk_create(db, batch)
+            self._written += len(batch)
+        except Exception as e:
+            self._failed += len(batch)
+            log.error(f'操作日志批量写入失败: {e}')
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    async def stop(self, timeout: float) -> None:
+        """
+        等待队列中的日志写入完成后停止后台任务
+
+        :param timeout: 等待超时时间，单位：秒
+        :return:
+        """
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning(f'操作日志写入超时，{self._queue.qsize()} 条日志未写入')
+        self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        """
+        写入器指标
+
+        :return:
+        """
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'maxsize': self.maxsize,
+            'written': self._written,
+            'dropped': self._dropped,
+            'failed': self._failed,
+        }
+
+
+opera_log_writer: OperaLogWriter = OperaLogWriter(
+    settings.OPERA_LOG_QUEUE_MAXSIZE, settings.OPERA_LOG_BATCH_SIZE, settings.OPERA_LOG_FLUSH_INTERVAL_SECONDS
+)
@@ -15,6 +15,7 @@ from sqlalchemy import Select
 from backend.app.admin.crud.crud_data_rule import data_rule_dao
 from backend.app.admin.crud.crud_menu import menu_dao
 from backend.app.admin.crud.crud_role import role_dao
+from backend.app.admin.crud.crud_user import user_dao
 from backend.app.admin.model import Role
 from backend.app.admin.schema.role import (
     CreateRoleParam,
@@ -23,9 +24,9 @@ from backend.app.admin.schema.role import (
     UpdateRoleRuleParam,
 )
 from backend.common.exception import errors
-from backend.core.conf import settings
+from backend.common.security.jwt import clear_user_cache
 from backend.database.db import async_db_session
-from backend.database.redis import redis_client
+from backend.utils.tree_cache import menu_tree_cache
 
 
 class RoleService:
@@ -80,14 +81,15 @@ class RoleService:
             role = await role_dao.get(db, pk)
             if not role:
                 raise errors.NotFoundError(msg='角色不存在')
-            for menu_id in menu_ids.menus:
-                menu = await menu_dao.get(db, menu_id)
-                if not menu:
-                    raise errors.NotFoundError(msg='菜单不存在')
-            count = await role_dao.update_menus(db, pk, menu_ids)
-            if pk in [role.id for role in request.user.roles]:
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
-            return count
+            menus = await menu_dao.get_by_ids(db, menu_ids.menus)
+            missing = set(menu_ids.menus) - {menu.id for menu in menus}
+            if missing:
+                raise errors.NotFoundError(msg=f'菜单不存在：{sorted(missing)}')
+            count = await role_dao.update_menus(db, pk, menus)
+            user_ids = await user_dao.get_ids_by_roles(db, [pk])
+            await clear_user_cache(*user_ids)
+        await menu_tree_cache.invalidate()
+        return count
 
     @staticmethod
     async def update_role_rule(*, request: Request, pk: int, rule_ids: UpdateRoleRuleParam) -> int:
@@ -95,21 +97,22 @@ class RoleService:
             role = await role_dao.get(db, pk)
             if not role:
                 raise errors.NotFoundError(msg='角色不存在')
-            for rule_id in rule_ids.rules:
-                rule = await data_rule_dao.get(db, rule_id)
-                if not rule:
-                    raise errors.NotFoundError(msg='数据权限不存在')
-            count = await role_dao.update_rules(db, pk, rule_ids)
+            rules = await data_rule_dao.get_by_ids(db, rule_ids.rules)
+            missing = set(rule_ids.rules) - {rule.id for rule in rules}
+            if missing:
+                raise errors.NotFoundError(msg=f'数据权限不存在：{sorted(missing)}')
+            count = await role_dao.update_rules(db, pk, rules)
             if pk in [role.id for role in request.user.roles]:
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
+                await clear_user_cache(request.user.id)
             return count
 
     @staticmethod
     async def delete(*, request: Request, pk: list[int]) -> int:
         async with async_db_session.begin() as db:
             count = await role_dao.delete(db, pk)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
-            return count
+            await clear_user_cache(request.user.id)
+        await menu_tree_cache.invalidate()
+        return count
 
 
 role_service: RoleService = RoleService()
@@ -27,10 +27,15 @@ from backend.app.admin.schema.user import (
     UpdateUserRoleParam,
 )
 from backend.common.exception import errors
-from backend.common.security.jwt import get_hash_password, get_token, password_verify, superuser_verify
+from backend.common.security.jwt import (
+    clear_user_cache,
+    get_token,
+    password_hasher,
+    revoke_user_tokens,
+    superuser_verify,
+)
 from backend.core.conf import settings
 from backend.database.db import async_db_session
-from backend.database.redis import redis_client
 
 
 class UserService:
@@ -70,31 +75,26 @@ class UserService:
             dept = await dept_dao.get(db, obj.dept_id)
             if not dept:
                 raise errors.NotFoundError(msg='部门不存在')
-            for role_id in obj.roles:
-                role = await role_dao.get(db, role_id)
-                if not role:
-                    raise errors.NotFoundError(msg='角色不存在')
-            await user_dao.add(db, obj)
+            roles = await role_dao.get_by_ids(db, obj.roles)
+            missing = set(obj.roles) - {role.id for role in roles}
+            if missing:
+                raise errors.NotFoundError(msg=f'角色不存在：{sorted(missing)}')
+            await user_dao.add(db, obj, roles)
 
     @staticmethod
     async def pwd_reset(*, request: Request, obj: ResetPasswordParam) -> int:
         async with async_db_session.begin() as db:
             user = await user_dao.get(db, request.user.id)
-            if not password_verify(obj.old_password, user.password):
+            if not await password_hasher.verify(obj.old_password, user.password):
                 raise errors.ForbiddenError(msg='原密码错误')
             np1 = obj.new_password
             np2 = obj.confirm_password
             if np1 != np2:
                 raise errors.ForbiddenError(msg='密码输入不一致')
-            new_pwd = get_hash_password(obj.new_password)
+            new_pwd = await password_hasher.hash(obj.new_password)
             count = await user_dao.reset_password(db, request.user.id, new_pwd)
-            key_prefix = [
-                f'{settings.TOKEN_REDIS_PREFIX}:{request.user.id}',
-                f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{request.user.id}',
-                f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}',
-            ]
-            for key in key_prefix:
-                await redis_client.delete_prefix(key)
+            await revoke_user_tokens(request.user.id)
+            await clear_user_cache(request.user.id)
             return count
 
     @staticmethod
@@ -127,7 +127,7 @@ class UserService:
                 if email:
                     raise errors.ForbiddenError(msg='邮箱已注册')
             count = await user_dao.update_userinfo(db, input_user.id, obj)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
+            await clear_user_cache(request.user.id)
             return count
 
     @staticmethod
@@ -139,12 +139,12 @@ class UserService:
             input_user = await user_dao.get_with_relation(db, username=username)
             if not input_user:
                 raise errors.NotFoundError(msg='用户不存在')
-            for role_id in obj.roles:
-                role = await role_dao.get(db, role_id)
-                if not role:
-                    raise errors.NotFoundError(msg='角色不存在')
-            await user_dao.update_role(db, input_user, obj)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{input_user.id}')
+            roles = await role_dao.get_by_ids(db, obj.roles)
+            missing = set(obj.roles) - {role.id for role in roles}
+            if missing:
+                raise errors.NotFoundError(msg=f'角色不存在：{sorted(missing)}')
+            await user_dao.update_role(db, input_user, roles)
+            await clear_user_cache(input_user.id)
 
     @staticmethod
     async def update_avatar(*, request: Request, username: str, avatar: AvatarParam) -> int:
@@ -156,7 +156,7 @@ class UserService:
             if not input_user:
                 raise errors.NotFoundError(msg='用户不存在')
             count = await user_dao.update_avatar(db, input_user.id, avatar)
-            await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
+            await clear_user_cache(request.user.id)
             return count
 
     @staticmethod
@@ -174,7 +174,7 @@ class UserService:
                     raise errors.ForbiddenError(msg='非法操作')
                 super_status = await user_dao.get_super(db, pk)
                 count = await user_dao.set_super(db, pk, False if super_status else True)
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{pk}')
+                await clear_user_cache(pk)
                 return count
 
     @staticmethod
@@ -188,7 +188,7 @@ class UserService:
                     raise errors.ForbiddenError(msg='非法操作')
                 staff_status = await user_dao.get_staff(db, pk)
                 count = await user_dao.set_staff(db, pk, False if staff_status else True)
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{pk}')
+                await clear_user_cache(pk)
                 return count
 
     @staticmethod
@@ -202,7 +202,7 @@ class UserService:
                     raise errors.ForbiddenError(msg='非法操作')
                 status = await user_dao.get_status(db, pk)
                 count = await user_dao.set_status(db, pk, False if status else True)
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{pk}')
+                await clear_user_cache(pk)
                 return count
 
     @staticmethod
@@ -215,27 +215,18 @@ class UserService:
                 user_id = request.user.id
                 multi_login = await user_dao.get_multi_login(db, pk) if pk != user_id else request.user.is_multi_login
                 count = await user_dao.set_multi_login(db, pk, False if multi_login else True)
-                await redis_client.delete(f'{settings.JWT_USER_REDIS_PREFIX}:{request.user.id}')
+                await clear_user_cache(request.user.id)
                 token = get_token(request)
                 latest_multi_login = await user_dao.get_multi_login(db, pk)
                 # 超级用户修改自身时，除当前token外，其他token失效
                 if pk == user_id:
                     if not latest_multi_login:
-                        key_prefix = f'{settings.TOKEN_REDIS_PREFIX}:{pk}'
-                        await redis_client.delete_prefix(key_prefix, exclude=f'{key_prefix}:{token}')
                         refresh_token = request.cookies.get(settings.COOKIE_REFRESH_TOKEN_KEY)
-                        if refresh_token:
-                            key_prefix = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{pk}'
-                            await redis_client.delete_prefix(key_prefix, exclude=f'{key_prefix}:{refresh_token}')
+                        await revoke_user_tokens(pk, exclude_token=token, exclude_refresh_token=refresh_token)
                 # 超级用户修改他人时，其他token将全部失效
                 else:
                     if not latest_multi_login:
-                        key_prefix = [f'{settings.TOKEN_REDIS_PREFIX}:{pk}']
-                        refresh_token = request.cookies.get(settings.COOKIE_REFRESH_TOKEN_KEY)
-                        if refresh_token:
-                            key_prefix.append(f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{pk}')
-                        for key in key_prefix:
-                            await redis_client.delete_prefix(key)
+                        await revoke_user_tokens(pk)
                 return count
 
     @staticmethod
@@ -245,12 +236,7 @@ class UserService:
             if not input_user:
                 raise errors.NotFoundError(msg='用户不存在')
             count = await user_dao.delete(db, input_user.id)
-            key_prefix = [
-                f'{settings.TOKEN_REDIS_PREFIX}:{input_user.id}',
-                f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{input_user.id}',
-            ]
-            for key in key_prefix:
-                await redis_client.delete_prefix(key)
+            await revoke_user_tokens(input_user.id)
             return count
 
 
@@ -10,17 +10,26 @@
 from backend.app.admin.service.login_log_service import login_log_service
 from backend.app.admin.service.opera_log_service import opera_log_service
 from backend.app.task.celery import celery_app
+from backend.app.task.conf import task_settings
 
 
 @celery_app.task(name='delete_db_opera_log')
-async def delete_db_opera_log() -> int:
-    """自动删除数据库操作日志"""
-    result = await opera_log_service.delete_all()
+async def delete_db_opera_log() -> dict:
+    """自动清理过期数据库操作日志"""
+    result = await opera_log_service.delete_expired(
+        days=task_settings.DB_LOG_OPERA_RETENTION_DAYS,
+        batch_size=task_settings.DB_LOG_DELETE_BATCH_SIZE,
+        precreate_months=task_settings.DB_LOG_PARTITION_PRECREATE_MONTHS,
+    )
     return result
 
 
 @celery_app.task(name='delete_db_login_log')
-async def delete_db_login_log() -> int:
-    """自动删除数据库登录日志"""
-    result = await login_log_service.delete_all()
-    return result
\ No newline at end of file
+async def delete_db_login_log() -> dict:
+    """自动清理过期数据库登录日志"""
+    result = await login_log_service.delete_expired(
+        days=task_settings.DB_LOG_LOGIN_RETENTION_DAYS,
+        batch_size=task_settings.DB_LOG_DELETE_BATCH_SIZE,
+        precreate_months=task_settings.DB_LOG_PARTITION_PRECREATE_MONTHS,
+    )
+    return result
@@ -60,6 +60,12 @@ class TaskSettings(BaseSettings):
         },
     }
 
+    # DB Log
+    DB_LOG_OPERA_RETENTION_DAYS: int = 90  # 操作日志保留天数
+    DB_LOG_LOGIN_RETENTION_DAYS: int = 180  # 登录日志保留天数
+    DB_LOG_DELETE_BATCH_SIZE: int = 5000  # 过期日志每批删除条数，每批单独提交
+    DB_LOG_PARTITION_PRECREATE_MONTHS: int = 3  # 分区表预建分区月数
+
     @model_validator(mode='before')
     @classmethod
     def validate_celery_broker(cls, values):
@@ -9,7 +9,6 @@
 '''
 import dataclasses
 from datetime import datetime
-from fastapi import Response
 from backend.common.enums import StatusType
 
 """
@@ -46,7 +45,6 @@ class RequestCallNext:
     msg: str
     status: StatusType
     err: Exception | None
-    response: Response
 
 
 # 新token信息数据类
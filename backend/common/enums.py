@@ -65,6 +65,7 @@ class RoleDataRuleExpressionType(IntEnum):
     le = 5  # 小于等于
     in_ = 6  # 在...之中
     not_in = 7  # 不在...之中
+    dept_subtree = 8  # 在部门及其子部门之中
 
 
 # HTTP请求方法枚举
@@ -92,6 +93,14 @@ class BuildTreeType(StrEnum):
     recursive = 'recursive'  # 递归方式
 
 
+# 分页总数统计方式枚举
+class PageCountType(StrEnum):
+    """分页总数统计方式"""
+    exact = 'exact'  # 精确统计
+    cached = 'cached'  # 精确统计并缓存，写入时失效
+    estimate = 'estimate'  # 数据库统计信息估算，仅用于无过滤条件的查询
+
+
 # 操作日志加密类型枚举
 class OperaLogCipherType(IntEnum):
     """操作日志加密类型"""
@@ -9,23 +9,31 @@
 '''
 from __future__ import annotations
 
+import base64
 import math
 
-from typing import TYPE_CHECKING, Dict, Generic, Sequence, TypeVar
+from datetime import datetime
+from typing import TYPE_CHECKING, Annotated, Dict, Generic, Sequence, TypeVar
 
 from fastapi import Depends, Query
-from fastapi_pagination import pagination_ctx
+from fastapi_pagination import pagination_ctx, resolve_params
 from fastapi_pagination.bases import AbstractPage, AbstractParams, RawParams
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi_pagination.ext.sqlalchemy import create_count_query
 from fastapi_pagination.links.bases import create_links
+from msgspec import DecodeError, json
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+from backend.common.enums import PageCountType
+from backend.common.exception import errors
+from backend.database.count import count_total
+from backend.utils.struct_mirror import to_encodable
 
 if TYPE_CHECKING:
     from sqlalchemy import Select
     from sqlalchemy.ext.asyncio import AsyncSession
 
 T = TypeVar('T')
-DataT = TypeVar('DataT')
 SchemaT = TypeVar('SchemaT')
 
 
@@ -46,6 +54,7 @@ class _Page(AbstractPage[T], Generic[T]):
     page: int  # 第n页
     size: int  # 每页数量
     total_pages: int  # 总页数
+    count_type: PageCountType  # 总数统计方式
     links: Dict[str, str | None]  # 跳转链接
 
     __params_type__ = _Params  # 使用自定义的Params
@@ -56,6 +65,7 @@ class _Page(AbstractPage[T], Generic[T]):
         items: Sequence[T],
         total: int,
         params: _Params,
+        count_type: PageCountType = PageCountType.exact,
     ) -> _Page[T]:
         page = params.page
         size = params.size
@@ -67,26 +77,131 @@ class _Page(AbstractPage[T], Generic[T]):
             'prev': {'page': f'{page - 1}', 'size': f'{size}'} if (page - 1) >= 1 else None,
         }).model_dump()
 
-        return cls(items=items, total=total, page=params.page, size=params.size, total_pages=total_pages, links=links)
+        return cls(
+            items=items,
+            total=total,
+            page=params.page,
+            size=params.size,
+            total_pages=total_pages,
+            count_type=count_type,
+            links=links,
+        )
+
+
+async def paging_data(
+    db: AsyncSession,
+    select: Select,
+    page_data_schema: SchemaT,
+    count_type: PageCountType = PageCountType.exact,
+    *,
+    as_struct: bool = False,
+) -> dict:
+    """
+    基于 SQLAlchemy 创建分页数据
+
+    :param db:
+    :param select:
+    :param page_data_schema:
+    :param count_type: 总数统计方式，实际使用的方式见返回的 count_type
+    :param as_struct: 数据项转换为 msgspec Struct，跳过 pydantic 校验，仅用于 response_base.fast_success 返回
+    :return:
+    """
+    params: _Params = resolve_params()
+    raw_params = params.to_raw_params()
+    total, count_type = await count_total(db, select, count_type)
+    result = await db.execute(select.limit(raw_params.limit).offset(raw_params.offset))
+    items = result.unique().scalars().all() if len(select.column_descriptions) == 1 else result.all()
+    if as_struct:
+        page_data = _Page[page_data_schema].create([], total, params, count_type).model_dump()
+        page_data['items'] = to_encodable(items, page_data_schema)
+        return page_data
+    page_data = _Page[page_data_schema].create(items, total, params, count_type)
+    return page_data.model_dump()
+
+
+class _CursorParams(BaseModel):
+    cursor: str | None = Query(None, description='Page cursor')
+    size: int = Query(20, gt=0, le=100, description='Page size')
+    with_total: bool = Query(False, description='Whether to count total')
+
+
+class _CursorPage(BaseModel, Generic[T]):
+    items: Sequence[T]  # 数据
+    total: int | None  # 总数据数，未请求时为 None
+    size: int  # 每页数量
+    next: str | None  # 下一页游标
+    prev: str | None  # 上一页游标
+
+
+def _encode_cursor(created_time: datetime, pk: int, backward: bool) -> str:
+    data = json.encode([created_time.isoformat(), pk, backward])
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
 
 
-class _PageData(BaseModel, Generic[DataT]):
-    page_data: DataT | None = None
+def _decode_cursor(cursor: str) -> tuple[datetime, int, bool]:
+    try:
+        created_time, pk, backward = json.decode(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_time), int(pk), bool(backward)
+    except (ValueError, TypeError, DecodeError):
+        raise errors.RequestError(msg='分页游标无效')
 
 
-async def paging_data(db: AsyncSession, select: Select, page_data_schema: SchemaT) -> dict:
+async def cursor_paging_data(
+    db: AsyncSession, select: Select, page_data_schema: SchemaT, params: _CursorParams, *, as_struct: bool = False
+) -> dict:
     """
-    基于 SQLAlchemy 创建分页数据
+    基于 SQLAlchemy 创建游标分页数据
+
+    按 (created_time, id) 倒序做键集分页，翻页无需 OFFSET，深翻页耗时与第一页相同；
+    select 原有的排序将被替换，总数仅在 with_total 时统计；按列查询时须包含 created_time 和 id 列
 
     :param db:
     :param select:
     :param page_data_schema:
+    :param params:
+    :param as_struct: 数据项转换为 msgspec Struct，跳过 pydantic 校验，仅用于 response_base.fast_success 返回
     :return:
     """
-    _paginate = await paginate(db, select)
-    page_data = _PageData[_Page[page_data_schema]](page_data=_paginate).model_dump()['page_data']
-    return page_data
+    model = select.column_descriptions[0]['entity']
+    created_time, pk = model.created_time, model.id
+    total = None
+    if params.with_total:
+        total = await db.scalar(create_count_query(select))
+    stmt = select.order_by(None)
+    backward = False
+    if params.cursor:
+        cursor_time, cursor_pk, backward = _decode_cursor(params.cursor)
+        if backward:
+            stmt = stmt.where(or_(created_time > cursor_time, and_(created_time == cursor_time, pk > cursor_pk)))
+        else:
+            stmt = stmt.where(or_(created_time < cursor_time, and_(created_time == cursor_time, pk < cursor_pk)))
+    if backward:
+        stmt = stmt.order_by(created_time.asc(), pk.asc())
+    else:
+        stmt = stmt.order_by(created_time.desc(), pk.desc())
+    result = await db.execute(stmt.limit(params.size + 1))
+    rows = list(result.unique().scalars().all() if len(select.column_descriptions) == 1 else result.all())
+    has_more = len(rows) > params.size
+    rows = rows[: params.size]
+    if backward:
+        rows.reverse()
+    next_cursor = prev_cursor = None
+    if rows:
+        # 反向翻页由后一页返回，必然存在下一页；正向翻页传入了游标时，必然存在上一页
+        if backward or has_more:
+            next_cursor = _encode_cursor(rows[-1].created_time, rows[-1].id, False)
+        if has_more if backward else params.cursor:
+            prev_cursor = _encode_cursor(rows[0].created_time, rows[0].id, True)
+    if as_struct:
+        page = _CursorPage[page_data_schema](items=[], total=total, size=params.size, next=next_cursor, prev=prev_cursor)
+        page_data = page.model_dump()
+        page_data['items'] = to_encodable(rows, page_data_schema)
+        return page_data
+    page = _CursorPage[page_data_schema](items=rows, total=total, size=params.size, next=next_cursor, prev=prev_cursor)
+    return page.model_dump()
 
 
 # 分页依赖注入
 DependsPagination = Depends(pagination_ctx(_Page))
+# 游标分页参数
+CursorPagination = Annotated[_CursorParams, Depends()]
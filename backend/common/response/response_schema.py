@@ -10,12 +10,14 @@
 from datetime import datetime
 from typing import Any
 
-from fastapi import Response
+from fastapi import Request, Response
+from msgspec import Raw
 from pydantic import BaseModel, ConfigDict
 
 from backend.common.response.response_code import CustomResponse, CustomResponseCode
 from backend.core.conf import settings
-from backend.utils.serializers import MsgSpecJSONResponse
+from backend.utils.serializers import EncodedJSON, MsgSpecJSONResponse
+from backend.utils.struct_mirror import to_encodable
 
 _ExcludeData = set[int | str] | dict[int | str, Any]
 
@@ -99,19 +101,53 @@ class ResponseBase:
             *,
             res: CustomResponseCode | CustomResponse = CustomResponseCode.HTTP_200,
             data: Any | None = None,
+            schema: type[BaseModel] | None = None,
     ) -> Response:
         """
-        此方法是为了提高接口响应速度而创建的，如果返回数据无需进行 pydantic 解析和验证，则推荐使用，相反，请不要使用！
+        此方法是为了提高接口响应速度而创建的，返回数据直接由 msgspec 编码，不经过 ResponseModel 校验和 jsonable_encoder
 
-        .. warning::
+        传入 schema 时，ORM 对象、Row、字典（及其列表）按 schema 的 msgspec Struct 镜像转换后编码，
+        否则 data 须为 msgspec 可直接编码的数据（例如 paging_data / cursor_paging_data 的 as_struct 返回值）
 
-            使用此返回方法时，不要指定接口参数 response_model，也不要在接口函数后添加箭头返回类型
+        .. tip::
+
+            接口可保留箭头返回类型 ResponseModel 用于生成 OpenAPI 文档，直接返回的响应不会再经过 response_model 校验
 
         :param res:
         :param data:
+        :param schema: 数据 schema
         :return:
         """
+        if schema is not None and data is not None:
+            data = to_encodable(data, schema)
         return MsgSpecJSONResponse({'code': res.code, 'msg': res.msg, 'data': data})
 
+    @staticmethod
+    def encoded_success(
+            *,
+            request: Request,
+            res: CustomResponseCode | CustomResponse = CustomResponseCode.HTTP_200,
+            data: EncodedJSON,
+    ) -> Response:
+        """
+        返回预编码的 JSON 数据，数据无需再次序列化，并通过 ETag 支持协商缓存，客户端数据未变化时返回 304
+
+        .. tip::
+
+            接口可保留箭头返回类型 ResponseModel 用于生成 OpenAPI 文档，直接返回的响应不会再经过 response_model 校验
+
+        :param request:
+        :param res:
+        :param data:
+        :return:
+        """
+        headers = {'ETag': data.etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            if data.etag in tags or '*' in tags:
+                return Response(status_code=304, headers=headers)
+        return MsgSpecJSONResponse({'code': res.code, 'msg': res.msg, 'data': Raw(data.body)}, headers=headers)
+
 
 response_base: ResponseBase = ResponseBase()
@@ -7,12 +7,17 @@
 @Author  ：imbalich
 @Date    ：2024/12/10 16:16 
 '''
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from uuid import uuid4
 
 from fastapi import Depends, Request
 from fastapi.security import HTTPBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import ExpiredSignatureError, JWTError, jwt
+from msgspec import json
 from passlib.context import CryptContext
 from pydantic_core import from_json
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,18 +25,26 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.app.admin.model import User
 from backend.app.admin.schema.user import CurrentUserIns
 from backend.common.dataclasses import RefreshToken, AccessToken, NewToken
-from backend.common.exception.errors import TokenError, AuthorizationError
+from backend.common.exception.errors import TokenError, AuthorizationError, HTTPError
+from backend.common.log import log
+from backend.common.security.jwt_backend import jwt_backend
 from backend.core.conf import settings
 from backend.database.db import async_db_session
 from backend.database.redis import redis_client
+from backend.utils.cache import LRUCache
 from backend.utils.serializers import select_as_dict
 from backend.utils.timezone import timezone
 
 # JWT authorizes dependency injection
 DependsJwtAuth = Depends(HTTPBearer())
 
-# 创建 CryptContext 实例
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 创建 CryptContext 实例，低于当前计算成本的哈希在 needs_update 中返回 True
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 
 def get_hash_password(password: str) -> str:
@@ -55,6 +68,295 @@ def password_verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasher:
+    """
+    密码哈希线程池
+
+    bcrypt 计算时释放 GIL，在独立线程池中执行可避免登录高峰时阻塞事件循环；
+    排队数超过上限时直接拒绝请求，防止请求堆积
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        :param max_workers: 线程数
+        :param max_pending: 最大排队数
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hasher')
+        self._inflight = 0
+        self._rejected = 0
+        self._completed = 0
+
+    async def _run(self, func, *args):
+        if self._inflight >= self.max_workers + self.max_pending:
+            self._rejected += 1
+            log.warning(f'密码哈希排队已满: {self.stats()}')
+            raise HTTPError(code=503, msg='服务繁忙，请稍后重试', headers={'Retry-After': '1'})
+        self._inflight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._inflight -= 1
+            self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        """
+        加密密码
+
+        :param password: 原始密码
+        :return: 加密后的密码
+        """
+        return await self._run(get_hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        验证密码
+
+        :param plain_password: 待验证的明文密码
+        :param hashed_password: 存储的哈希密码
+        :return: 验证是否成功
+        """
+        return await self._run(password_verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        验证密码，哈希需要升级（例如计算成本调整）时同时返回新的哈希
+
+        :param plain_password: 待验证的明文密码
+        :param hashed_password: 存储的哈希密码
+        :return: 验证是否成功，新的哈希密码（无需升级时为 None）
+        """
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+        线程池指标
+
+        :return:
+        """
+        return {
+            'workers': self.max_workers,
+            'running': min(self._inflight, self.max_workers),
+            'pending': max(self._inflight - self.max_workers, 0),
+            'max_pending': self.max_pending,
+            'rejected': self._rejected,
+            'completed': self._completed,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher: PasswordHasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+# 令牌按用户维护索引（ZSET，成员为令牌 key，分值为过期时间戳），吊销令牌时无需扫描整个键空间
+# 注意：脚本内会访问索引成员对应的 key，仅适用于单机 / 主从 redis，不适用于 redis cluster
+_STORE_TOKEN_LUA_FUNC = """
+local function store_token(index, key, token, expire_seconds, expire_at, now, revoke_others)
+    if revoke_others == '1' then
+        local members = redis.call('ZRANGE', index, 0, -1)
+        for _, member in ipairs(members) do
+            redis.call('DEL', member)
+        end
+        redis.call('DEL', index)
+    else
+        redis.call('ZREMRANGEBYSCORE', index, '-inf', now)
+    end
+    redis.call('SETEX', key, expire_seconds, token)
+    redis.call('ZADD', index, expire_at, key)
+    if redis.call('TTL', index) < tonumber(expire_seconds) then
+        redis.call('EXPIRE', index, expire_seconds)
+    end
+end
+"""
+
+# 存储令牌脚本
+# KEYS: 索引 key, 令牌 key
+# ARGV: 令牌, 过期秒数, 过期时间戳, 当前时间戳, 是否吊销其他令牌（1 / 0）
+_STORE_TOKEN_LUA = (
+    _STORE_TOKEN_LUA_FUNC
+    + """
+store_token(KEYS[1], KEYS[2], ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5])
+return 1
+"""
+)
+
+# 刷新令牌原子脚本：校验旧刷新令牌、删除旧令牌对、写入新令牌对，一次往返完成
+# 无状态模式下需递增令牌版本号时，在刷新令牌校验通过后比较并设置版本号，版本号已被并发修改时返回 -1
+# KEYS: 旧刷新令牌 key, 旧访问令牌 key, 新访问令牌 key, 新刷新令牌 key, 访问令牌索引 key, 刷新令牌索引 key, 令牌版本号 key
+# ARGV: 旧刷新令牌, 新访问令牌, 访问令牌过期秒数, 访问令牌过期时间戳,
+#       新刷新令牌, 刷新令牌过期秒数, 刷新令牌过期时间戳, 当前时间戳, 是否吊销其他令牌（1 / 0）,
+#       用户ID, 新版本号（为空时不修改版本号）
+_NEW_TOKEN_LUA = (
+    _STORE_TOKEN_LUA_FUNC
+    + """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[11] ~= '' then
+    local ver = tonumber(redis.call('HGET', KEYS[7], ARGV[10]) or '0')
+    if ver + 1 ~= tonumber(ARGV[11]) then
+        return -1
+    end
+    redis.call('HSET', KEYS[7], ARGV[10], ARGV[11])
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('ZREM', KEYS[6], KEYS[1])
+redis.call('ZREM', KEYS[5], KEYS[2])
+store_token(KEYS[5], KEYS[3], ARGV[2], ARGV[3], ARGV[4], ARGV[8], ARGV[9])
+store_token(KEYS[6], KEYS[4], ARGV[5], ARGV[6], ARGV[7], ARGV[8], ARGV[9])
+return 1
+"""
+)
+
+# 吊销令牌脚本
+# KEYS: 索引 key 列表
+# ARGV: 排除的令牌 key 列表
+_REVOKE_TOKENS_LUA = """
+local exclude = {}
+for _, key in ipairs(ARGV) do
+    exclude[key] = true
+end
+local count = 0
+for _, index in ipairs(KEYS) do
+    local members = redis.call('ZRANGE', index, 0, -1)
+    for _, member in ipairs(members) do
+        if not exclude[member] then
+            count = count + redis.call('DEL', member)
+            redis.call('ZREM', index, member)
+        end
+    end
+end
+return count
+"""
+
+_store_token_script = redis_client.register_script(_STORE_TOKEN_LUA)
+_new_token_script = redis_client.register_script(_NEW_TOKEN_LUA)
+_revoke_tokens_script = redis_client.register_script(_REVOKE_TOKENS_LUA)
+
+
+# 无状态模式下的令牌吊销状态（进程内），访问令牌验证时无需访问 redis
+# 用户令牌版本号：令牌中的 ver 小于当前版本号即失效，用于吊销用户的全部访问令牌
+_token_versions: dict[int, int] = {}
+# 令牌黑名单：jti -> 过期时间戳，用于吊销单个访问令牌，令牌过期后移除
+_token_denylist: dict[str, int] = {}
+
+
+def _apply_token_revoke(versions: dict, denylist: dict) -> None:
+    for sub, ver in versions.items():
+        user_id = int(sub)
+        if int(ver) > _token_versions.get(user_id, 0):
+            _token_versions[user_id] = int(ver)
+    if denylist:
+        _token_denylist.update({jti: int(exp) for jti, exp in denylist.items()})
+        now = timezone.now().timestamp()
+        for jti in [jti for jti, exp in _token_denylist.items() if exp < now]:
+            del _token_denylist[jti]
+
+
+async def _load_token_revoke_state() -> None:
+    # 版本号只增不减、黑名单按过期时间清理，直接合并即可，无需清空已有状态
+    # 分批扫描，避免用户量大时单次返回整个哈希 / 有序集合
+    versions = {}
+    async for sub, ver in redis_client.hscan_iter(settings.TOKEN_VERSION_REDIS_KEY, count=1000):
+        versions[sub] = ver
+        if len(versions) >= 1000:
+            _apply_token_revoke(versions, {})
+            versions.clear()
+    _apply_token_revoke(versions, {})
+    denylist = {}
+    async for jti, exp in redis_client.zscan_iter(settings.TOKEN_DENYLIST_REDIS_KEY, count=1000):
+        denylist[jti] = exp
+        if len(denylist) >= 1000:
+            _apply_token_revoke({}, denylist)
+            denylist.clear()
+    _apply_token_revoke({}, denylist)
+
+
+async def _on_token_revoke(message: str) -> None:
+    data = json.decode(message)
+    _apply_token_revoke(data.get('versions', {}), data.get('denylist', {}))
+
+
+async def init_token_revoke_listener() -> None:
+    """
+    加载令牌吊销状态并启动吊销广播监听，仅在无状态模式的应用启动时调用
+
+    :return:
+    """
+    await _load_token_revoke_state()
+    # 断线期间可能遗漏吊销广播，重新订阅后全量加载
+    redis_client.add_listener(
+        settings.TOKEN_REVOKE_REDIS_CHANNEL, _on_token_revoke, on_reconnect=_load_token_revoke_state
+    )
+
+
+async def _bump_token_version(sub: str | int) -> int:
+    """
+    递增用户令牌版本号，使该用户之前签发的访问令牌全部失效
+
+    :param sub: JWT 的主题/用户ID
+    :return: 新的版本号
+    """
+    ver = await redis_client.hincrby(settings.TOKEN_VERSION_REDIS_KEY, str(sub), 1)
+    await _publish_token_version(sub, ver)
+    return ver
+
+
+async def _publish_token_version(sub: str | int, ver: int) -> None:
+    """
+    应用并广播用户令牌版本号
+
+    :param sub: JWT 的主题/用户ID
+    :param ver: 版本号
+    :return:
+    """
+    versions = {str(sub): ver}
+    _apply_token_revoke(versions, {})
+    await redis_client.publish(settings.TOKEN_REVOKE_REDIS_CHANNEL, json.encode({'versions': versions}))
+
+
+async def _deny_tokens(*tokens: str) -> None:
+    """
+    将访问令牌加入黑名单
+
+    :param tokens: 访问令牌
+    :return:
+    """
+    denylist = {}
+    for token in tokens:
+        try:
+            claims = jwt.get_unverified_claims(token)
+        except JWTError:
+            continue
+        if claims.get('jti') and claims.get('exp'):
+            denylist[claims['jti']] = int(claims['exp'])
+    if not denylist:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zadd(settings.TOKEN_DENYLIST_REDIS_KEY, denylist)
+        pipe.zremrangebyscore(settings.TOKEN_DENYLIST_REDIS_KEY, '-inf', int(timezone.now().timestamp()))
+        pipe.expire(settings.TOKEN_DENYLIST_REDIS_KEY, settings.TOKEN_EXPIRE_SECONDS)
+        await pipe.execute()
+    _apply_token_revoke({}, denylist)
+    await redis_client.publish(settings.TOKEN_REVOKE_REDIS_CHANNEL, json.encode({'denylist': denylist}))
+
+
+async def _get_token_version(sub: str, multi_login: bool) -> int:
+    """
+    获取签发访问令牌时使用的版本号，不允许多点登录时递增版本号使之前的访问令牌失效
+
+    :param sub: JWT 的主题/用户ID
+    :param multi_login: 用户是否允许多点登录
+    :return:
+    """
+    if not multi_login:
+        return await _bump_token_version(sub)
+    return int(await redis_client.hget(settings.TOKEN_VERSION_REDIS_KEY, sub) or 0)
+
+
 async def create_access_token(sub: str, multi_login: bool) -> AccessToken:
     """
     生成加密的访问令牌
@@ -68,19 +370,24 @@ async def create_access_token(sub: str, multi_login: bool) -> AccessToken:
     expire_seconds = settings.TOKEN_EXPIRE_SECONDS
 
     # 准备要编码到 JWT 中的数据
-    to_encode = {'exp': expire, 'sub': sub}
+    to_encode = {'exp': expire, 'sub': sub, 'jti': uuid4().hex}
+    if settings.TOKEN_STATELESS:
+        to_encode['ver'] = await _get_token_version(sub, multi_login)
 
     # 使用 JWT 库创建访问令牌
-    access_token = jwt.encode(to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM)
-
-    # 如果不允许多点登录，删除该用户之前的所有访问令牌
-    if multi_login is False:
-        key_prefix = f'{settings.TOKEN_REDIS_PREFIX}:{sub}'
-        await redis_client.delete_prefix(key_prefix)
-
-    # 在 Redis 中存储新的访问令牌
-    key = f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{access_token}'
-    await redis_client.setex(key, expire_seconds, access_token)
+    access_token = jwt_backend.encode(to_encode)
+
+    # 在 Redis 中存储新的访问令牌，如果不允许多点登录，同时删除该用户之前的所有访问令牌
+    await _store_token_script(
+        keys=[f'{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}', f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{access_token}'],
+        args=[
+            access_token,
+            expire_seconds,
+            int(expire.timestamp()),
+            int(timezone.now().timestamp()),
+            int(not multi_login),
+        ],
+    )
 
     # 返回 AccessToken 对象
     return AccessToken(access_token=access_token, access_token_expire_time=expire)
@@ -99,19 +406,25 @@ async def create_refresh_token(sub: str, multi_login: bool) -> RefreshToken:
     expire_seconds = settings.TOKEN_REFRESH_EXPIRE_SECONDS
 
     # 准备要编码到 JWT 中的数据
-    to_encode = {'exp': expire, 'sub': sub}
+    to_encode = {'exp': expire, 'sub': sub, 'jti': uuid4().hex}
 
     # 使用 JWT 库创建刷新令牌
-    refresh_token = jwt.encode(to_encode, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM)
-
-    # 如果不允许多点登录，删除该用户之前的所有刷新令牌
-    if multi_login is False:
-        key_prefix = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}'
-        await redis_client.delete_prefix(key_prefix)
-
-    # 在 Redis 中存储新的刷新令牌
-    key = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}'
-    await redis_client.setex(key, expire_seconds, refresh_token)
+    refresh_token = jwt_backend.encode(to_encode)
+
+    # 在 Redis 中存储新的刷新令牌，如果不允许多点登录，同时删除该用户之前的所有刷新令牌
+    await _store_token_script(
+        keys=[
+            f'{settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX}:{sub}',
+            f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}',
+        ],
+        args=[
+            refresh_token,
+            expire_seconds,
+            int(expire.timestamp()),
+            int(timezone.now().timestamp()),
+            int(not multi_login),
+        ],
+    )
 
     # 返回 RefreshToken 对象
     return RefreshToken(refresh_token=refresh_token, refresh_token_expire_time=expire)
@@ -127,31 +440,165 @@ async def create_new_token(sub: str, token: str, refresh_token: str, multi_login
     :param multi_login: 用户是否允许多点登录
     :return: NewToken 对象，包含新的访问令牌和刷新令牌及其过期时间
     """
-    # 验证刷新令牌是否存在且有效
-    redis_refresh_token = await redis_client.get(f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}')
-    if not redis_refresh_token or redis_refresh_token != refresh_token:
+    # 无状态模式下不允许多点登录时，新访问令牌使用递增后的版本号，刷新令牌校验通过后才写入版本号，
+    # 避免无效的刷新令牌吊销用户的全部访问令牌
+    bump_version = settings.TOKEN_STATELESS and not multi_login
+    while True:
+        # 本地生成新的令牌对
+        access_expire = timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRE_SECONDS)
+        to_encode = {'exp': access_expire, 'sub': sub, 'jti': uuid4().hex}
+        if settings.TOKEN_STATELESS:
+            ver = int(await redis_client.hget(settings.TOKEN_VERSION_REDIS_KEY, sub) or 0) + int(bump_version)
+            to_encode['ver'] = ver
+        new_access_token = jwt_backend.encode(to_encode)
+        refresh_expire = timezone.now() + timedelta(seconds=settings.TOKEN_REFRESH_EXPIRE_SECONDS)
+        to_encode = {'exp': refresh_expire, 'sub': sub, 'jti': uuid4().hex}
+        new_refresh_token = jwt_backend.encode(to_encode)
+
+        # 验证刷新令牌并替换令牌对（原子操作），如果不允许多点登录，同时删除该用户的其他令牌
+        replaced = await _new_token_script(
+            keys=[
+                f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}',
+                f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{token}',
+                f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{new_access_token}',
+                f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{new_refresh_token}',
+                f'{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}',
+                f'{settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX}:{sub}',
+                settings.TOKEN_VERSION_REDIS_KEY,
+            ],
+            args=[
+                refresh_token,
+                new_access_token,
+                settings.TOKEN_EXPIRE_SECONDS,
+                int(access_expire.timestamp()),
+                new_refresh_token,
+                settings.TOKEN_REFRESH_EXPIRE_SECONDS,
+                int(refresh_expire.timestamp()),
+                int(timezone.now().timestamp()),
+                int(not multi_login),
+                sub,
+                ver if bump_version else '',
+            ],
+        )
+        # 版本号被并发的登录 / 刷新修改，按最新版本号重新签发
+        if replaced != -1:
+            break
+    if not replaced:
         raise TokenError(msg='Refresh Token 已过期')
-
-    # 创建新的访问令牌
-    new_access_token = await create_access_token(sub, multi_login)
-    # 创建新的刷新令牌
-    new_refresh_token = await create_refresh_token(sub, multi_login)
-
-    # 删除旧的访问令牌和刷新令牌
-    token_key = f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{token}'
-    refresh_token_key = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}'
-    await redis_client.delete(token_key)
-    await redis_client.delete(refresh_token_key)
+    if bump_version:
+        await _publish_token_version(sub, ver)
+    # 无状态模式下旧访问令牌仍可验签通过，需加入黑名单
+    if settings.TOKEN_STATELESS and multi_login:
+        await _deny_tokens(token)
 
     # 返回新的令牌对
     return NewToken(
-        new_access_token=new_access_token.access_token,
-        new_access_token_expire_time=new_access_token.access_token_expire_time,
-        new_refresh_token=new_refresh_token.refresh_token,
-        new_refresh_token_expire_time=new_refresh_token.refresh_token_expire_time,
+        new_access_token=new_access_token,
+        new_access_token_expire_time=access_expire,
+        new_refresh_token=new_refresh_token,
+        new_refresh_token_expire_time=refresh_expire,
+    )
+
+
+async def revoke_token(sub: str | int, token: str, refresh_token: str | None = None) -> None:
+    """
+    吊销指定令牌
+
+    :param sub: JWT 的主题/用户ID
+    :param token: 访问令牌
+    :param refresh_token: 刷新令牌
+    :return:
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        key = f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{token}'
+        pipe.delete(key)
+        pipe.zrem(f'{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}', key)
+        if refresh_token:
+            key = f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{refresh_token}'
+            pipe.delete(key)
+            pipe.zrem(f'{settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX}:{sub}', key)
+        await pipe.execute()
+    if settings.TOKEN_STATELESS:
+        await _deny_tokens(token)
+
+
+async def revoke_user_tokens(
+    sub: str | int, *, exclude_token: str | None = None, exclude_refresh_token: str | None = None
+) -> int:
+    """
+    吊销用户的所有令牌（访问令牌和刷新令牌），复杂度取决于该用户的令牌数量
+
+    :param sub: JWT 的主题/用户ID
+    :param exclude_token: 保留的访问令牌
+    :param exclude_refresh_token: 保留的刷新令牌
+    :return: 吊销的令牌数量
+    """
+    if settings.TOKEN_STATELESS:
+        if exclude_token:
+            # 需保留当前令牌时，无法通过版本号吊销，逐个加入黑名单
+            index = f'{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}'
+            members = await redis_client.zrange(index, 0, -1)
+            await _deny_tokens(*[key.rsplit(':', 1)[-1] for key in members if not key.endswith(f':{exclude_token}')])
+        else:
+            await _bump_token_version(sub)
+    exclude = []
+    if exclude_token:
+        exclude.append(f'{settings.TOKEN_REDIS_PREFIX}:{sub}:{exclude_token}')
+    if exclude_refresh_token:
+        exclude.append(f'{settings.TOKEN_REFRESH_REDIS_PREFIX}:{sub}:{exclude_refresh_token}')
+    return await _revoke_tokens_script(
+        keys=[f'{settings.TOKEN_INDEX_REDIS_PREFIX}:{sub}', f'{settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX}:{sub}'],
+        args=exclude,
     )
 
 
+async def backfill_token_index() -> int:
+    """
+    为索引上线前创建的令牌补建用户令牌索引（仅需在升级后执行一次）
+
+    :return: 补建索引的令牌数量
+    """
+    count = 0
+    now = int(timezone.now().timestamp())
+    for prefix, index_prefix in (
+        (settings.TOKEN_REDIS_PREFIX, settings.TOKEN_INDEX_REDIS_PREFIX),
+        (settings.TOKEN_REFRESH_REDIS_PREFIX, settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX),
+    ):
+        async for key in redis_client.scan_iter(match=f'{prefix}:*', count=1000):
+            sub = key[len(prefix) + 1 :].split(':', 1)[0]
+            ttl = await redis_client.ttl(key)
+            if ttl <= 0:
+                continue
+            index = f'{index_prefix}:{sub}'
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.zadd(index, {key: now + ttl})
+                pipe.expire(index, ttl, gt=True)
+                pipe.expire(index, ttl, nx=True)
+                await pipe.execute()
+            count += 1
+    return count
+
+
+async def cleanup_token_index() -> int:
+    """
+    清理用户令牌索引中已过期的成员，并删除空索引
+
+    :return: 清理的成员数量
+    """
+    count = 0
+    now = int(timezone.now().timestamp())
+    for index_prefix in (settings.TOKEN_INDEX_REDIS_PREFIX, settings.TOKEN_REFRESH_INDEX_REDIS_PREFIX):
+        async for index in redis_client.scan_iter(match=f'{index_prefix}:*', count=1000):
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(index, '-inf', now)
+                pipe.zcard(index)
+                removed, remaining = await pipe.execute()
+            count += removed
+            if remaining == 0:
+                await redis_client.delete(index)
+    return count
+
+
 def get_token(request: Request) -> str:
     """
     从请求头中获取 Bearer 令牌
@@ -174,27 +621,20 @@ def get_token(request: Request) -> str:
     return token
 
 
-def jwt_decode(token: str) -> int:
+def jwt_decode_payload(token: str) -> dict:
     """
-    解码 JWT 令牌并提取用户 ID
+    解码 JWT 令牌并返回载荷
 
     :param token: JWT 令牌字符串
-    :return: 解码后的用户 ID
+    :return: 解码后的载荷
     :raises TokenError: 如果令牌无效、过期或解码失败
     """
     try:
         # 解码 JWT 令牌
-        payload = jwt.decode(
-            token,
-            settings.TOKEN_SECRET_KEY,
-            algorithms=[settings.TOKEN_ALGORITHM]
-        )
-
-        # 从解码后的载荷中提取用户 ID
-        user_id = int(payload.get('sub'))
+        payload = jwt_backend.decode(token)
 
         # 验证用户 ID 是否存在
-        if not user_id:
+        if not int(payload.get('sub')):
             raise TokenError(msg='Token 无效')
 
     except ExpiredSignatureError:
@@ -205,7 +645,37 @@ def jwt_decode(token: str) -> int:
         # 捕获其他 JWT 相关错误或一般异常
         raise TokenError(msg='Token 无效')
 
-    # 返回解码后的用户 ID
+    # 返回解码后的载荷
+    return payload
+
+
+def jwt_decode(token: str) -> int:
+    """
+    解码 JWT 令牌并提取用户 ID
+
+    :param token: JWT 令牌字符串
+    :return: 解码后的用户 ID
+    :raises TokenError: 如果令牌无效、过期或解码失败
+    """
+    return int(jwt_decode_payload(token)['sub'])
+
+
+def stateless_token_verify(token: str) -> int:
+    """
+    无状态模式下验证访问令牌（仅本地验签和进程内吊销状态，不访问 redis）
+
+    :param token: JWT 令牌字符串
+    :return: 解码后的用户 ID
+    :raises TokenError: 如果令牌无效、过期或已吊销
+    """
+    payload = jwt_decode_payload(token)
+    user_id = int(payload['sub'])
+    jti = payload.get('jti')
+    # 缺少 jti / ver 的令牌无法吊销，视为无效
+    if not jti or 'ver' not in payload:
+        raise TokenError(msg='Token 无效')
+    if payload['ver'] < _token_versions.get(user_id, 0) or jti in _token_denylist:
+        raise TokenError(msg='Token 已过期')
     return user_id
 
 
@@ -248,6 +718,56 @@ async def get_current_user(db: AsyncSession, pk: int) -> User:
     return user
 
 
+# 进程内用户缓存（L1），位于 redis 用户缓存之前，缓存已校验的 CurrentUserIns
+_user_local_cache: LRUCache[int, CurrentUserIns] = LRUCache(
+    maxsize=settings.JWT_USER_LOCAL_CACHE_MAXSIZE, ttl=settings.JWT_USER_LOCAL_CACHE_EXPIRE_SECONDS
+)
+# 失效版本号，防止并发请求将失效前读取的旧数据写回 L1 缓存
+_user_local_cache_version = 0
+
+
+def _evict_user_local_cache(*user_ids: int) -> None:
+    global _user_local_cache_version
+    _user_local_cache_version += 1
+    if user_ids:
+        _user_local_cache.delete(*user_ids)
+    else:
+        _user_local_cache.clear()
+
+
+async def _on_user_cache_invalidate(message: str) -> None:
+    _evict_user_local_cache(*json.decode(message))
+
+
+async def _on_user_cache_reconnect() -> None:
+    # 断线期间可能遗漏失效广播，重新订阅后清空本地缓存
+    _evict_user_local_cache()
+
+
+def init_user_cache_listener() -> None:
+    """
+    启动用户缓存失效广播监听，仅在应用启动时调用
+
+    :return:
+    """
+    redis_client.add_listener(
+        settings.JWT_USER_REDIS_CHANNEL, _on_user_cache_invalidate, on_reconnect=_on_user_cache_reconnect
+    )
+
+
+async def clear_user_cache(*user_ids: int) -> None:
+    """
+    清除用户缓存（包含已编译的权限标识），并广播到所有 worker / 节点的进程内缓存
+
+    :param user_ids: 用户ID
+    :return:
+    """
+    if user_ids:
+        _evict_user_local_cache(*user_ids)
+        await redis_client.delete(*[f'{settings.JWT_USER_REDIS_PREFIX}:{user_id}' for user_id in user_ids])
+        await redis_client.publish(settings.JWT_USER_REDIS_CHANNEL, json.encode(user_ids))
+
+
 def superuser_verify(request: Request) -> bool:
     """
     验证当前用户权限通过令牌
@@ -265,12 +785,26 @@ async def jwt_authentication(token: str) -> CurrentUserIns:
     :param token:
     :return:
     """
-    user_id = jwt_decode(token)
-    key = f'{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}'
-    token_verify = await redis_client.get(key)
-    if not token_verify:
-        raise TokenError(msg='Token 已过期')
-    cache_user = await redis_client.get(f'{settings.JWT_USER_REDIS_PREFIX}:{user_id}')
+    if settings.TOKEN_STATELESS:
+        user_id = stateless_token_verify(token)
+        user = _user_local_cache.get(user_id)
+        if user is not None:
+            return user
+        version = _user_local_cache_version
+        cache_user = await redis_client.get(f'{settings.JWT_USER_REDIS_PREFIX}:{user_id}')
+    else:
+        user_id = jwt_decode(token)
+        key = f'{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}'
+        user = _user_local_cache.get(user_id)
+        if user is not None:
+            if not await redis_client.get(key):
+                raise TokenError(msg='Token 已过期')
+            return user
+        version = _user_local_cache_version
+        # 令牌校验和用户缓存获取合并为一次往返
+        token_verify, cache_user = await redis_client.mget(key, f'{settings.JWT_USER_REDIS_PREFIX}:{user_id}')
+        if not token_verify:
+            raise TokenError(msg='Token 已过期')
     if not cache_user:
         async with async_db_session() as db:
             current_user = await get_current_user(db, user_id)
@@ -284,4 +818,6 @@ async def jwt_authentication(token: str) -> CurrentUserIns:
         # TODO: 在恰当的时机，应替换为使用 model_validate_json
         # https://docs.pydantic.dev/latest/concepts/json/#partial-json-parsing
         user = CurrentUserIns.model_validate(from_json(cache_user, allow_partial=True))
+    if version == _user_local_cache_version:
+        _user_local_cache.set(user_id, user)
     return user
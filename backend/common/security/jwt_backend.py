@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : jwt_backend.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/21 10:20
+'''
+import base64
+import hashlib
+import hmac
+import time
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+from jose import ExpiredSignatureError, JWTError
+from jose import jwt as jose_jwt
+from msgspec import DecodeError, json
+
+from backend.core.conf import settings
+from backend.core.path_conf import JWT_KEY_DIR
+from backend.utils.cache import LRUCache
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class HMACKey:
+    """HMAC 密钥（HS256 / HS384 / HS512）"""
+
+    _digests = {'HS256': hashlib.sha256, 'HS384': hashlib.sha384, 'HS512': hashlib.sha512}
+
+    def __init__(self, alg: str, secret: bytes | str):
+        self.alg = alg
+        self.can_sign = True
+        self._secret = secret if isinstance(secret, bytes) else secret.encode('utf-8')
+        self._digest = self._digests[alg]
+
+    def sign(self, msg: bytes) -> bytes:
+        return hmac.new(self._secret, msg, self._digest).digest()
+
+    def verify(self, msg: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self.sign(msg), signature)
+
+
+class ES256Key:
+    """ECDSA P-256 密钥，签名为 JWS 规定的 r || s 定长格式"""
+
+    alg = 'ES256'
+
+    def __init__(self, key: ec.EllipticCurvePrivateKey | ec.EllipticCurvePublicKey):
+        if not isinstance(key.curve, ec.SECP256R1):
+            raise ValueError('ES256 需要 P-256 曲线密钥')
+        self.can_sign = isinstance(key, ec.EllipticCurvePrivateKey)
+        self._private_key = key if self.can_sign else None
+        self._public_key = key.public_key() if self.can_sign else key
+        self._algorithm = ec.ECDSA(hashes.SHA256())
+
+    def sign(self, msg: bytes) -> bytes:
+        r, s = decode_dss_signature(self._private_key.sign(msg, self._algorithm))
+        return r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
+
+    def verify(self, msg: bytes, signature: bytes) -> bool:
+        if len(signature) != 64:
+            return False
+        r, s = int.from_bytes(signature[:32], 'big'), int.from_bytes(signature[32:], 'big')
+        try:
+            self._public_key.verify(encode_dss_signature(r, s), msg, self._algorithm)
+        except InvalidSignature:
+            return False
+        return True
+
+
+class EdDSAKey:
+    """Ed25519 密钥"""
+
+    alg = 'EdDSA'
+
+    def __init__(self, key: ed25519.Ed25519PrivateKey | ed25519.Ed25519PublicKey):
+        self.can_sign = isinstance(key, ed25519.Ed25519PrivateKey)
+        self._private_key = key if self.can_sign else None
+        self._public_key = key.public_key() if self.can_sign else key
+
+    def sign(self, msg: bytes) -> bytes:
+        return self._private_key.sign(msg)
+
+    def verify(self, msg: bytes, signature: bytes) -> bool:
+        try:
+            self._public_key.verify(signature, msg)
+        except InvalidSignature:
+            return False
+        return True
+
+
+JWTKey = HMACKey | ES256Key | EdDSAKey
+
+
+class JWTBackend(ABC):
+    """JWT 编解码后端，解码失败时抛出 jose 的 ExpiredSignatureError / JWTError"""
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        """
+        签发令牌
+
+        :param claims: 令牌声明
+        :return:
+        """
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        """
+        验证并解码令牌
+
+        :param token: 令牌
+        :return: 令牌声明
+        """
+
+
+class JoseJWTBackend(JWTBackend):
+    """python-jose 实现，仅支持单个密钥"""
+
+    def __init__(self, key: str, algorithm: str, verify_key: str | None = None):
+        """
+        :param key: 签名密钥
+        :param algorithm: 算法
+        :param verify_key: 验签密钥，非对称算法时为公钥，默认与签名密钥相同
+        """
+        self.key = key
+        self.verify_key = verify_key or key
+        self.algorithm = algorithm
+        self.algorithms = [algorithm]
+
+    def encode(self, claims: dict) -> str:
+        return jose_jwt.encode(claims, self.key, self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        return jose_jwt.decode(token, self.verify_key, algorithms=self.algorithms)
+
+
+class NativeJWTBackend(JWTBackend):
+    """
+    基于 cryptography 的 JWS 实现，密钥对象在启动时预先加载
+
+    令牌头部携带 kid，解码时按 kid 从密钥环中选择密钥，未携带 kid 的令牌使用当前签名密钥
+    """
+
+    def __init__(self, keyring: dict[str, JWTKey], kid: str):
+        """
+        :param keyring: 密钥环，kid -> 密钥
+        :param kid: 当前签名密钥 ID
+        """
+        key = keyring.get(kid)
+        if key is None or not key.can_sign:
+            raise ValueError(f'JWT 签名密钥 {kid} 不存在或缺少私钥')
+        self.keyring = keyring
+        self.kid = kid
+        self._signing_key = key
+        self._header_segment = _b64encode(json.encode({'alg': key.alg, 'typ': 'JWT', 'kid': kid}))
+        # 头部种类很少，缓存解析结果，限制容量防止伪造头部撑满内存
+        self._headers: LRUCache[str, tuple[str, str]] = LRUCache(maxsize=64)
+
+    def encode(self, claims: dict) -> str:
+        payload = {k: int(v.timestamp()) if isinstance(v, datetime) else v for k, v in claims.items()}
+        signing_input = f'{self._header_segment}.{_b64encode(json.encode(payload))}'
+        return f'{signing_input}.{_b64encode(self._signing_key.sign(signing_input.encode("ascii")))}'
+
+    def _parse_header(self, segment: str) -> tuple[str, str]:
+        header = self._headers.get(segment)
+        if header is None:
+            data = json.decode(_b64decode(segment))
+            if not isinstance(data, dict):
+                raise JWTError('Invalid header')
+            header = (data.get('alg'), data.get('kid', self.kid))
+            self._headers.set(segment, header)
+        return header
+
+    def decode(self, token: str) -> dict:
+        try:
+            signing_input, signature_segment = token.rsplit('.', 1)
+            header_segment, payload_segment = signing_input.split('.')
+            alg, kid = self._parse_header(header_segment)
+            signature = _b64decode(signature_segment)
+            msg = signing_input.encode('ascii')
+        except (ValueError, TypeError, DecodeError):
+            raise JWTError('Invalid token')
+        key = self.keyring.get(kid)
+        if key is None or key.alg != alg:
+            raise JWTError('Invalid key')
+        if not key.verify(msg, signature):
+            raise JWTError('Signature verification failed')
+        try:
+            payload = json.decode(_b64decode(payload_segment))
+        except (ValueError, DecodeError):
+            raise JWTError('Invalid payload')
+        if not isinstance(payload, dict):
+            raise JWTError('Invalid payload')
+        exp = payload.get('exp')
+        if exp is not None:
+            if not isinstance(exp, int | float):
+                raise JWTError('Invalid exp')
+            if exp < time.time():
+                raise ExpiredSignatureError('Signature has expired')
+        return payload
+
+
+def load_key(alg: str, data: bytes) -> JWTKey:
+    """
+    加载 PEM 格式的非对称密钥，私钥可签名和验签，公钥仅可验签
+
+    :param alg: 算法
+    :param data: PEM 数据
+    :return:
+    """
+    try:
+        key = serialization.load_pem_private_key(data, password=None)
+    except ValueError:
+        key = serialization.load_pem_public_key(data)
+    if alg == 'ES256' and isinstance(key, ec.EllipticCurvePrivateKey | ec.EllipticCurvePublicKey):
+        return ES256Key(key)
+    if alg == 'EdDSA' and isinstance(key, ed25519.Ed25519PrivateKey | ed25519.Ed25519PublicKey):
+        return EdDSAKey(key)
+    raise ValueError(f'密钥类型与 JWT 算法 {alg} 不匹配')
+
+
+def load_keyring(alg: str, kid: str, secret: str, key_dir: str) -> dict[str, JWTKey]:
+    """
+    加载密钥环
+
+    HS* 算法：当前签名密钥为 TOKEN_SECRET_KEY，密钥目录下的 {kid}.key 文件为其他密钥，当前 kid 的密钥文件须与其一致
+    ES256 / EdDSA 算法：密钥目录下的 {kid}.pem 文件，轮换后旧密钥可只保留公钥用于验签
+
+    :param alg: 算法
+    :param kid: 当前签名密钥 ID
+    :param secret: HMAC 密钥
+    :param key_dir: 密钥目录
+    :return:
+    """
+    keyring: dict[str, JWTKey] = {}
+    path = Path(key_dir)
+    if alg in HMACKey._digests:
+        if path.is_dir():
+            for file in path.glob('*.key'):
+                key_secret = file.read_text('utf-8').strip()
+                if file.stem == kid and key_secret != secret:
+                    raise ValueError(f'密钥文件 {file.name} 与 TOKEN_SECRET_KEY 不一致')
+                keyring[file.stem] = HMACKey(alg, key_secret)
+        keyring[kid] = HMACKey(alg, secret)
+    elif alg in ('ES256', 'EdDSA'):
+        if path.is_dir():
+            for file in path.glob('*.pem'):
+                keyring[file.stem] = load_key(alg, file.read_bytes())
+    else:
+        raise ValueError(f'不支持的 JWT 算法：{alg}')
+    return keyring
+
+
+def create_jwt_backend() -> JWTBackend:
+    """
+    根据配置创建 JWT 后端
+
+    :return:
+    """
+    if settings.TOKEN_BACKEND == 'jose':
+        return JoseJWTBackend(settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM)
+    keyring = load_keyring(settings.TOKEN_ALGORITHM, settings.TOKEN_KEY_ID, settings.TOKEN_SECRET_KEY, JWT_KEY_DIR)
+    return NativeJWTBackend(keyring, settings.TOKEN_KEY_ID)
+
+
+jwt_backend: JWTBackend = create_jwt_backend()
@@ -12,6 +12,7 @@ from typing import TYPE_CHECKING
 from fastapi import Request
 from sqlalchemy import ColumnElement, and_, or_
 
+from backend.app.admin.crud.crud_dept import dept_closure
 from backend.common.enums import RoleDataRuleExpressionType, RoleDataRuleOperatorType
 from backend.common.exception import errors
 from backend.common.exception.errors import ServerError
@@ -99,6 +100,13 @@ def filter_data_permission(request: Request) -> ColumnElement[bool]:
         elif rule.expression == RoleDataRuleExpressionType.not_in:
             values = rule.value.split(',') if isinstance(rule.value, str) else rule.value
             condition = ~column_obj.in_(values)
+        elif rule_expression == RoleDataRuleExpressionType.dept_subtree:
+            values = rule.value.split(',') if isinstance(rule.value, str) else rule.value
+            try:
+                dept_ids = [int(value) for value in values]
+            except (TypeError, ValueError):
+                raise errors.ForbiddenError(msg=f'数据权限规则 {rule.name} 的部门 ID 无效')
+            condition = column_obj.in_(dept_closure.descendants(*dept_ids))
 
         if condition is not None:
             rule_operator = rule.operator
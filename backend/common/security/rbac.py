@@ -7,49 +7,170 @@
 @Author  : imbalich
 @Time    : 2024/12/15 21:14
 '''
+import asyncio
+
+from uuid import uuid4
+
 import casbin
 import casbin_async_sqlalchemy_adapter
 
 from fastapi import Depends, Request
+from msgspec import json
 
 from backend.app.admin.model import CasbinRule
-from backend.common.enums import MethodType, StatusType
+from backend.common.enums import MethodType
 from backend.common.exception.errors import AuthorizationError, TokenError
+from backend.common.log import log
 from backend.common.security.jwt import DependsJwtAuth
 from backend.core.conf import settings
 from backend.database.db import async_engine
+from backend.database.redis import redis_client
+
+# 模型定义：https://casbin.org/zh/docs/category/model
+_CASBIN_RBAC_MODEL_CONF_TEXT = """
+[request_definition]
+r = sub, obj, act
+
+[policy_definition]
+p = sub, obj, act
+
+[role_definition]
+g = _, _
+
+[policy_effect]
+e = some(where (p.eft == allow))
+
+[matchers]
+m = g(r.sub, p.sub) && (keyMatch(r.obj, p.obj) || keyMatch3(r.obj, p.obj)) && (r.act == p.act || p.act == "*")
+"""
 
 
 class RBAC:
+    def __init__(self):
+        # 进程内 casbin 执行器单例，策略变更通过 redis 发布订阅增量同步
+        self._enforcer: casbin.AsyncEnforcer | None = None
+        self._enforcer_lock = asyncio.Lock()
+        self._node_id = uuid4().hex
+
     @staticmethod
-    async def enforcer() -> casbin.AsyncEnforcer:
+    async def _create_enforcer() -> casbin.AsyncEnforcer:
+        """
+        创建 casbin 执行器并全量加载策略
+
+        :return:
+        """
+        adapter = casbin_async_sqlalchemy_adapter.Adapter(async_engine, db_class=CasbinRule)
+        model = casbin.AsyncEnforcer.new_model(text=_CASBIN_RBAC_MODEL_CONF_TEXT)
+        enforcer = casbin.AsyncEnforcer(model, adapter)
+        await enforcer.load_policy()
+        return enforcer
+
+    async def enforcer(self) -> casbin.AsyncEnforcer:
         """
         获取 casbin 执行器
 
         :return:
         """
-        # 模型定义：https://casbin.org/zh/docs/category/model
-        _CASBIN_RBAC_MODEL_CONF_TEXT = """
-        [request_definition]
-        r = sub, obj, act
+        if self._enforcer is None:
+            async with self._enforcer_lock:
+                if self._enforcer is None:
+                    self._enforcer = await self._create_enforcer()
+        return self._enforcer
 
-        [policy_definition]
-        p = sub, obj, act
+    async def init_enforcer(self) -> None:
+        """
+        初始化 casbin 执行器并启动策略变更监听，仅在 casbin 鉴权模式下于应用启动时调用
 
-        [role_definition]
-        g = _, _
+        :return:
+        """
+        await self.enforcer()
+        # 断线期间可能遗漏变更，重新订阅后全量校准一次
+        redis_client.add_listener(
+            settings.RBAC_CASBIN_REDIS_CHANNEL, self._on_policy_change, on_reconnect=self.reload_policy
+        )
+
+    async def notify_policy_change(
+        self,
+        op: str,
+        sec: str,
+        rules: list[list[str]] | None = None,
+        new_rules: list[list[str]] | None = None,
+    ) -> None:
+        """
+        广播策略变更，其他 worker / 节点仅同步变更的规则
 
-        [policy_effect]
-        e = some(where (p.eft == allow))
+        :param op: 操作类型，add / remove / update / reload
+        :param sec: 策略类型，p / g
+        :param rules: 变更的规则
+        :param new_rules: 更新后的规则，仅 update 操作需要
+        :return:
+        """
+        message = {
+            'node': self._node_id,
+            'op': op,
+            'sec': sec,
+            'rules': rules or [],
+            'new_rules': new_rules or [],
+        }
+        if op == 'reload':
+            # 绕过执行器直接修改数据库时，本节点同样需要重新加载
+            await self.reload_policy()
+        try:
+            await redis_client.publish(settings.RBAC_CASBIN_REDIS_CHANNEL, json.encode(message))
+        except Exception as e:
+            log.error(f'casbin 策略变更广播失败: {e}')
+
+    async def reload_policy(self) -> None:
+        """
+        全量重新加载策略
 
-        [matchers]
-        m = g(r.sub, p.sub) && (keyMatch(r.obj, p.obj) || keyMatch3(r.obj, p.obj)) && (r.act == p.act || p.act == "*")
+        :return:
         """
-        adapter = casbin_async_sqlalchemy_adapter.Adapter(async_engine, db_class=CasbinRule)
-        model = casbin.AsyncEnforcer.new_model(text=_CASBIN_RBAC_MODEL_CONF_TEXT)
-        enforcer = casbin.AsyncEnforcer(model, adapter)
+        enforcer = await self.enforcer()
         await enforcer.load_policy()
-        return enforcer
+
+    @staticmethod
+    def _apply_policy_change(enforcer: casbin.AsyncEnforcer, message: dict) -> None:
+        """
+        将其他节点的策略变更增量应用到内存模型
+
+        :param enforcer:
+        :param message:
+        :return:
+        """
+        model = enforcer.get_model()
+        sec = message['sec']
+        rules = message['rules']
+        match message['op']:
+            case 'add':
+                for rule in rules:
+                    if not model.has_policy(sec, sec, rule):
+                        model.add_policy(sec, sec, rule)
+            case 'remove':
+                for rule in rules:
+                    if model.has_policy(sec, sec, rule):
+                        model.remove_policy(sec, sec, rule)
+            case 'update':
+                for old_rule, new_rule in zip(rules, message['new_rules']):
+                    if model.has_policy(sec, sec, old_rule):
+                        model.update_policy(sec, sec, old_rule, new_rule)
+        if sec == 'g':
+            enforcer.build_role_links()
+
+    async def _on_policy_change(self, message: str) -> None:
+        """
+        处理策略变更广播
+
+        :param message:
+        :return:
+        """
+        data = json.decode(message)
+        if data['node'] == self._node_id:
+            return
+        if data['op'] == 'reload':
+            await self.reload_policy()
+        else:
+            self._apply_policy_change(await self.enforcer(), data)
 
     async def rbac_verify(self, request: Request, _token: str = DependsJwtAuth) -> None:
         """
@@ -101,12 +222,7 @@ class RBAC:
                 return
 
             # 已分配菜单权限校验
-            allow_perms = []
-            for role in user_roles:
-                for menu in role.menus:
-                    if menu.perms and menu.status == StatusType.enable:
-                        allow_perms.extend(menu.perms.split(','))
-            if path_auth_perm not in allow_perms:
+            if path_auth_perm not in request.user.perms:
                 raise AuthorizationError
         else:
             # casbin 鉴权白名单
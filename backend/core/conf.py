@@ -73,13 +73,23 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_TIMEOUT: int = 5  # 超时时间
+    REDIS_LISTENER_RETRY_SECONDS: int = 3  # 频道监听断线重连间隔，单位：秒
+    REDIS_PUBSUB_HEALTH_CHECK_SECONDS: int = 30  # 频道监听心跳检测间隔，单位：秒
 
     # Token
-    TOKEN_ALGORITHM: str = 'HS256'  # 算法
+    TOKEN_ALGORITHM: str = 'HS256'  # 算法：HS256 / HS384 / HS512 / ES256 / EdDSA（EdDSA 仅支持 native 后端）
+    TOKEN_BACKEND: Literal['jose', 'native'] = 'jose'  # JWT 实现，native 基于 cryptography 并支持 kid 密钥环
+    TOKEN_KEY_ID: str = 'default'  # 当前签名密钥 ID（kid），轮换时先向所有节点分发新密钥，再切换此配置
+    TOKEN_STATELESS: bool = False  # 无状态模式：访问令牌仅本地验签，吊销通过进程内版本号 / 黑名单（redis 同步）
     TOKEN_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
     TOKEN_REFRESH_EXPIRE_SECONDS: int = 60 * 60 * 24 * 7  # refresh token 过期时间，单位：秒
     TOKEN_REDIS_PREFIX: str = 'fbb:token'
     TOKEN_REFRESH_REDIS_PREFIX: str = 'fbb:refresh_token'
+    TOKEN_INDEX_REDIS_PREFIX: str = 'fbb:token_index'  # 用户访问令牌索引
+    TOKEN_REFRESH_INDEX_REDIS_PREFIX: str = 'fbb:refresh_token_index'  # 用户刷新令牌索引
+    TOKEN_VERSION_REDIS_KEY: str = 'fbb:token_version'  # 无状态模式：用户令牌版本号
+    TOKEN_DENYLIST_REDIS_KEY: str = 'fbb:token_denylist'  # 无状态模式：令牌黑名单
+    TOKEN_REVOKE_REDIS_CHANNEL: str = 'fbb:token_revoke'  # 无状态模式：令牌吊销广播频道
     TOKEN_REQUEST_PATH_EXCLUDE: list[str] = [  # JWT / RBAC 白名单
         f'{FASTAPI_API_V1_PATH}/auth/login',
     ]
@@ -87,6 +97,14 @@ class Settings(BaseSettings):
     # JWT
     JWT_USER_REDIS_PREFIX: str = 'fbb:user'
     JWT_USER_REDIS_EXPIRE_SECONDS: int = 60 * 60 * 24 * 7
+    JWT_USER_REDIS_CHANNEL: str = f'{JWT_USER_REDIS_PREFIX}:invalidate'  # 用户缓存失效广播频道
+    JWT_USER_LOCAL_CACHE_MAXSIZE: int = 1024  # 进程内用户缓存容量
+    JWT_USER_LOCAL_CACHE_EXPIRE_SECONDS: int = 60  # 进程内用户缓存过期时间，单位：秒
+
+    # Password
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # bcrypt 计算成本，调高后旧密码在用户登录时自动重新哈希
+    PASSWORD_HASH_WORKERS: int = 4  # 密码哈希线程数
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 密码哈希最大排队数，超出时拒绝请求
 
     # Permission (RBAC)
     PERMISSION_MODE: Literal['casbin', 'role-menu'] = 'casbin'
@@ -98,6 +116,7 @@ class Settings(BaseSettings):
         ('POST', f'{FASTAPI_API_V1_PATH}/auth/logout'),
         ('POST', f'{FASTAPI_API_V1_PATH}/auth/token/new'),
     }
+    RBAC_CASBIN_REDIS_CHANNEL: str = f'{PERMISSION_REDIS_PREFIX}:casbin'  # 策略变更广播频道
 
     # Role-Menu
     RBAC_ROLE_MENU_EXCLUDE: list[str] = [
@@ -161,6 +180,13 @@ class Settings(BaseSettings):
     IP_LOCATION_PARSE: Literal['online', 'offline', 'false'] = 'offline'
     IP_LOCATION_REDIS_PREFIX: str = 'fbb:ip:location'
     IP_LOCATION_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
+    IP_LOCATION_NEGATIVE_EXPIRE_SECONDS: int = 60 * 10  # 查询失败结果的过期时间，单位：秒
+    IP_LOCATION_LOCAL_CACHE_MAXSIZE: int = 4096  # 进程内 IP 属地缓存容量
+    IP_LOCATION_LOCAL_CACHE_EXPIRE_SECONDS: int = 60 * 10  # 进程内 IP 属地缓存过期时间，单位：秒
+    IP_LOCATION_ONLINE_TIMEOUT: int = 3  # 在线查询超时时间，单位：秒
+
+    # User agent
+    USER_AGENT_PARSE_CACHE_MAXSIZE: int = 1024  # User-Agent 解析结果缓存容量
 
     # Opera log
     OPERA_LOG_PATH_EXCLUDE: list[str] = [
@@ -179,6 +205,31 @@ class Settings(BaseSettings):
         'new_password',
         'confirm_password',
     ]
+    OPERA_LOG_ENCRYPT_THREAD_THRESHOLD: int = 16  # AES 加密的值超过该数量时在线程池中执行，否则在事件循环内直接执行
+    OPERA_LOG_ENCRYPT_THREAD_BYTES: int = 16 * 1024  # AES 加密的值总字节数超过该值时在线程池中执行
+    OPERA_LOG_ARGS_MAX_BYTES: int = 64 * 1024  # 操作日志请求体最大捕获字节数，超出时仅记录大小
+    OPERA_LOG_QUEUE_MAXSIZE: int = 10000  # 操作日志写入队列容量，队列已满时丢弃新日志
+    OPERA_LOG_BATCH_SIZE: int = 100  # 操作日志批量写入条数
+    OPERA_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0  # 操作日志批量写入最长等待时间，单位：秒
+    OPERA_LOG_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0  # 应用关闭时等待操作日志写入的超时时间，单位：秒
+
+    # Pagination
+    PAGINATION_COUNT_REDIS_PREFIX: str = 'fbb:page_count'
+    PAGINATION_COUNT_EXPIRE_SECONDS: int = 30  # 分页总数缓存过期时间，单位：秒
+    PAGINATION_COUNT_CACHE_TABLES: list[str] = [  # 允许缓存分页总数的表，表写入提交后缓存失效
+        'sys_api',
+        'sys_login_log',
+        'sys_opera_log',
+        'sys_user',
+    ]
+    PAGINATION_COUNT_ESTIMATE_MIN_ROWS: int = 100000  # 估算行数低于该值时改为精确统计
+
+    # Tree cache
+    TREE_CACHE_REDIS_PREFIX: str = 'fbb:tree'
+    TREE_CACHE_REDIS_CHANNEL: str = f'{TREE_CACHE_REDIS_PREFIX}:invalidate'  # 树形结构缓存失效广播频道
+    TREE_CACHE_EXPIRE_SECONDS: int = 60 * 60 * 24 * 1  # 过期时间，单位：秒
+    TREE_CACHE_LOCAL_MAXSIZE: int = 256  # 进程内树形结构缓存容量
+    TREE_CACHE_LOCAL_EXPIRE_SECONDS: int = 60 * 5  # 进程内树形结构缓存过期时间，单位：秒
 
     # Data permission
     DATA_PERMISSION_MODELS: dict[
@@ -24,6 +24,9 @@ LOG_DIR = os.path.join(BasePath, 'log')
 # 离线 IP 数据库路径
 IP2REGION_XDB = os.path.join(BasePath, 'static', 'ip2region.xdb')
 
+# JWT 密钥目录
+JWT_KEY_DIR = os.path.join(BasePath, 'keys')
+
 # 挂载静态目录
 STATIC_DIR = os.path.join(BasePath, 'static')
 
@@ -17,9 +17,12 @@ from fastapi_limiter import FastAPILimiter
 from fastapi_pagination import add_pagination
 from starlette.middleware.authentication import AuthenticationMiddleware
 
+from backend.app.admin.service.opera_log_service import opera_log_writer
 from backend.app.router import route
 from backend.common.exception.exception_handler import register_exception
 from backend.common.log import setup_logging, set_customize_logfile
+from backend.common.security.jwt import init_token_revoke_listener, init_user_cache_listener, password_hasher
+from backend.common.security.rbac import rbac
 from backend.core.conf import settings
 from backend.core.path_conf import STATIC_DIR
 from backend.database.db import create_table
@@ -30,6 +33,8 @@ from backend.middleware.state_middleware import StateMiddleware
 from backend.utils.demo_site import demo_site
 from backend.utils.health_check import http_limit_callback, ensure_unique_route_names
 from backend.utils.openapi import simplify_operation_ids
+from backend.utils.request_parse import close_ip_api_client
+from backend.utils.tree_cache import init_tree_cache_listener
 from backend.utils.serializers import MsgSpecJSONResponse
 
 
@@ -48,13 +53,33 @@ async def register_init(app: FastAPI):
     await FastAPILimiter.init(
         redis=redis_client, prefix=settings.REQUEST_LIMITER_REDIS_PREFIX, http_callback=http_limit_callback
     )
+    # 监听用户缓存失效
+    init_user_cache_listener()
+    # 监听树形结构缓存失效
+    init_tree_cache_listener()
+    # 无状态令牌模式：加载并监听令牌吊销状态
+    if settings.TOKEN_STATELESS:
+        await init_token_revoke_listener()
+    # casbin 鉴权模式：加载并监听 casbin 策略
+    if settings.PERMISSION_MODE == 'casbin':
+        await rbac.init_enforcer()
+    # 启动操作日志批量写入
+    opera_log_writer.start()
 
     yield
 
+    # 写入剩余操作日志
+    await opera_log_writer.stop(settings.OPERA_LOG_SHUTDOWN_TIMEOUT_SECONDS)
+    # 停止 redis 频道监听
+    await redis_client.close_listeners()
     # 关闭 redis 连接
     await redis_client.close()
     # 关闭 limiter
     await FastAPILimiter.close()
+    # 关闭密码哈希线程池
+    password_hasher.shutdown()
+    # 关闭 IP 属地在线查询客户端
+    await close_ip_api_client()
 
 
 def register_app():
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : closure.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/24 10:40
+'''
+from typing import Sequence
+
+from sqlalchemy import Select, Table, delete, func, insert, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+
+class TreeClosure:
+    """
+    树形结构闭包表维护与查询
+
+    闭包表包含 ancestor_id、descendant_id、depth 三列，每个节点与其所有祖先（含自身，depth 为 0）各有一行，
+    节点的创建和移动须在同一事务中调用 insert_node / move_node 保持一致
+    """
+
+    def __init__(self, table: Table):
+        """
+        :param table: 闭包表
+        """
+        self.table = table
+        self.c = table.c
+
+    def descendants(self, *node_ids: int, include_self: bool = True) -> Select:
+        """
+        查询子树中的节点 ID，可直接用作 IN 子查询
+
+        :param node_ids: 子树根节点 ID
+        :param include_self: 是否包含根节点
+        :return:
+        """
+        stmt = select(self.c.descendant_id).where(self.c.ancestor_id.in_(node_ids))
+        if not include_self:
+            stmt = stmt.where(self.c.depth > 0)
+        return stmt
+
+    def ancestors(self, node_id: int, *, include_self: bool = False) -> Select:
+        """
+        查询祖先节点 ID，由根节点到父节点排序
+
+        :param node_id:
+        :param include_self: 是否包含节点自身
+        :return:
+        """
+        stmt = select(self.c.ancestor_id).where(self.c.descendant_id == node_id).order_by(self.c.depth.desc())
+        if not include_self:
+            stmt = stmt.where(self.c.depth > 0)
+        return stmt
+
+    async def get_depth(self, db: AsyncSession, node_id: int) -> int | None:
+        """
+        获取节点深度，根节点为 0
+
+        :param db:
+        :param node_id:
+        :return: 节点不存在时返回 None
+        """
+        return await db.scalar(select(func.max(self.c.depth)).where(self.c.descendant_id == node_id))
+
+    async def is_descendant(self, db: AsyncSession, node_id: int, ancestor_id: int) -> bool:
+        """
+        判断节点是否位于指定节点的子树中（含自身）
+
+        :param db:
+        :param node_id:
+        :param ancestor_id:
+        :return:
+        """
+        stmt = select(self.c.depth).where(self.c.ancestor_id == ancestor_id, self.c.descendant_id == node_id)
+        return await db.scalar(stmt) is not None
+
+    async def insert_node(self, db: AsyncSession, node_id: int, parent_id: int | None) -> None:
+        """
+        新增节点
+
+        :param db:
+        :param node_id:
+        :param parent_id:
+        :return:
+        """
+        await db.execute(insert(self.table).values(ancestor_id=node_id, descendant_id=node_id, depth=0))
+        if parent_id is not None:
+            stmt = select(self.c.ancestor_id, literal(node_id), self.c.depth + 1).where(
+                self.c.descendant_id == parent_id
+            )
+            await db.execute(insert(self.table).from_select(['ancestor_id', 'descendant_id', 'depth'], stmt))
+
+    async def move_node(self, db: AsyncSession, node_id: int, parent_id: int | None) -> None:
+        """
+        移动节点（连同子树）到新的父节点下，调用方须确保新父节点不在子树中
+
+        :param db:
+        :param node_id:
+        :param parent_id: 新父节点 ID，None 表示移动为根节点
+        :return:
+        """
+        # MySQL 不支持在 DELETE 的子查询中引用目标表，先查出子树
+        subtree_ids = (await db.execute(self.descendants(node_id))).scalars().all()
+        await db.execute(
+            delete(self.table).where(self.c.descendant_id.in_(subtree_ids), self.c.ancestor_id.not_in(subtree_ids))
+        )
+        if parent_id is not None:
+            parent, subtree = aliased(self.table), aliased(self.table)
+            stmt = (
+                select(parent.c.ancestor_id, subtree.c.descendant_id, parent.c.depth + subtree.c.depth + 1)
+                .select_from(parent.join(subtree, true()))
+                .where(parent.c.descendant_id == parent_id, subtree.c.ancestor_id == node_id)
+            )
+            await db.execute(insert(self.table).from_select(['ancestor_id', 'descendant_id', 'depth'], stmt))
+
+    async def rebuild(self, db: AsyncSession, nodes: Sequence[tuple[int, int | None]]) -> int:
+        """
+        根据节点的 parent_id 重建闭包表，用于初始化已有数据，父级链在成环或父节点不存在处截断
+
+        :param db:
+        :param nodes: (节点 ID, 父节点 ID)
+        :return: 写入的行数
+        """
+        parents = dict(nodes)
+        rows = []
+        for node_id in parents:
+            ancestor_id, depth, seen = node_id, 0, set()
+            while ancestor_id in parents and ancestor_id not in seen:
+                seen.add(ancestor_id)
+                rows.append({'ancestor_id': ancestor_id, 'descendant_id': node_id, 'depth': depth})
+                ancestor_id, depth = parents[ancestor_id], depth + 1
+        await db.execute(delete(self.table))
+        if rows:
+            await db.execute(insert(self.table), rows)
+        return len(rows)
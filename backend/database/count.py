@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : count.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/23 10:15
+'''
+import asyncio
+import hashlib
+import time
+
+from itertools import chain
+
+from fastapi_pagination.ext.sqlalchemy import create_count_query
+from sqlalchemy import Select, Table, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+from backend.common.enums import PageCountType
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.redis import redis_client
+
+# session.info 中记录本事务写入过的需缓存总数的表
+_DIRTY_TABLES_KEY = 'page_count_dirty_tables'
+# 失效任务引用，防止任务被提前回收
+_invalidate_tasks: set[asyncio.Task] = set()
+
+
+def _count_cache_key(table: str) -> str:
+    return f'{settings.PAGINATION_COUNT_REDIS_PREFIX}:{table}'
+
+
+def _single_table(stmt: Select) -> str | None:
+    froms = stmt.get_final_froms()
+    if len(froms) == 1 and isinstance(froms[0], Table):
+        return froms[0].name
+    return None
+
+
+def _filter_hash(stmt: Select) -> str:
+    compiled = stmt.compile()
+    params = sorted((k, repr(v)) for k, v in compiled.params.items())
+    return hashlib.md5(f'{compiled}|{params}'.encode('utf-8')).hexdigest()
+
+
+async def _estimate_count(db: AsyncSession, table: str) -> int | None:
+    """
+    根据数据库统计信息估算表行数
+
+    :param db:
+    :param table:
+    :return: 无统计信息时返回 None
+    """
+    if settings.DATABASE_TYPE == 'mysql':
+        stmt = text(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table'
+        )
+    else:
+        # 分区表的统计信息在各个子表上
+        stmt = text(
+            'SELECT SUM(c.reltuples) FROM pg_class c WHERE c.reltuples >= 0 AND (c.oid = to_regclass(:table) '
+            'OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:table)))'
+        )
+    estimated = await db.scalar(stmt, {'table': table})
+    return int(estimated) if estimated is not None else None
+
+
+async def count_total(db: AsyncSession, stmt: Select, count_type: PageCountType) -> tuple[int, PageCountType]:
+    """
+    统计分页总数
+
+    - estimate：无过滤条件的单表查询使用统计信息估算，估算值低于阈值或存在过滤条件时退化为 cached
+    - cached：按过滤条件缓存精确总数，仅用于 PAGINATION_COUNT_CACHE_TABLES 中的表，否则退化为 exact
+    - exact：COUNT(*)
+
+    :param db:
+    :param stmt: 分页查询
+    :param count_type: 统计方式
+    :return: 总数及实际使用的统计方式
+    """
+    table = _single_table(stmt)
+    if count_type == PageCountType.estimate:
+        if table is not None and stmt.whereclause is None:
+            estimated = await _estimate_count(db, table)
+            if estimated is not None and estimated >= settings.PAGINATION_COUNT_ESTIMATE_MIN_ROWS:
+                return estimated, PageCountType.estimate
+        count_type = PageCountType.cached
+    if count_type == PageCountType.cached and table not in settings.PAGINATION_COUNT_CACHE_TABLES:
+        count_type = PageCountType.exact
+
+    if count_type == PageCountType.cached:
+        key, field = _count_cache_key(table), _filter_hash(stmt)
+        cached = await redis_client.hget(key, field)
+        if cached:
+            total, expire_at = cached.split(':')
+            if float(expire_at) > time.time():
+                return int(total), count_type
+    total = await db.scalar(create_count_query(stmt))
+    if count_type == PageCountType.cached:
+        # 单条缓存的过期时间记录在值中，整个哈希在最后一次写入后过期
+        expire_at = time.time() + settings.PAGINATION_COUNT_EXPIRE_SECONDS
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, field, f'{total}:{expire_at}')
+            pipe.expire(key, settings.PAGINATION_COUNT_EXPIRE_SECONDS)
+            await pipe.execute()
+    return total, count_type
+
+
+def _mark_dirty(session: Session, table: str) -> None:
+    if table in settings.PAGINATION_COUNT_CACHE_TABLES:
+        session.info.setdefault(_DIRTY_TABLES_KEY, set()).add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark_dirty(orm_execute_state.session, mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session: Session, flush_context: UOWTransaction) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        _mark_dirty(session, inspect(obj).mapper.local_table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session: Session) -> None:
+    tables = session.info.pop(_DIRTY_TABLES_KEY, None)
+    if not tables:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_invalidate(tables))
+    _invalidate_tasks.add(task)
+    task.add_done_callback(_invalidate_tasks.discard)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_TABLES_KEY, None)
+
+
+async def _invalidate(tables: set[str]) -> None:
+    try:
+        await redis_client.delete(*(_count_cache_key(table) for table in tables))
+    except Exception as e:
+        log.error(f'分页总数缓存失效失败: {e}')
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : partition.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/22 16:30
+'''
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.common.log import log
+from backend.core.conf import settings
+from backend.database.db import async_db_session
+from backend.utils.timezone import timezone
+
+
+def month_start(dt: datetime, months: int = 0) -> datetime:
+    """
+    获取指定日期偏移若干月后的月初
+
+    :param dt:
+    :param months: 偏移月数
+    :return:
+    """
+    month = dt.year * 12 + dt.month - 1 + months
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=dt.tzinfo)
+
+
+class MonthlyPartitioner:
+    """
+    按月 RANGE 分区管理（分区列 created_time）
+
+    表需预先通过 sql/{mysql,postgresql}/partition_log_tables.sql 转换为分区表，未分区时所有分区操作均为空操作
+
+    - MySQL：RANGE COLUMNS 分区，分区名 p{YYYYMM}，另有兜底分区 pmax
+    - PostgreSQL：原生分区，子表名 {table}_p{YYYYMM}，另有兜底子表 {table}_default
+
+    分区 p{YYYYMM} 存放该月的数据，按名称识别，不符合命名规则的分区不做处理
+    """
+
+    def __init__(self, table: str):
+        """
+        :param table: 表名
+        """
+        self.table = table
+        self.prefix = 'p' if settings.DATABASE_TYPE == 'mysql' else f'{table}_p'
+
+    def _month(self, name: str) -> datetime | None:
+        suffix = name.removeprefix(self.prefix)
+        if name == suffix or len(suffix) != 6 or not suffix.isdigit():
+            return None
+        return datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=timezone.tz_info)
+
+    async def get_partitions(self, db: AsyncSession) -> dict[datetime, str] | None:
+        """
+        获取按月分区
+
+        :param db:
+        :return: 月初 -> 分区名，未分区时返回 None
+        """
+        if settings.DATABASE_TYPE == 'mysql':
+            stmt = text(
+                'SELECT PARTITION_NAME FROM information_schema.PARTITIONS '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL'
+            )
+        else:
+            stmt = text(
+                'SELECT c.relname FROM pg_inherits i '
+                'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+                'WHERE p.relname = :table'
+            )
+        names = (await db.execute(stmt, {'table': self.table})).scalars().all()
+        if not names:
+            return None
+        return {month: name for name in names if (month := self._month(name)) is not None}
+
+    async def _create_pg_partition(self, db: AsyncSession, name: str, start: datetime, end: datetime) -> None:
+        """
+        创建 PostgreSQL 子表
+
+        兜底子表中已有该范围的数据时无法直接创建子表（任务未能在月初前运行），
+        需先分离兜底子表，创建子表后将数据迁移到新子表，再重新挂载兜底子表
+
+        :param db:
+        :param name: 子表名
+        :param start: 分区起始时间
+        :param end: 分区结束时间
+        :return:
+        """
+        default = f'{self.table}_default'
+        create_stmt = text(
+            f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table} '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        bounds = {'start': start, 'end': end}
+        in_range = 'created_time >= :start AND created_time < :end'
+        has_default = await db.scalar(text('SELECT to_regclass(:name) IS NOT NULL'), {'name': default})
+        if not has_default or not await db.scalar(
+            text(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})'), bounds
+        ):
+            await db.execute(create_stmt)
+            return
+        await db.execute(text(f'ALTER TABLE {self.table} DETACH PARTITION {default}'))
+        await db.execute(create_stmt)
+        await db.execute(text(f'INSERT INTO {self.table} SELECT * FROM {default} WHERE {in_range}'), bounds)
+        await db.execute(text(f'DELETE FROM {default} WHERE {in_range}'), bounds)
+        await db.execute(text(f'ALTER TABLE {self.table} ATTACH PARTITION {default} DEFAULT'))
+
+    async def create_partitions(self, db: AsyncSession, months: int) -> list[str]:
+        """
+        预建从当月起之后若干个月的分区，只在已有的最新分区之后追加
+
+        分区创建失败时记录日志并停止创建后续分区（避免留下空缺的月份），PostgreSQL 下失败的分区回滚到各自的保存点
+
+        :param db:
+        :param months: 预建月数
+        :return: 新建的分区名
+        """
+        partitions = await self.get_partitions(db)
+        if partitions is None:
+            return []
+        latest = max(partitions, default=None)
+        now = timezone.now()
+        created = []
+        for offset in range(months + 1):
+            start = month_start(now, offset)
+            if latest is not None and start <= latest:
+                continue
+            name = f'{self.prefix}{start:%Y%m}'
+            end = month_start(start, 1)
+            try:
+                if settings.DATABASE_TYPE == 'mysql':
+                    # 从兜底分区中拆分（兜底分区中该范围的数据随之迁移），兜底分区为空时仅修改元数据
+                    stmt = (
+                        f'ALTER TABLE {self.table} REORGANIZE PARTITION pmax INTO ('
+                        f"PARTITION {name} VALUES LESS THAN ('{end:%Y-%m-%d}'), "
+                        'PARTITION pmax VALUES LESS THAN (MAXVALUE))'
+                    )
+                    await db.execute(text(stmt))
+                else:
+                    async with db.begin_nested():
+                        await self._create_pg_partition(db, name, start, end)
+            except SQLAlchemyError as e:
+                log.error(f'{self.table} 分区 {name} 创建失败：{e}')
+                break
+            created.append(name)
+        return created
+
+    async def drop_partitions(self, db: AsyncSession, before: datetime) -> list[str]:
+        """
+        删除数据全部早于指定时间的分区
+
+        :param db:
+        :param before: 截止时间
+        :return: 删除的分区名
+        """
+        partitions = await self.get_partitions(db)
+        if not partitions:
+            return []
+        names = [name for month, name in sorted(partitions.items()) if month_start(month, 1) <= before]
+        if names:
+            if settings.DATABASE_TYPE == 'mysql':
+                await db.execute(text(f'ALTER TABLE {self.table} DROP PARTITION {", ".join(names)}'))
+            else:
+                await db.execute(text(f'DROP TABLE {", ".join(names)}'))
+        return names
+
+
+async def purge_expired(
+    partitioner: MonthlyPartitioner,
+    delete_batch: Callable[[AsyncSession, datetime, int], Awaitable[int]],
+    *,
+    before: datetime,
+    batch_size: int,
+    precreate_months: int,
+) -> dict:
+    """
+    清理过期数据：分区表先预建分区并整体删除过期分区，剩余过期数据按批删除，每批单独提交
+
+    :param partitioner: 分区管理
+    :param delete_batch: 单批删除函数，返回删除条数
+    :param before: 截止时间，早于该时间的数据将被删除
+    :param batch_size: 每批删除条数
+    :param precreate_months: 预建分区月数
+    :return:
+    """
+    created, dropped = [], []
+    # 分区维护失败不影响按批删除
+    try:
+        async with async_db_session.begin() as db:
+            created = await partitioner.create_partitions(db, precreate_months)
+    except SQLAlchemyError as e:
+        log.error(f'{partitioner.table} 预建分区失败：{e}')
+    try:
+        async with async_db_session.begin() as db:
+            dropped = await partitioner.drop_partitions(db, before)
+    except SQLAlchemyError as e:
+        log.error(f'{partitioner.table} 删除过期分区失败：{e}')
+    if created or dropped:
+        log.info(f'{partitioner.table} 新建分区：{created}，删除分区：{dropped}')
+    deleted = 0
+    while True:
+        async with async_db_session.begin() as db:
+            count = await delete_batch(db, before, batch_size)
+        deleted += count
+        if count < batch_size:
+            break
+    return {'created_partitions': created, 'dropped_partitions': dropped, 'deleted_rows': deleted}
@@ -7,9 +7,13 @@
 @Author  : imbalich
 @Time    : 2024/12/8 1:58
 '''
+import asyncio
 import sys
 
-from redis.asyncio import Redis
+from typing import Awaitable, Callable
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.client import PubSub
 from redis.exceptions import AuthenticationError, TimeoutError
 
 from backend.common.log import log
@@ -26,6 +30,8 @@ class RedisCli(Redis):
             socket_timeout=settings.REDIS_TIMEOUT,
             decode_responses=True,  # 转码 utf-8
         )
+        self._listeners: list[asyncio.Task] = []
+        self._pubsub_pool: ConnectionPool | None = None
 
     async def open(self):
         """
@@ -66,6 +72,91 @@ class RedisCli(Redis):
         if keys:
             await self.delete(*keys)
 
+    def add_listener(
+        self,
+        channel: str,
+        handler: Callable[[str], Awaitable[None]],
+        *,
+        on_reconnect: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        后台订阅频道并持续处理消息，断线后自动重连
+
+        :param channel: 频道名称
+        :param handler: 消息处理函数
+        :param on_reconnect: 断线重新订阅成功后的回调，用于补偿断线期间遗漏的消息，首次订阅不调用
+        :return:
+        """
+        self._listeners.append(asyncio.create_task(self._listen(channel, handler, on_reconnect)))
+
+    def _pubsub(self) -> PubSub:
+        """
+        创建订阅对象
+
+        订阅连接使用独立连接池且不设置读超时，频道空闲不视为断线，通过心跳和 TCP keepalive 检测断线
+
+        :return:
+        """
+        if self._pubsub_pool is None:
+            pool = self.connection_pool
+            self._pubsub_pool = pool.__class__(
+                connection_class=pool.connection_class,
+                **{
+                    **pool.connection_kwargs,
+                    'socket_timeout': None,
+                    'socket_keepalive': True,
+                    'health_check_interval': settings.REDIS_PUBSUB_HEALTH_CHECK_SECONDS,
+                },
+            )
+        return PubSub(self._pubsub_pool)
+
+    async def _listen(
+        self,
+        channel: str,
+        handler: Callable[[str], Awaitable[None]],
+        on_reconnect: Callable[[], Awaitable[None]] | None,
+    ) -> None:
+        reconnect = False
+        while True:
+            pubsub = self._pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                if reconnect and on_reconnect is not None:
+                    await on_reconnect()
+                while True:
+                    # 等待超时仅返回 None，每轮等待前按心跳间隔发送 PING 检测连接
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=settings.REDIS_PUBSUB_HEALTH_CHECK_SECONDS
+                    )
+                    if message is None or message['type'] != 'message':
+                        continue
+                    try:
+                        await handler(message['data'])
+                    except Exception as e:
+                        log.error('❌ redis 频道 {} 消息处理异常 {}', channel, e)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error('❌ redis 频道 {} 监听异常 {}', channel, e)
+                reconnect = True
+                await asyncio.sleep(settings.REDIS_LISTENER_RETRY_SECONDS)
+            finally:
+                await pubsub.aclose()
+
+    async def close_listeners(self) -> None:
+        """
+        停止所有频道监听
+
+        :return:
+        """
+        for task in self._listeners:
+            task.cancel()
+        await asyncio.gather(*self._listeners, return_exceptions=True)
+        self._listeners.clear()
+        if self._pubsub_pool is not None:
+            await self._pubsub_pool.disconnect()
+            self._pubsub_pool = None
+
 
 # 创建 redis 客户端单例
 redis_client: RedisCli = RedisCli()
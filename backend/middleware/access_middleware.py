@@ -7,49 +7,60 @@
 @Author  ：imbalich
 @Date    ：2024/12/7 17:40 
 '''
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from backend.common.log import log
-from backend.utils.timezone import timezone
 
 
-class AccessMiddleware(BaseHTTPMiddleware):
+class AccessMiddleware:
     """
     请求日志中间件
     这个中间件用于记录每个 HTTP 请求的访问日志，包括请求时间、客户端 IP、请求方法、
     响应状态码、请求路径和处理时间。
     """
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         处理每个进入的 HTTP 请求。
 
-        :param request: 当前的 HTTP 请求对象
-        :param call_next: 调用链中的下一个中间件或最终的请求处理函数
-        :return: HTTP 响应对象
+        :param scope: ASGI scope
+        :param receive: ASGI receive
+        :param send: ASGI send
+        :return:
         """
-        # 记录请求开始时间
-        start_time = timezone.now()
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
 
-        # 调用下一个中间件或路由处理函数，获取响应
-        # 这里使用 await 是因为 call_next 是一个异步函数
-        response = await call_next(request)
-
-        # 记录请求结束时间
-        end_time = timezone.now()
+        # 记录请求开始时间
+        start_time = time.perf_counter()
+        status_code = 500
 
-        # 计算请求处理时间（毫秒）
-        process_time = round((end_time - start_time).total_seconds(), 3) * 1000.0
+        async def send_wrapper(message: Message) -> None:
+            # 从响应开始消息中获取状态码，响应体原样透传（支持流式响应）
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
 
-        # 构建并记录日志信息
-        log.info(
-            f'{request.client.host: <15} | '  # 客户端 IP 地址，左对齐，宽度 15
-            f'{request.method: <8} | '        # HTTP 请求方法，左对齐，宽度 8
-            f'{response.status_code: <6} | '  # HTTP 响应状态码，左对齐，宽度 6
-            f'{request.url.path} | '          # 请求的 URL 路径
-            f'{process_time}ms'               # 请求处理时间（毫秒）
-        )
+        try:
+            # 调用下一个中间件或路由处理函数
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 计算请求处理时间（毫秒）
+            process_time = round((time.perf_counter() - start_time) * 1000.0, 3)
+            client = scope.get('client')
 
-        # 返回响应对象
-        return response
+            # 构建并记录日志信息
+            log.info(
+                f'{client[0] if client else "-": <15} | '  # 客户端 IP 地址，左对齐，宽度 15
+                f'{scope["method"]: <8} | '                # HTTP 请求方法，左对齐，宽度 8
+                f'{status_code: <6} | '                    # HTTP 响应状态码，左对齐，宽度 6
+                f'{scope["path"]} | '                      # 请求的 URL 路径
+                f'{process_time}ms'                        # 请求处理时间（毫秒）
+            )
@@ -7,69 +7,76 @@
 @Author  : imbalich
 @Time    : 2024/12/15 21:53
 '''
-from asyncio import create_task
-
-from asgiref.sync import sync_to_async
-from fastapi import Response
-from starlette.datastructures import UploadFile
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from backend.app.admin.schema.opera_log import CreateOperaLogParam
-from backend.app.admin.service.opera_log_service import opera_log_service
+from backend.app.admin.service.opera_log_service import opera_log_writer
 from backend.common.dataclasses import RequestCallNext
-from backend.common.enums import OperaLogCipherType, StatusType
+from backend.common.enums import StatusType
 from backend.common.log import log
 from backend.core.conf import settings
-from backend.utils.encrypt import AESCipher, ItsDCipher, Md5Cipher
+from backend.utils.desensitize import opera_log_desensitizer
+from backend.utils.request_capture import RequestArgsCapture
+from backend.utils.request_parse import get_request_ip_info, get_request_ua_info
 from backend.utils.timezone import timezone
 from backend.utils.trace_id import get_request_trace_id
 
 
-class OperaLogMiddleware(BaseHTTPMiddleware):
+class OperaLogMiddleware:
     """操作日志中间件"""
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
         # 排除记录白名单
-        path = request.url.path
+        path = scope['path']
         if path in settings.OPERA_LOG_PATH_EXCLUDE or not path.startswith(f'{settings.FASTAPI_API_V1_PATH}'):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         # 请求解析
-        try:
-            # 此信息依赖于 jwt 中间件
-            username = request.user.username
-        except AttributeError:
-            username = None
+        request = Request(scope, receive)
+        # 此信息依赖于 jwt 中间件
+        username = getattr(scope.get('user'), 'username', None)
         method = request.method
-        args = await self.get_request_args(request)
-        args = await self.desensitization(args)
+        # 请求体在下游读取时同步捕获，不提前缓冲
+        capture = RequestArgsCapture(request.headers, settings.OPERA_LOG_ARGS_MAX_BYTES)
 
         # 执行请求
         start_time = timezone.now()
-        request_next = await self.execute_request(request, call_next)
+        request_next = await self.execute_request(request, capture.wrap(receive), send)
         end_time = timezone.now()
         cost_time = round((end_time - start_time).total_seconds() * 1000.0, 3)
 
         # 此信息只能在请求后获取
-        _route = request.scope.get('route')
+        _route = scope.get('route')
         summary = getattr(_route, 'summary', None) or ''
+        args = self.get_request_args(request, capture)
+        args = await opera_log_desensitizer.desensitize(args)
 
         # 日志创建
+        ip_info = await get_request_ip_info(request)
+        ua_info = get_request_ua_info(request)
         opera_log_in = CreateOperaLogParam(
             trace_id=get_request_trace_id(request),
             username=username,
             method=method,
             title=summary,
             path=path,
-            ip=request.state.ip,
-            country=request.state.country,
-            region=request.state.region,
-            city=request.state.city,
-            user_agent=request.state.user_agent,
-            os=request.state.os,
-            browser=request.state.browser,
-            device=request.state.device,
+            ip=ip_info.ip,
+            country=ip_info.country,
+            region=ip_info.region,
+            city=ip_info.city,
+            user_agent=ua_info.user_agent,
+            os=ua_info.os,
+            browser=ua_info.browser,
+            device=ua_info.device,
             args=args,
             status=request_next.status,
             code=request_next.code,
@@ -77,24 +84,21 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
             cost_time=cost_time,
             opera_time=start_time,
         )
-        create_task(opera_log_service.create(obj_in=opera_log_in))  # noqa: ignore
+        opera_log_writer.put(opera_log_in)
 
         # 错误抛出
         err = request_next.err
         if err:
             raise err from None
 
-        return request_next.response
-
-    async def execute_request(self, request: Request, call_next) -> RequestCallNext:
-        """执行请求"""
+    async def execute_request(self, request: Request, receive: Receive, send: Send) -> RequestCallNext:
+        """执行请求，响应原样透传（支持流式响应）"""
         code = 200
         msg = 'Success'
         status = StatusType.enable
         err = None
-        response = None
         try:
-            response = await call_next(request)
+            await self.app(request.scope, receive, send)
             code, msg = self.request_exception_handler(request, code, msg)
         except Exception as e:
             log.error(f'请求异常: {e}')
@@ -104,7 +108,7 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
             status = StatusType.disable
             err = e
 
-        return RequestCallNext(code=str(code), msg=msg, status=status, err=err, response=response)
+        return RequestCallNext(code=str(code), msg=msg, status=status, err=err)
 
     @staticmethod
     def request_exception_handler(request: Request, code: int, msg: str) -> tuple[str, str]:
@@ -128,57 +132,15 @@ class OperaLogMiddleware(BaseHTTPMiddleware):
         return code, msg
 
     @staticmethod
-    async def get_request_args(request: Request) -> dict:
-        """获取请求参数"""
-        args = dict(request.query_params)
-        args.update(request.path_params)
-        # Tip: .body() 必须在 .form() 之前获取
-        # https://github.com/encode/starlette/discussions/1933
-        body_data = await request.body()
-        form_data = await request.form()
-        if len(form_data) > 0:
-            args.update({k: v.filename if isinstance(v, UploadFile) else v for k, v in form_data.items()})
-        else:
-            if body_data:
-                content_type = request.headers.get('Content-Type', '').split(';')[0].strip().lower()
-                if content_type == 'application/json':
-                    json_data = await request.json()
-                    if isinstance(json_data, bytes):
-                        json_data = json_data.decode('utf-8')
-                    args.update(json_data)
-                else:
-                    args.update({'body': str(body_data)})
-        return args
-
-    @staticmethod
-    @sync_to_async
-    def desensitization(args: dict) -> dict | None:
+    def get_request_args(request: Request, capture: RequestArgsCapture) -> dict:
         """
-        脱敏处理
+        获取请求参数
 
-        :param args:
+        :param request: 请求（路由匹配后 path_params 才可用）
+        :param capture: 请求体参数捕获
         :return:
         """
-        if not args:
-            args = None
-        else:
-            match settings.OPERA_LOG_ENCRYPT_TYPE:
-                case OperaLogCipherType.aes:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_KEY_INCLUDE:
-                            args[key] = (AESCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])).hex()
-                case OperaLogCipherType.md5:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_KEY_INCLUDE:
-                            args[key] = Md5Cipher.encrypt(args[key])
-                case OperaLogCipherType.itsdangerous:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_KEY_INCLUDE:
-                            args[key] = ItsDCipher(settings.OPERA_LOG_ENCRYPT_SECRET_KEY).encrypt(args[key])
-                case OperaLogCipherType.plan:
-                    pass
-                case _:
-                    for key in args.keys():
-                        if key in settings.OPERA_LOG_ENCRYPT_KEY_INCLUDE:
-                            args[key] = '******'
+        args = dict(request.query_params)
+        args.update(request.path_params)
+        args.update(capture.get_args())
         return args
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_build_tree.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/23 17:10
+'''
+import random
+import sys
+import time
+
+sys.path.append('../../')
+
+from backend.utils.build_tree import recursive_to_tree, traversal_to_tree  # noqa: E402
+
+"""
+树形结构构造算法基准测试（无需数据库和 redis）
+
+随机生成 parent_id 指向更早节点的合成节点（含少量孤儿节点），按 sort 排序后分别使用遍历和递归算法构造树，
+递归算法为 O(n²)，节点数超过 RECURSIVE_MAX_NODES 时跳过
+
+用法：python benchmark_build_tree.py [sizes...]
+"""
+
+RECURSIVE_MAX_NODES = 10000
+
+
+def make_nodes(size: int, seed: int = 0) -> list[dict]:
+    rand = random.Random(seed)
+    nodes = []
+    for i in range(1, size + 1):
+        if i <= 10 or rand.random() < 0.01:
+            parent_id = None
+        elif rand.random() < 0.001:
+            parent_id = size + i  # 孤儿节点
+        else:
+            parent_id = rand.randint(max(1, i - 1000), i - 1)
+        nodes.append({'id': i, 'parent_id': parent_id, 'sort': rand.randint(0, 100), 'name': f'node{i}'})
+    nodes.sort(key=lambda x: x['sort'])
+    return nodes
+
+
+def count_nodes(tree: list[dict]) -> int:
+    total = 0
+    stack = list(tree)
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.get('children', []))
+    return total
+
+
+def measure(name: str, size: int, build, rounds: int) -> None:
+    samples = []
+    for _ in range(rounds):
+        nodes = [dict(node) for node in make_nodes(size)]
+        start = time.perf_counter()
+        tree = build(nodes)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f'{name: <10} | {size: >7} nodes | {count_nodes(tree): >7} in tree | best {min(samples):.2f}ms')
+
+
+def main() -> None:
+    sizes = [int(size) for size in sys.argv[1:]] or [10000, 100000]
+    for size in sizes:
+        measure('traversal', size, traversal_to_tree, rounds=5)
+        if size <= RECURSIVE_MAX_NODES:
+            measure('recursive', size, recursive_to_tree, rounds=1)
+        else:
+            print(f'{"recursive": <10} | {size: >7} nodes | skipped (O(n²))')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_jwt_auth.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/20 14:30
+'''
+import statistics
+import sys
+import time
+
+from datetime import timedelta
+from uuid import uuid4
+
+from anyio import run
+from jose import ExpiredSignatureError, JWTError, jwt
+from pydantic_core import from_json
+
+sys.path.append('../../')
+
+from backend.app.admin.schema.user import CurrentUserIns  # noqa: E402
+from backend.common.security import jwt as jwt_security  # noqa: E402
+from backend.common.exception.errors import TokenError  # noqa: E402
+from backend.common.security.jwt_backend import jwt_backend  # noqa: E402
+from backend.core.conf import settings  # noqa: E402
+from backend.database.redis import redis_client  # noqa: E402
+from backend.utils.timezone import timezone  # noqa: E402
+
+"""
+JWT 认证延迟基准测试（需要本地 redis，连接配置读取 .env）
+
+对比认证路径：
+1. legacy：改造前的实现，python-jose 解码 + 令牌 GET + 用户缓存 GET 两次往返，每次请求 pydantic 校验用户缓存
+2. pipelined：令牌和用户缓存通过 MGET 一次往返（进程内缓存未命中）
+3. pipelined + L1：进程内缓存命中，仅校验令牌一次往返
+
+无状态模式（TOKEN_STATELESS）下 2、3 分别为：仅用户缓存 GET 一次往返、不访问 redis
+legacy 使用 TOKEN_SECRET_KEY 签名，仅支持 HS* 算法，其他算法时跳过
+
+用法：python benchmark_jwt_auth.py [iterations]
+"""
+
+BENCH_USER_ID = 2**31 - 1
+
+
+def build_user() -> CurrentUserIns:
+    now = timezone.now()
+    menus = [
+        dict(id=i, title=f'menu{i}', name=f'menu{i}', perms=f'sys:menu{i}:get,sys:menu{i}:edit', created_time=now)
+        for i in range(50)
+    ]
+    roles = [dict(id=i, name=f'role{i}', created_time=now, menus=menus, rules=[]) for i in range(3)]
+    return CurrentUserIns(
+        id=BENCH_USER_ID,
+        uuid='benchmark',
+        username='benchmark',
+        nickname='benchmark',
+        email='benchmark@example.com',
+        is_superuser=False,
+        is_staff=True,
+        is_multi_login=True,
+        join_time=now,
+        roles=roles,
+    )
+
+
+def legacy_jwt_decode(token: str) -> int:
+    try:
+        payload = jwt.decode(token, settings.TOKEN_SECRET_KEY, algorithms=[settings.TOKEN_ALGORITHM])
+        user_id = int(payload.get('sub'))
+        if not user_id:
+            raise TokenError(msg='Token 无效')
+    except ExpiredSignatureError:
+        raise TokenError(msg='Token 已过期')
+    except (JWTError, Exception):
+        raise TokenError(msg='Token 无效')
+    return user_id
+
+
+async def legacy_authentication(token: str) -> CurrentUserIns:
+    user_id = legacy_jwt_decode(token)
+    token_verify = await redis_client.get(f'{settings.TOKEN_REDIS_PREFIX}:{user_id}:{token}')
+    if not token_verify:
+        raise TokenError(msg='Token 已过期')
+    cache_user = await redis_client.get(f'{settings.JWT_USER_REDIS_PREFIX}:{user_id}')
+    return CurrentUserIns.model_validate(from_json(cache_user, allow_partial=True))
+
+
+async def cold_authentication(token: str) -> CurrentUserIns:
+    jwt_security._evict_user_local_cache()
+    return await jwt_security.jwt_authentication(token)
+
+
+async def measure(name: str, func, token: str, iterations: int) -> None:
+    for _ in range(min(100, iterations)):
+        await func(token)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func(token)
+        samples.append((time.perf_counter() - start) * 1000)
+    quantiles = statistics.quantiles(samples, n=100)
+    print(f'{name: <16} | p50 {quantiles[49]:.3f}ms | p99 {quantiles[98]:.3f}ms | mean {statistics.mean(samples):.3f}ms')
+
+
+async def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    await redis_client.open()
+    expire = timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRE_SECONDS)
+    payload = {'exp': expire, 'sub': str(BENCH_USER_ID), 'jti': uuid4().hex}
+    if settings.TOKEN_STATELESS:
+        # 无状态模式要求令牌携带版本号，使用进程内已同步的版本号保证令牌有效
+        payload['ver'] = jwt_security._token_versions.get(BENCH_USER_ID, 0)
+    token = jwt_backend.encode(payload)
+    keys = [f'{settings.TOKEN_REDIS_PREFIX}:{BENCH_USER_ID}:{token}', f'{settings.JWT_USER_REDIS_PREFIX}:{BENCH_USER_ID}']
+    legacy_token = None
+    if settings.TOKEN_ALGORITHM.startswith('HS'):
+        legacy_token = jwt.encode(
+            {'exp': expire, 'sub': str(BENCH_USER_ID)}, settings.TOKEN_SECRET_KEY, settings.TOKEN_ALGORITHM
+        )
+        keys.append(f'{settings.TOKEN_REDIS_PREFIX}:{BENCH_USER_ID}:{legacy_token}')
+        await redis_client.setex(keys[-1], 600, legacy_token)
+    await redis_client.setex(keys[0], 600, token)
+    await redis_client.setex(keys[1], 600, build_user().model_dump_json())
+    try:
+        if legacy_token:
+            await measure('legacy', legacy_authentication, legacy_token, iterations)
+        else:
+            print(f'legacy           | skipped, {settings.TOKEN_ALGORITHM} is not supported')
+        if settings.TOKEN_STATELESS:
+            await measure('stateless', cold_authentication, token, iterations)
+            await measure('stateless + L1', jwt_security.jwt_authentication, token, iterations)
+        else:
+            await measure('pipelined', cold_authentication, token, iterations)
+            await measure('pipelined + L1', jwt_security.jwt_authentication, token, iterations)
+    finally:
+        await redis_client.delete(*keys)
+        await redis_client.aclose()
+
+
+if __name__ == '__main__':
+    run(main)  # type: ignore
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_jwt_backend.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/21 11:30
+'''
+import sys
+import time
+
+from datetime import timedelta
+from uuid import uuid4
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+sys.path.append('../../')
+
+from backend.common.security.jwt_backend import (  # noqa: E402
+    EdDSAKey,
+    ES256Key,
+    HMACKey,
+    JoseJWTBackend,
+    JWTBackend,
+    NativeJWTBackend,
+)
+from backend.core.conf import settings  # noqa: E402
+from backend.utils.timezone import timezone  # noqa: E402
+
+"""
+JWT 编解码吞吐基准测试（无需外部服务）
+
+对比：
+1. jose HS256：当前实现
+2. native HS256 / ES256 / EdDSA：基于 cryptography，密钥对象预先加载
+3. jose ES256：作为非对称算法参照
+
+用法：python benchmark_jwt_backend.py [iterations]
+"""
+
+
+def measure(name: str, backend: JWTBackend, iterations: int) -> None:
+    claims = {
+        'exp': timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRE_SECONDS),
+        'sub': '1',
+        'jti': uuid4().hex,
+    }
+    token = backend.encode(claims)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        backend.encode(claims)
+    encode_ops = iterations / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        backend.decode(token)
+    decode_ops = iterations / (time.perf_counter() - start)
+    print(f'{name: <14} | encode {encode_ops: >10,.0f} ops/s | decode {decode_ops: >10,.0f} ops/s')
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    secret = settings.TOKEN_SECRET_KEY
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    ec_pem = ec_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode('utf-8')
+    ec_public_pem = ec_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+    measure('jose HS256', JoseJWTBackend(secret, 'HS256'), iterations)
+    measure('native HS256', NativeJWTBackend({'k1': HMACKey('HS256', secret)}, 'k1'), iterations)
+    measure('jose ES256', JoseJWTBackend(ec_pem, 'ES256', ec_public_pem), iterations // 10)
+    measure('native ES256', NativeJWTBackend({'k1': ES256Key(ec_key)}, 'k1'), iterations // 10)
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    measure('native EdDSA', NativeJWTBackend({'k1': EdDSAKey(ed_key)}, 'k1'), iterations // 10)
+
+
+if __name__ == '__main__':
+    main()
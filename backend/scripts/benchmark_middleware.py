@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_middleware.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/22 10:15
+'''
+import statistics
+import sys
+import time
+
+from anyio import run
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+sys.path.append('../../')
+
+from backend.app.admin.service.opera_log_service import opera_log_writer  # noqa: E402
+from backend.core.conf import settings  # noqa: E402
+from backend.core.registrar import register_app  # noqa: E402
+
+"""
+中间件栈单请求开销基准测试（无需数据库和 redis）
+
+通过 register_app() 构建完整中间件栈，请求 hello world 路由，对比：
+1. bare：无中间件
+2. asgi：当前纯 ASGI 中间件栈
+3. asgi + 3 * BaseHTTPMiddleware：模拟改造前操作日志、状态、访问日志三个 BaseHTTPMiddleware 的额外开销
+
+操作日志不写入数据库，IP 属地解析关闭
+
+用法：python benchmark_middleware.py [iterations]
+"""
+
+BENCH_PATH = f'{settings.FASTAPI_API_V1_PATH}/benchmark'
+
+
+class LegacyPassthroughMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+async def hello() -> dict:
+    return {'hello': 'world'}
+
+
+def build_app(*, middleware: bool, legacy_layers: int = 0) -> FastAPI:
+    app = register_app() if middleware else FastAPI()
+    app.add_api_route(BENCH_PATH, hello, methods=['GET'])
+    for _ in range(legacy_layers):
+        app.add_middleware(LegacyPassthroughMiddleware)
+    return app
+
+
+async def measure(name: str, app: FastAPI, iterations: int) -> None:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://benchmark') as client:
+        for _ in range(min(200, iterations)):
+            await client.get(BENCH_PATH)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = await client.get(BENCH_PATH)
+            samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+    quantiles = statistics.quantiles(samples, n=100)
+    print(f'{name: <32} | p50 {quantiles[49]:.3f}ms | p99 {quantiles[98]:.3f}ms | mean {statistics.mean(samples):.3f}ms')
+
+
+def noop_put(obj_in) -> None:
+    pass
+
+
+async def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    settings.IP_LOCATION_PARSE = 'false'
+    opera_log_writer.put = noop_put
+    await measure('bare', build_app(middleware=False), iterations)
+    await measure('asgi', build_app(middleware=True), iterations)
+    await measure('asgi + 3 * BaseHTTPMiddleware', build_app(middleware=True, legacy_layers=3), iterations)
+
+
+if __name__ == '__main__':
+    run(main)  # type: ignore
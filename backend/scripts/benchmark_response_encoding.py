@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_response_encoding.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/24 16:30
+'''
+import sys
+import time
+import uuid
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.append('../../')
+
+from msgspec import json  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from backend.app.admin.schema.user import GetUserListDetails  # noqa: E402
+from backend.common.enums import PageCountType  # noqa: E402
+from backend.common.pagination import _Page  # noqa: E402
+from backend.common.response.response_schema import ResponseModel, response_base  # noqa: E402
+from backend.utils.build_tree import traversal_to_tree  # noqa: E402
+from backend.utils.serializers import MsgSpecJSONResponse  # noqa: E402
+from backend.utils.struct_mirror import to_encodable  # noqa: E402
+
+"""
+接口响应编码基准测试（无需数据库和 redis）
+
+- 用户列表：模拟查询返回的行，比较 pydantic 分页 + ResponseModel 校验序列化与 msgspec Struct 镜像直接编码
+- 菜单树：比较 ResponseModel 校验序列化与 msgspec 直接编码
+
+旧路径与 FastAPI 处理带 response_model 的接口一致：校验返回值后以 json 模式序列化，再由 MsgSpecJSONResponse 编码
+
+用法：python benchmark_response_encoding.py [用户列表条数] [菜单数]
+"""
+
+_response_adapter = TypeAdapter(ResponseModel)
+
+
+def make_user_rows(size: int) -> list[SimpleNamespace]:
+    now = datetime.now()
+    depts = [
+        {
+            'id': i,
+            'name': f'dept{i}',
+            'parent_id': None,
+            'sort': i,
+            'leader': None,
+            'phone': None,
+            'email': None,
+            'status': 1,
+            'del_flag': False,
+            'created_time': now,
+            'updated_time': None,
+        }
+        for i in range(10)
+    ]
+    roles = [
+        {'id': i, 'name': name, 'status': 1, 'remark': None, 'created_time': now, 'updated_time': None}
+        for i, name in enumerate(['admin', 'test'], 1)
+    ]
+    return [
+        SimpleNamespace(
+            id=i,
+            uuid=str(uuid.uuid4()),
+            dept_id=i % 10 or None,
+            username=f'user{i}',
+            nickname=f'nick{i}',
+            email=f'user{i}@example.com',
+            phone=None,
+            avatar=None,
+            status=1,
+            is_superuser=False,
+            is_staff=True,
+            is_multi_login=False,
+            join_time=now - timedelta(minutes=i),
+            last_login_time=now,
+            created_time=now,
+            dept=depts[i % 10] if i % 10 else None,
+            roles=roles[: i % 3],
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+def make_menus(size: int) -> list[dict]:
+    now = datetime.now()
+    return [
+        dict(
+            id=i,
+            title=f'menu{i}',
+            name=f'Menu{i}',
+            parent_id=None if i <= 10 else (i - 1) // 10,
+            sort=i % 7,
+            icon=None,
+            path=f'/menu/{i}',
+            menu_type=1,
+            component=None,
+            perms=f'sys:menu:{i}',
+            status=1,
+            show=1,
+            cache=1,
+            remark=None,
+            created_time=now,
+            updated_time=None,
+        )
+        for i in range(1, size + 1)
+    ]
+
+
+def pydantic_encode(data) -> bytes:
+    res = response_base.success(data=data)
+    value = _response_adapter.validate_python(res, from_attributes=True)
+    return MsgSpecJSONResponse(_response_adapter.dump_python(value, mode='json')).body
+
+
+def msgspec_encode(data) -> bytes:
+    return response_base.fast_success(data=data).body
+
+
+def make_page(items: list, total: int) -> _Page[GetUserListDetails]:
+    # 与 _Page.create 结果一致，跳转链接依赖请求上下文，此处置空
+    links = {'first': None, 'last': None, 'next': None, 'prev': None}
+    return _Page[GetUserListDetails](
+        items=items, total=total, page=1, size=total, total_pages=1, count_type=PageCountType.exact, links=links
+    )
+
+
+def encode_user_list_pydantic(rows: list) -> bytes:
+    return pydantic_encode(make_page(rows, len(rows)).model_dump())
+
+
+def encode_user_list_msgspec(rows: list) -> bytes:
+    page = make_page([], len(rows)).model_dump()
+    page['items'] = to_encodable(rows, GetUserListDetails)
+    return msgspec_encode(page)
+
+
+def measure(name: str, encode, data, rounds: int) -> bytes:
+    samples = []
+    body = b''
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = encode(data)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f'{name: <24} | {len(body): >9} bytes | best {min(samples):.2f}ms')
+    return body
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    menus = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rows = make_user_rows(users)
+    print(f'user list: {users} rows')
+    old = measure('pydantic ResponseModel', encode_user_list_pydantic, rows, rounds=10)
+    new = measure('msgspec struct', encode_user_list_msgspec, rows, rounds=10)
+    assert json.decode(old) == json.decode(new)
+    tree = traversal_to_tree(make_menus(menus))
+    print(f'menu tree: {menus} nodes')
+    old = measure('pydantic ResponseModel', pydantic_encode, tree, rounds=10)
+    new = measure('msgspec', msgspec_encode, tree, rounds=10)
+    assert json.decode(old) == json.decode(new)
+
+
+if __name__ == '__main__':
+    main()
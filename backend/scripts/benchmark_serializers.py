@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : benchmark_serializers.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/24 18:00
+'''
+import sys
+import time
+
+from decimal import Decimal
+
+sys.path.append('../../')
+
+from fastapi.encoders import decimal_encoder  # noqa: E402
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from backend.app.admin.model import Menu  # noqa: E402
+from backend.utils.serializers import select_list_serialize  # noqa: E402
+from backend.utils.timezone import timezone  # noqa: E402
+
+"""
+行序列化基准测试（使用内存 sqlite，无需数据库和 redis）
+
+- legacy：逐行读取 __table__.columns 并逐列 getattr / isinstance 判断（改造前的实现）
+- orm：模型实例 + 按模型缓存的序列化方案
+- rows / mappings：直接查询表列得到的 Row / RowMapping，无需实例化 ORM 对象
+
+分别统计查询加载和序列化的耗时
+
+用法：python benchmark_serializers.py [rows]
+"""
+
+
+def legacy_select_list_serialize(rows) -> list:
+    result = []
+    for row in rows:
+        item = {}
+        for column in row.__table__.columns.keys():
+            v = getattr(row, column)
+            if isinstance(v, Decimal):
+                v = decimal_encoder(v)
+            item[column] = v
+        result.append(item)
+    return result
+
+
+def prepare(size: int) -> Session:
+    engine = create_engine('sqlite://')
+    now = timezone.now()
+    with engine.begin() as conn:
+        # 部分列类型为 MySQL 专有类型，sqlite 使用无类型列建表
+        conn.exec_driver_sql(f'CREATE TABLE sys_menu ({", ".join(Menu.__table__.columns.keys())})')
+        conn.execute(
+            insert(Menu.__table__),
+            [
+                {
+                    'id': i,
+                    'title': f'menu{i}',
+                    'name': f'Menu{i}',
+                    'parent_id': None,
+                    'sort': i % 7,
+                    'path': f'/menu/{i}',
+                    'menu_type': 1,
+                    'perms': f'sys:menu:{i}',
+                    'status': 1,
+                    'show': 1,
+                    'cache': 1,
+                    'created_time': now,
+                }
+                for i in range(1, size + 1)
+            ],
+        )
+    return Session(engine)
+
+
+def measure(name: str, session: Session, load, serialize) -> list:
+    session.expunge_all()
+    start = time.perf_counter()
+    rows = load(session)
+    loaded = time.perf_counter()
+    data = serialize(rows)
+    done = time.perf_counter()
+    print(
+        f'{name: <10} | {len(data): >7} rows | load {(loaded - start) * 1000:9.2f}ms '
+        f'| serialize {(done - loaded) * 1000:8.2f}ms | total {(done - start) * 1000:9.2f}ms'
+    )
+    return data
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    session = prepare(size)
+    columns = Menu.__table__.columns
+    results = [
+        measure('legacy', session, lambda s: s.scalars(select(Menu)).all(), legacy_select_list_serialize),
+        measure('orm', session, lambda s: s.scalars(select(Menu)).all(), select_list_serialize),
+        measure(
+            'rows', session, lambda s: s.execute(select(*columns)).all(), lambda r: select_list_serialize(r, Menu)
+        ),
+        measure(
+            'mappings',
+            session,
+            lambda s: s.execute(select(*columns)).mappings().all(),
+            lambda r: select_list_serialize(r, Menu),
+        ),
+    ]
+    assert all(result == results[0] for result in results)
+
+
+if __name__ == '__main__':
+    main()
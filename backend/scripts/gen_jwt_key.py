@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : gen_jwt_key.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/21 11:02
+'''
+import os
+import secrets
+import sys
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+sys.path.append('../../')
+
+from backend.core.path_conf import JWT_KEY_DIR  # noqa: E402
+
+"""
+生成 JWT 签名密钥到密钥目录（backend/keys）
+
+密钥轮换：
+1. 生成新密钥并分发到所有节点的密钥目录，滚动重启（此时所有节点均可验证新密钥签发的令牌）
+2. 修改 TOKEN_KEY_ID 为新密钥 ID，滚动重启
+3. 旧令牌全部过期后（TOKEN_REFRESH_EXPIRE_SECONDS），删除旧密钥文件
+
+用法：python gen_jwt_key.py ES256|EdDSA|HS256 <kid>
+"""
+
+
+def main() -> None:
+    if len(sys.argv) != 3:
+        print('用法：python gen_jwt_key.py ES256|EdDSA|HS256 <kid>')
+        return
+    alg, kid = sys.argv[1], sys.argv[2]
+    os.makedirs(JWT_KEY_DIR, exist_ok=True)
+    if alg.startswith('HS'):
+        path = os.path.join(JWT_KEY_DIR, f'{kid}.key')
+        data = secrets.token_urlsafe(32).encode('utf-8')
+    else:
+        key = ec.generate_private_key(ec.SECP256R1()) if alg == 'ES256' else ed25519.Ed25519PrivateKey.generate()
+        path = os.path.join(JWT_KEY_DIR, f'{kid}.pem')
+        data = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    if os.path.exists(path):
+        print(f'密钥已存在：{path}')
+        return
+    with open(path, 'wb') as f:
+        f.write(data)
+    os.chmod(path, 0o600)
+    print(f'已生成密钥：{path}')
+
+
+if __name__ == '__main__':
+    main()
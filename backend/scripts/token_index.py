@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : token_index.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/20 16:05
+'''
+import sys
+
+from anyio import run
+
+sys.path.append('../../')
+
+from backend.common.security.jwt import backfill_token_index, cleanup_token_index  # noqa: E402
+from backend.database.redis import redis_client  # noqa: E402
+
+"""
+用户令牌索引维护（连接配置读取 .env）
+
+backfill：为索引上线前签发的令牌补建索引，升级部署后执行一次
+cleanup：清理索引中已过期的成员并删除空索引，可按需定期执行
+
+用法：python token_index.py backfill|cleanup
+"""
+
+
+async def main() -> None:
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    await redis_client.open()
+    try:
+        if command == 'backfill':
+            print(f'已补建 {await backfill_token_index()} 个令牌索引')
+        elif command == 'cleanup':
+            print(f'已清理 {await cleanup_token_index()} 个过期索引成员')
+        else:
+            print('用法：python token_index.py backfill|cleanup')
+    finally:
+        await redis_client.aclose()
+
+
+if __name__ == '__main__':
+    run(main)  # type: ignore
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : tree_closure.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/24 11:30
+'''
+import sys
+
+from anyio import run
+from sqlalchemy import select
+
+sys.path.append('../../')
+
+from backend.app.admin.crud.crud_dept import dept_closure  # noqa: E402
+from backend.app.admin.crud.crud_menu import menu_closure  # noqa: E402
+from backend.app.admin.model import Dept, Menu  # noqa: E402
+from backend.database.db import async_db_session, async_engine  # noqa: E402
+
+"""
+部门 / 菜单闭包表重建（连接配置读取 .env）
+
+根据 parent_id 重建 sys_dept_closure 和 sys_menu_closure，闭包表上线前已有数据的部署升级后执行一次，
+或在直接修改数据库中的 parent_id 后执行
+
+用法：python tree_closure.py
+"""
+
+
+async def main() -> None:
+    try:
+        async with async_db_session.begin() as db:
+            for model, closure in ((Dept, dept_closure), (Menu, menu_closure)):
+                nodes = (await db.execute(select(model.id, model.parent_id))).all()
+                count = await closure.rebuild(db, [(node.id, node.parent_id) for node in nodes])
+                print(f'{closure.table.name}：已写入 {count} 行')
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    run(main)  # type: ignore
@@ -58,7 +58,7 @@ create table sys_data_rule
     model        varchar(50)  not null comment 'SQLA 模型类',
     `column`     varchar(20)  not null comment '数据库字段',
     operator     int          not null comment '运算符（0：and、1：or）',
-    expression   int          not null comment '表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in）',
+    expression   int          not null comment '表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in、8：部门子树）',
     value        varchar(255) not null comment '规则值',
     created_time datetime     not null comment '创建时间',
     updated_time datetime     null comment '更新时间',
@@ -95,6 +95,23 @@ create index ix_sys_dept_id
 create index ix_sys_dept_parent_id
     on sys_dept (parent_id);
 
+create table sys_dept_closure
+(
+    ancestor_id   int not null comment '祖先部门ID',
+    descendant_id int not null comment '后代部门ID',
+    depth         int not null comment '层级距离（0 为自身）',
+    primary key (ancestor_id, descendant_id),
+    constraint sys_dept_closure_ibfk_1
+        foreign key (ancestor_id) references sys_dept (id)
+            on delete cascade,
+    constraint sys_dept_closure_ibfk_2
+        foreign key (descendant_id) references sys_dept (id)
+            on delete cascade
+);
+
+create index ix_sys_dept_closure_descendant_id
+    on sys_dept_closure (descendant_id);
+
 create table sys_login_log
 (
     id           int auto_increment comment '主键id'
@@ -118,6 +135,9 @@ create table sys_login_log
 create index ix_sys_login_log_id
     on sys_login_log (id);
 
+create index ix_sys_login_log_created_time
+    on sys_login_log (created_time);
+
 create table sys_menu
 (
     id           int auto_increment comment '主键id'
@@ -149,6 +169,23 @@ create index ix_sys_menu_id
 create index ix_sys_menu_parent_id
     on sys_menu (parent_id);
 
+create table sys_menu_closure
+(
+    ancestor_id   int not null comment '祖先菜单ID',
+    descendant_id int not null comment '后代菜单ID',
+    depth         int not null comment '层级距离（0 为自身）',
+    primary key (ancestor_id, descendant_id),
+    constraint sys_menu_closure_ibfk_1
+        foreign key (ancestor_id) references sys_menu (id)
+            on delete cascade,
+    constraint sys_menu_closure_ibfk_2
+        foreign key (descendant_id) references sys_menu (id)
+            on delete cascade
+);
+
+create index ix_sys_menu_closure_descendant_id
+    on sys_menu_closure (descendant_id);
+
 create table sys_opera_log
 (
     id           int auto_increment comment '主键id'
@@ -178,6 +215,9 @@ create table sys_opera_log
 create index ix_sys_opera_log_id
     on sys_opera_log (id);
 
+create index ix_sys_opera_log_created_time
+    on sys_opera_log (created_time);
+
 create table sys_role
 (
     id           int auto_increment comment '主键id'
@@ -0,0 +1,24 @@
+-- 可选：将 sys_opera_log / sys_login_log 转换为按月 RANGE 分区表（分区列 created_time）
+-- 转换后 delete_db_opera_log / delete_db_login_log 任务会从 pmax 中拆分预建新分区，并整体删除过期分区
+-- 分区表的主键必须包含分区列，转换会重建表，数据量较大时请在低峰期执行
+-- 执行前请将 p202412 / '2025-01-01' 替换为当前月份及下月月初，该分区同时容纳转换前的全部数据
+
+alter table sys_opera_log
+    drop primary key,
+    add primary key (id, created_time);
+
+alter table sys_opera_log
+    partition by range columns (created_time) (
+        partition p202412 values less than ('2025-01-01'),
+        partition pmax values less than (maxvalue)
+        );
+
+alter table sys_login_log
+    drop primary key,
+    add primary key (id, created_time);
+
+alter table sys_login_log
+    partition by range columns (created_time) (
+        partition p202412 values less than ('2025-01-01'),
+        partition pmax values less than (maxvalue)
+        );
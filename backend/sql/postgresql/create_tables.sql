@@ -115,7 +115,7 @@ comment on column sys_data_rule."column" is '数据库字段';
 
 comment on column sys_data_rule.operator is '运算符（0：and、1：or）';
 
-comment on column sys_data_rule.expression is '表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in）';
+comment on column sys_data_rule.expression is '表达式（0：==、1：!=、2：>、3：>=、4：<、5：<=、6：in、7：not_in、8：部门子树）';
 
 comment on column sys_data_rule.value is '规则值';
 
@@ -175,6 +175,27 @@ create index ix_sys_dept_id
 create index ix_sys_dept_parent_id
     on sys_dept (parent_id);
 
+create table sys_dept_closure
+(
+    ancestor_id   integer not null
+        references sys_dept
+            on delete cascade,
+    descendant_id integer not null
+        references sys_dept
+            on delete cascade,
+    depth         integer not null,
+    primary key (ancestor_id, descendant_id)
+);
+
+comment on column sys_dept_closure.ancestor_id is '祖先部门ID';
+
+comment on column sys_dept_closure.descendant_id is '后代部门ID';
+
+comment on column sys_dept_closure.depth is '层级距离（0 为自身）';
+
+create index ix_sys_dept_closure_descendant_id
+    on sys_dept_closure (descendant_id);
+
 
 create table sys_login_log
 (
@@ -229,6 +250,9 @@ comment on column sys_login_log.created_time is '创建时间';
 create index ix_sys_login_log_id
     on sys_login_log (id);
 
+create index ix_sys_login_log_created_time
+    on sys_login_log (created_time);
+
 create table sys_menu
 (
     id           serial
@@ -293,6 +317,27 @@ create index ix_sys_menu_id
 create index ix_sys_menu_parent_id
     on sys_menu (parent_id);
 
+create table sys_menu_closure
+(
+    ancestor_id   integer not null
+        references sys_menu
+            on delete cascade,
+    descendant_id integer not null
+        references sys_menu
+            on delete cascade,
+    depth         integer not null,
+    primary key (ancestor_id, descendant_id)
+);
+
+comment on column sys_menu_closure.ancestor_id is '祖先菜单ID';
+
+comment on column sys_menu_closure.descendant_id is '后代菜单ID';
+
+comment on column sys_menu_closure.depth is '层级距离（0 为自身）';
+
+create index ix_sys_menu_closure_descendant_id
+    on sys_menu_closure (descendant_id);
+
 create table sys_opera_log
 (
     id           serial
@@ -364,6 +409,9 @@ comment on column sys_opera_log.created_time is '创建时间';
 create index ix_sys_opera_log_id
     on sys_opera_log (id);
 
+create index ix_sys_opera_log_created_time
+    on sys_opera_log (created_time);
+
 create table sys_role
 (
     id           serial
@@ -24,6 +24,22 @@ values  (1, '测试', 'test', 0, 0, '', null, 0, null, null, 0, 0, 1, null, null
         (15, '登录日志', 'Login', 0, 0, null, 'login', 1, '/log/login/index.vue', null, 1, 1, 1, null, 14, '2023-07-27 19:20:56', null),
         (16, '操作日志', 'Opera', 0, 0, null, 'opera', 1, '/log/opera/index.vue', null, 1, 1, 1, null, 14, '2023-07-27 19:21:28', null),
 
+insert into sys_dept_closure (ancestor_id, descendant_id, depth)
+with recursive closure (ancestor_id, descendant_id, depth) as (
+    select id, id, 0 from sys_dept
+    union all
+    select t.parent_id, c.descendant_id, c.depth + 1 from closure c join sys_dept t on t.id = c.ancestor_id where t.parent_id is not null
+)
+select ancestor_id, descendant_id, depth from closure;
+
+insert into sys_menu_closure (ancestor_id, descendant_id, depth)
+with recursive closure (ancestor_id, descendant_id, depth) as (
+    select id, id, 0 from sys_menu
+    union all
+    select t.parent_id, c.descendant_id, c.depth + 1 from closure c join sys_menu t on t.id = c.ancestor_id where t.parent_id is not null
+)
+select ancestor_id, descendant_id, depth from closure;
+
 insert into sys_role (id, name, status, remark, created_time, updated_time)
 values  (1, 'test', 1, null, '2023-06-26 17:13:45', null);
 
@@ -0,0 +1,68 @@
+-- 可选：将 sys_opera_log / sys_login_log 转换为按月原生分区表（分区列 created_time）
+-- 转换后 delete_db_opera_log / delete_db_login_log 任务会预建新分区，并整体删除过期分区
+-- 分区表的主键必须包含分区列，转换会重建表并复制数据，数据量较大时请在低峰期执行
+-- 执行前请将 p202412 / '2025-01-01' 替换为当前月份及下月月初，该分区同时容纳转换前的全部数据
+
+begin;
+
+alter table sys_opera_log rename to sys_opera_log_old;
+alter table sys_opera_log_old rename constraint sys_opera_log_pkey to sys_opera_log_old_pkey;
+alter index ix_sys_opera_log_id rename to ix_sys_opera_log_old_id;
+drop index if exists ix_sys_opera_log_created_time;
+
+create table sys_opera_log
+(
+    like sys_opera_log_old including defaults including comments,
+    primary key (id, created_time)
+) partition by range (created_time);
+
+alter sequence sys_opera_log_id_seq owned by sys_opera_log.id;
+
+create index ix_sys_opera_log_id
+    on sys_opera_log (id);
+
+create index ix_sys_opera_log_created_time
+    on sys_opera_log (created_time);
+
+create table sys_opera_log_p202412 partition of sys_opera_log
+    for values from (minvalue) to ('2025-01-01');
+
+create table sys_opera_log_default partition of sys_opera_log default;
+
+insert into sys_opera_log
+select *
+from sys_opera_log_old;
+
+drop table sys_opera_log_old;
+
+alter table sys_login_log rename to sys_login_log_old;
+alter table sys_login_log_old rename constraint sys_login_log_pkey to sys_login_log_old_pkey;
+alter index ix_sys_login_log_id rename to ix_sys_login_log_old_id;
+drop index if exists ix_sys_login_log_created_time;
+
+create table sys_login_log
+(
+    like sys_login_log_old including defaults including comments,
+    primary key (id, created_time)
+) partition by range (created_time);
+
+alter sequence sys_login_log_id_seq owned by sys_login_log.id;
+
+create index ix_sys_login_log_id
+    on sys_login_log (id);
+
+create index ix_sys_login_log_created_time
+    on sys_login_log (created_time);
+
+create table sys_login_log_p202412 partition of sys_login_log
+    for values from (minvalue) to ('2025-01-01');
+
+create table sys_login_log_default partition of sys_login_log default;
+
+insert into sys_login_log
+select *
+from sys_login_log_old;
+
+drop table sys_login_log_old;
+
+commit;
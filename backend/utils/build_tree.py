@@ -10,47 +10,68 @@
 from typing import Any, Sequence
 
 from backend.common.enums import BuildTreeType
+from backend.common.log import log
 from backend.utils.serializers import RowData, select_list_serialize
 
 
-def get_tree_nodes(row: Sequence[RowData]) -> list[dict[str, Any]]:
-    """获取所有树形结构节点"""
-    tree_nodes = select_list_serialize(row)
+def get_tree_nodes(row: Sequence[RowData], model: type | None = None) -> list[dict[str, Any]]:
+    """获取所有树形结构节点，按 sort 稳定排序"""
+    tree_nodes = select_list_serialize(row, model)
     tree_nodes.sort(key=lambda x: x['sort'])
     return tree_nodes
 
 
-def traversal_to_tree(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def traversal_to_tree(nodes: list[dict[str, Any]], *, parent_id: int | None = None) -> list[dict[str, Any]]:
     """
-    通过遍历算法构造树形结构
+    通过遍历算法构造树形结构，时间复杂度 O(n)
+
+    - 子节点保持 nodes 中的顺序（已按 sort 稳定排序）
+    - 父级不存在的节点（孤儿节点）作为根节点
+    - 父级链成环时，断开环中首个被访问节点与其父级的关联，使其作为根节点
 
     :param nodes:
+    :param parent_id: 子树根节点 ID，为 None 时返回完整的树
     :return:
     """
-    tree = []
     node_dict = {node['id']: node for node in nodes}
+    parents = {}
+    for node in nodes:
+        node_parent_id = node['parent_id']
+        parents[node['id']] = node_parent_id if node_parent_id in node_dict else None
+
+    # 沿父级链向上遍历检测环，每个节点只访问一次
+    state: dict[int, bool] = {}  # False: 访问中, True: 已完成
+    for node in nodes:
+        path = []
+        node_id = node['id']
+        while node_id is not None and node_id not in state:
+            state[node_id] = False
+            path.append(node_id)
+            node_id = parents[node_id]
+        if node_id is not None and not state[node_id]:
+            log.warning(f'树形结构节点 {node_id} 的父级链成环，已作为根节点处理')
+            parents[node_id] = None
+        for path_id in path:
+            state[path_id] = True
 
+    tree = []
     for node in nodes:
-        parent_id = node['parent_id']
-        if parent_id is None:
+        node_parent_id = parents[node['id']]
+        if node_parent_id is None:
             tree.append(node)
         else:
-            parent_node = node_dict.get(parent_id)
-            if parent_node is not None:
-                if 'children' not in parent_node:
-                    parent_node['children'] = []
-                if node not in parent_node['children']:
-                    parent_node['children'].append(node)
-            else:
-                if node not in tree:
-                    tree.append(node)
+            node_dict[node_parent_id].setdefault('children', []).append(node)
 
-    return tree
+    if parent_id is None:
+        return tree
+    if parent_id in node_dict:
+        return node_dict[parent_id].get('children', [])
+    return [node for node in tree if node['parent_id'] == parent_id]
 
 
 def recursive_to_tree(nodes: list[dict[str, Any]], *, parent_id: int | None = None) -> list[dict[str, Any]]:
     """
-    通过递归算法构造树形结构（性能影响较大）
+    通过递归算法构造树形结构（时间复杂度 O(n²)，性能影响较大）
 
     :param nodes:
     :param parent_id:
@@ -67,20 +88,25 @@ def recursive_to_tree(nodes: list[dict[str, Any]], *, parent_id: int | None = No
 
 
 def get_tree_data(
-        row: Sequence[RowData], build_type: BuildTreeType = BuildTreeType.traversal, *, parent_id: int | None = None
+        row: Sequence[RowData],
+        build_type: BuildTreeType = BuildTreeType.traversal,
+        *,
+        parent_id: int | None = None,
+        model: type | None = None,
 ) -> list[dict[str, Any]]:
     """
     获取树形结构数据
 
     :param row:
     :param build_type:
-    :param parent_id:
+    :param parent_id: 子树根节点 ID，为 None 时返回完整的树
+    :param model: row 为 Row / RowMapping 时对应的模型类，见 select_list_serialize
     :return:
     """
-    nodes = get_tree_nodes(row)
+    nodes = get_tree_nodes(row, model)
     match build_type:
         case BuildTreeType.traversal:
-            tree = traversal_to_tree(nodes)
+            tree = traversal_to_tree(nodes, parent_id=parent_id)
         case BuildTreeType.recursive:
             tree = recursive_to_tree(nodes, parent_id=parent_id)
         case _:
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : cache.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/20 10:12
+'''
+import time
+
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """
+    进程内 LRU 缓存，支持容量上限和过期时间
+
+    仅用于单个事件循环内的热点数据缓存，跨进程一致性需要调用方自行保证（例如 redis 发布订阅失效广播）
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        """
+        :param maxsize: 最大缓存条目数
+        :param ttl: 默认过期时间，单位：秒，None 表示不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """
+        获取缓存
+
+        :param key:
+        :param default: 未命中或已过期时返回的默认值
+        :return:
+        """
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        expire_at, value = item
+        if expire_at is not None and expire_at < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        设置缓存
+
+        :param key:
+        :param value:
+        :param ttl: 过期时间，单位：秒，不传则使用默认过期时间
+        :return:
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        self._data[key] = (time.monotonic() + ttl if ttl is not None else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: K) -> None:
+        """
+        删除缓存
+
+        :param keys:
+        :return:
+        """
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        清空缓存
+
+        :return:
+        """
+        self._data.clear()
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : desensitize.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/22 14:20
+'''
+from typing import Any, Callable, Iterable
+
+from asgiref.sync import sync_to_async
+
+from backend.common.enums import OperaLogCipherType
+from backend.core.conf import settings
+from backend.utils.encrypt import AESCipher, ItsDCipher, Md5Cipher
+
+
+class Desensitizer:
+    """
+    操作日志参数脱敏
+
+    脱敏方案在创建时根据配置编译一次：敏感键集合、加密函数及其密钥对象，
+    请求时递归遍历嵌套的 dict / list，命中敏感键的值整体加密
+    """
+
+    def __init__(
+        self, cipher_type: int, keys: Iterable[str], secret_key: str, thread_threshold: int, thread_bytes: int
+    ):
+        """
+        :param cipher_type: 加密类型，见 OperaLogCipherType，未知类型替换为 ******
+        :param keys: 敏感键
+        :param secret_key: AES / ItsDangerous 密钥
+        :param thread_threshold: AES 加密的值超过该数量时在线程池中执行
+        :param thread_bytes: AES 加密的值总字节数超过该值时在线程池中执行
+        """
+        self.keys = frozenset(keys)
+        self.thread_threshold = thread_threshold
+        self.thread_bytes = thread_bytes
+        self._offload = False
+        self._encrypt: Callable[[Any], str] | None
+        match cipher_type:
+            case OperaLogCipherType.aes:
+                aes_cipher = AESCipher(secret_key)
+                self._encrypt = lambda value: aes_cipher.encrypt(value).hex()
+                self._offload = True
+            case OperaLogCipherType.md5:
+                self._encrypt = Md5Cipher.encrypt
+            case OperaLogCipherType.itsdangerous:
+                self._encrypt = ItsDCipher(secret_key).encrypt
+            case OperaLogCipherType.plan:
+                self._encrypt = None
+            case _:
+                self._encrypt = lambda value: '******'
+        if not self.keys:
+            self._encrypt = None
+
+    def _collect(self, data: dict) -> list[tuple[dict, str]]:
+        """
+        收集需要脱敏的位置，使用显式栈遍历，避免深层嵌套触发递归上限
+
+        :param data:
+        :return:
+        """
+        matches = []
+        stack: list[Any] = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if key in self.keys:
+                        matches.append((node, key))
+                    elif isinstance(value, dict | list):
+                        stack.append(value)
+            else:
+                stack.extend(item for item in node if isinstance(item, dict | list))
+        return matches
+
+    @staticmethod
+    def _encoded_size(value: Any) -> int:
+        """加密前编码的字节数，与 AESCipher.encrypt 的编码方式一致"""
+        if isinstance(value, bytes):
+            return len(value)
+        if not isinstance(value, str):
+            value = str(value)
+        return len(value) if value.isascii() else len(value.encode('utf-8'))
+
+    def _should_offload(self, matches: list[tuple[dict, str]]) -> bool:
+        """
+        AES 加密的值数量或总字节数超过阈值时在线程池中执行
+
+        :param matches:
+        :return:
+        """
+        if not self._offload or not matches:
+            return False
+        if len(matches) > self.thread_threshold:
+            return True
+        size = 0
+        for node, key in matches:
+            size += self._encoded_size(node[key])
+            if size > self.thread_bytes:
+                return True
+        return False
+
+    def _apply(self, matches: list[tuple[dict, str]]) -> None:
+        encrypt = self._encrypt
+        for node, key in matches:
+            node[key] = encrypt(node[key])
+
+    async def desensitize(self, args: dict) -> dict | None:
+        """
+        脱敏处理（原地修改）
+
+        :param args:
+        :return:
+        """
+        if not args:
+            return None
+        if self._encrypt is None:
+            return args
+        matches = self._collect(args)
+        if self._should_offload(matches):
+            await sync_to_async(self._apply)(matches)
+        else:
+            self._apply(matches)
+        return args
+
+
+opera_log_desensitizer: Desensitizer = Desensitizer(
+    settings.OPERA_LOG_ENCRYPT_TYPE,
+    settings.OPERA_LOG_ENCRYPT_KEY_INCLUDE,
+    settings.OPERA_LOG_ENCRYPT_SECRET_KEY,
+    settings.OPERA_LOG_ENCRYPT_THREAD_THRESHOLD,
+    settings.OPERA_LOG_ENCRYPT_THREAD_BYTES,
+)
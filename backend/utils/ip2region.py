@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : ip2region.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/21 15:40
+'''
+import mmap
+import os
+import socket
+import struct
+import threading
+
+from typing import Iterable
+
+from backend.common.log import log
+from backend.core.path_conf import IP2REGION_XDB
+
+# xdb 文件结构：头部 256 字节，向量索引 256 * 256 * 8 字节，之后为段索引（每条 14 字节）和地区数据
+_HEADER_INFO_LENGTH = 256
+_VECTOR_INDEX_COLS = 256
+_VECTOR_INDEX_SIZE = 8
+_SEGMENT_INDEX_SIZE = 14
+
+_vector_struct = struct.Struct('<II')
+_segment_struct = struct.Struct('<IIHI')
+_ip_struct = struct.Struct('!I')
+
+
+class Ip2RegionSearcher:
+    """
+    ip2region 离线查询（进程内单例）
+
+    xdb 文件通过 mmap 只读映射，数据由操作系统页缓存在各 worker 进程间共享，
+    查询为纯内存二分查找，无需磁盘 IO 或线程池
+    """
+
+    def __init__(self, dbfile: str):
+        """
+        :param dbfile: xdb 文件路径
+        """
+        self.dbfile = dbfile
+        self._content: mmap.mmap | None = None
+        self._missing = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> mmap.mmap | None:
+        if self._content is None and not self._missing:
+            with self._lock:
+                if self._content is None and not self._missing:
+                    if not os.path.isfile(self.dbfile):
+                        self._missing = True
+                        log.error(f'ip2region 离线数据库不存在：{self.dbfile}')
+                        return None
+                    with open(self.dbfile, 'rb') as f:
+                        self._content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._content
+
+    @staticmethod
+    def _search(content: mmap.mmap, ip: int) -> str | None:
+        idx = (ip >> 24 & 0xFF) * _VECTOR_INDEX_COLS * _VECTOR_INDEX_SIZE + (ip >> 16 & 0xFF) * _VECTOR_INDEX_SIZE
+        s_ptr, e_ptr = _vector_struct.unpack_from(content, _HEADER_INFO_LENGTH + idx)
+        low, high = 0, (e_ptr - s_ptr) // _SEGMENT_INDEX_SIZE
+        while low <= high:
+            mid = (low + high) >> 1
+            sip, eip, data_len, data_ptr = _segment_struct.unpack_from(content, s_ptr + mid * _SEGMENT_INDEX_SIZE)
+            if ip < sip:
+                high = mid - 1
+            elif ip > eip:
+                low = mid + 1
+            else:
+                return content[data_ptr : data_ptr + data_len].decode('utf-8')
+        return None
+
+    def search(self, ip: str) -> str | None:
+        """
+        查询 IP 地区信息
+
+        :param ip: IPv4 地址
+        :return: 地区信息，格式：国家|区域|省份|城市|ISP，未找到或 IP 无效时返回 None
+        """
+        content = self._load()
+        if content is None:
+            return None
+        try:
+            return self._search(content, _ip_struct.unpack(socket.inet_pton(socket.AF_INET, ip))[0])
+        except (OSError, struct.error):
+            return None
+
+    def search_many(self, ips: Iterable[str]) -> dict[str, str | None]:
+        """
+        批量查询 IP 地区信息，用于日志回填等场景
+
+        :param ips: IPv4 地址
+        :return: IP -> 地区信息
+        """
+        return {ip: self.search(ip) for ip in set(ips)}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._content is not None:
+                self._content.close()
+                self._content = None
+
+
+ip2region_searcher: Ip2RegionSearcher = Ip2RegionSearcher(IP2REGION_XDB)
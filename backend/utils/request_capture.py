@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : request_capture.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/22 10:05
+'''
+from typing import Any
+from urllib.parse import parse_qsl
+
+from msgspec import DecodeError, json
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.types import Message, Receive
+
+
+class RequestArgsCapture:
+    """
+    操作日志请求体参数捕获
+
+    包装 ASGI receive，在下游读取请求体的同时捕获参数，中间件自身不缓冲请求体：
+
+    - multipart：流式解析，普通字段记录值（合计最多 max_bytes 字节），文件仅记录文件名和大小，文件内容不缓存
+    - 其他类型：最多缓存 max_bytes 字节，请求结束后按 Content-Type 解析一次（JSON 使用 msgspec）
+
+    超出 max_bytes 的请求体或字段仅记录大小，不记录内容（避免截断后的内容绕过脱敏）
+    """
+
+    def __init__(self, headers: Headers, max_bytes: int):
+        """
+        :param headers: 请求头
+        :param max_bytes: 最大捕获字节数
+        """
+        content_type, options = parse_options_header(headers.get('Content-Type'))
+        self.content_type = content_type.decode('latin-1').lower()
+        self.charset = options.get(b'charset', b'utf-8').decode('latin-1')
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._buffer = bytearray()
+        self._args: dict[str, Any] = {}
+        self._parser: MultipartParser | None = None
+        if self.content_type == 'multipart/form-data' and b'boundary' in options:
+            self._parser = MultipartParser(
+                options[b'boundary'],
+                {
+                    'on_part_begin': self._on_part_begin,
+                    'on_part_data': self._on_part_data,
+                    'on_part_end': self._on_part_end,
+                    'on_header_field': self._on_header_field,
+                    'on_header_value': self._on_header_value,
+                    'on_header_end': self._on_header_end,
+                    'on_headers_finished': self._on_headers_finished,
+                },
+            )
+            self._header_field = bytearray()
+            self._header_value = bytearray()
+            self._disposition = b''
+            self._part_name = ''
+            self._part_filename: str | None = None
+            self._part_size = 0
+            self._captured = 0
+
+    def wrap(self, receive: Receive) -> Receive:
+        """
+        包装 ASGI receive，消息原样透传给下游
+
+        :param receive: ASGI receive
+        :return:
+        """
+
+        async def wrapper() -> Message:
+            message = await receive()
+            if message['type'] == 'http.request':
+                body = message.get('body', b'')
+                if body:
+                    self.feed(body)
+            return message
+
+        return wrapper
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        捕获请求体分块
+
+        :param chunk: 请求体分块
+        :return:
+        """
+        self.size += len(chunk)
+        if self._parser is not None:
+            try:
+                self._parser.write(chunk)
+            except Exception:
+                # 格式错误由下游处理，此处停止解析，已捕获的字段保留
+                self._parser = None
+        elif len(self._buffer) < self.max_bytes:
+            self._buffer += chunk[: self.max_bytes - len(self._buffer)]
+
+    def get_args(self) -> dict[str, Any]:
+        """
+        获取已捕获的请求体参数
+
+        :return:
+        """
+        if self.content_type == 'multipart/form-data':
+            return self._args
+        if not self.size:
+            return {}
+        if self.size > self.max_bytes:
+            return {'body': f'<{self.size} bytes>'}
+        body = bytes(self._buffer)
+        if self.content_type == 'application/json':
+            try:
+                data = json.decode(body)
+            except DecodeError:
+                return {'body': str(body)}
+            return data if isinstance(data, dict) else {'body': data}
+        if self.content_type == 'application/x-www-form-urlencoded':
+            return dict(parse_qsl(body.decode(self.charset, 'replace'), keep_blank_values=True))
+        return {'body': str(body)}
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b''
+        self._part_filename = None
+        self._part_size = 0
+        self._buffer.clear()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b'content-disposition':
+            self._disposition = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        self._part_name = options.get(b'name', b'').decode(self.charset, 'replace')
+        filename = options.get(b'filename')
+        self._part_filename = filename.decode(self.charset, 'replace') if filename is not None else None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._part_size += end - start
+        if self._part_filename is None and self._captured + self._part_size <= self.max_bytes:
+            self._buffer += data[start:end]
+
+    def _on_part_end(self) -> None:
+        if self._part_filename is not None:
+            self._args[self._part_name] = {'filename': self._part_filename, 'size': self._part_size}
+        elif self._captured + self._part_size > self.max_bytes:
+            self._args[self._part_name] = f'<{self._part_size} bytes>'
+        else:
+            self._captured += self._part_size
+            self._args[self._part_name] = self._buffer.decode(self.charset, 'replace')
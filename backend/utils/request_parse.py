@@ -7,17 +7,21 @@
 @Author  ：imbalich
 @Date    ：2024/12/9 15:08 
 '''
+import asyncio
+
+from functools import lru_cache
+
 import httpx
-from asgiref.sync import sync_to_async
 from fastapi import Request
+from msgspec import json
 from user_agents import parse
-from XdbSearchIP.xdbSearcher import XdbSearcher
 
 from backend.common.dataclasses import IpInfo, UserAgentInfo
 from backend.common.log import log
 from backend.core.conf import settings
-from backend.core.path_conf import IP2REGION_XDB
 from backend.database.redis import redis_client
+from backend.utils.cache import LRUCache
+from backend.utils.ip2region import ip2region_searcher
 
 
 def get_request_ip(request: Request) -> str:
@@ -42,6 +46,37 @@ def get_request_ip(request: Request) -> str:
     return ip
 
 
+# 在线查询共享的 HTTP 客户端（连接池复用）
+_ip_api_client: httpx.AsyncClient | None = None
+
+
+def get_ip_api_client() -> httpx.AsyncClient:
+    """
+    获取在线查询 IP 属地的 HTTP 客户端
+
+    :return:
+    """
+    global _ip_api_client
+    if _ip_api_client is None:
+        _ip_api_client = httpx.AsyncClient(
+            timeout=settings.IP_LOCATION_ONLINE_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _ip_api_client
+
+
+async def close_ip_api_client() -> None:
+    """
+    关闭在线查询 IP 属地的 HTTP 客户端
+
+    :return:
+    """
+    global _ip_api_client
+    if _ip_api_client is not None:
+        await _ip_api_client.aclose()
+        _ip_api_client = None
+
+
 async def get_location_online(ip: str, user_agent: str) -> dict | None:
     """
     在线获取 IP 地址属地信息
@@ -50,19 +85,17 @@ async def get_location_online(ip: str, user_agent: str) -> dict | None:
     :param user_agent: 用户代理字符串
     :return: 包含地理位置信息的字典，或者 None（如果获取失败）
     """
-    async with httpx.AsyncClient(timeout=3) as client:
-        ip_api_url = f'http://ip-api.com/json/{ip}?lang=zh-CN'
-        headers = {'User-Agent': user_agent}
-        try:
-            response = await client.get(ip_api_url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-        except Exception as e:
-            log.error(f'在线获取 ip 地址属地失败，错误信息：{e}')
-            return None
+    ip_api_url = f'http://ip-api.com/json/{ip}?lang=zh-CN'
+    headers = {'User-Agent': user_agent} if user_agent else None
+    try:
+        response = await get_ip_api_client().get(ip_api_url, headers=headers)
+        if response.status_code == 200:
+            return response.json()
+    except Exception as e:
+        log.error(f'在线获取 ip 地址属地失败，错误信息：{e}')
+    return None
 
 
-@sync_to_async
 def get_location_offline(ip: str) -> dict | None:
     """
     离线获取 IP 地址属地信息
@@ -70,20 +103,105 @@ def get_location_offline(ip: str) -> dict | None:
     :param ip: IP 地址
     :return: 包含地理位置信息的字典，或者 None（如果获取失败）
     """
+    data = ip2region_searcher.search(ip)
+    if not data:
+        return None
+    data = data.split('|')
+    return {
+        'country': data[0] if data[0] != '0' else None,
+        'regionName': data[2] if data[2] != '0' else None,
+        'city': data[3] if data[3] != '0' else None,
+    }
+
+
+IpLocation = tuple[str | None, str | None, str | None]
+
+_EMPTY_LOCATION: IpLocation = (None, None, None)
+
+# 进程内 IP 属地缓存（L1），位于 redis 缓存之前，查询失败的结果同样缓存
+_ip_location_local_cache: LRUCache[str, IpLocation] = LRUCache(
+    maxsize=settings.IP_LOCATION_LOCAL_CACHE_MAXSIZE, ttl=settings.IP_LOCATION_LOCAL_CACHE_EXPIRE_SECONDS
+)
+# 进行中的 IP 属地查询，同一 IP 的并发请求共享一次查询
+_ip_location_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _query_ip_location(ip: str, user_agent: str | None) -> IpLocation:
+    """
+    从 redis 缓存或在线 / 离线方式获取 IP 属地
+
+    :param ip: IP 地址
+    :param user_agent: 用户代理字符串
+    :return: 国家，地区，城市
+    """
+    key = f'{settings.IP_LOCATION_REDIS_PREFIX}:{ip}'
+    cache_location = await redis_client.get(key)
+    if cache_location:
+        try:
+            location = json.decode(cache_location)
+            return location.get('country'), location.get('region'), location.get('city')
+        except Exception:
+            # 兼容旧的空格分隔格式，重新查询
+            pass
+
+    # 根据配置选择在线或离线方式获取位置信息
+    if settings.IP_LOCATION_PARSE == 'online':
+        location_info = await get_location_online(ip, user_agent)
+    else:
+        location_info = get_location_offline(ip)
+
+    location = _EMPTY_LOCATION
+    if location_info:
+        location = (location_info.get('country'), location_info.get('regionName'), location_info.get('city'))
+    # 将位置信息存入 Redis 缓存，查询失败时使用较短的过期时间
+    await redis_client.set(
+        key,
+        json.encode(dict(zip(('country', 'region', 'city'), location))),
+        ex=settings.IP_LOCATION_EXPIRE_SECONDS if any(location) else settings.IP_LOCATION_NEGATIVE_EXPIRE_SECONDS,
+    )
+    return location
+
+
+async def get_ip_location(ip: str, user_agent: str | None = None) -> IpLocation:
+    """
+    获取 IP 属地，依次查询进程内缓存、redis 缓存、在线 / 离线数据源
+
+    :param ip: IP 地址
+    :param user_agent: 用户代理字符串
+    :return: 国家，地区，城市
+    """
+    if settings.IP_LOCATION_PARSE not in ('online', 'offline'):
+        return _EMPTY_LOCATION
+    location = _ip_location_local_cache.get(ip)
+    if location is not None:
+        return location
+    future = _ip_location_inflight.get(ip)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # 发起查询的请求已被取消，重新查询
+            return await get_ip_location(ip, user_agent)
+    future = asyncio.get_running_loop().create_future()
+    _ip_location_inflight[ip] = future
     try:
-        cb = XdbSearcher.loadContentFromFile(dbfile=IP2REGION_XDB)
-        searcher = XdbSearcher(contentBuff=cb)
-        data = searcher.search(ip)
-        searcher.close()
-        data = data.split('|')
-        return {
-            'country': data[0] if data[0] != '0' else None,
-            'regionName': data[2] if data[2] != '0' else None,
-            'city': data[3] if data[3] != '0' else None,
-        }
+        location = await _query_ip_location(ip, user_agent)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
     except Exception as e:
-        log.error(f'离线获取 ip 地址属地失败，错误信息：{e}')
-        return None
+        future.set_exception(e)
+        # 没有并发等待者时，避免未获取异常的警告
+        future.exception()
+        raise
+    else:
+        future.set_result(location)
+        _ip_location_local_cache.set(ip, location)
+    finally:
+        _ip_location_inflight.pop(ip, None)
+    return location
 
 
 async def parse_ip_info(request: Request) -> IpInfo:
@@ -93,33 +211,24 @@ async def parse_ip_info(request: Request) -> IpInfo:
     :param request: FastAPI 的 Request 对象
     :return: IpInfo 对象，包含 IP 地址和地理位置信息
     """
-    country, region, city = None, None, None
     ip = get_request_ip(request)
-    # 尝试从 Redis 缓存获取位置信息
-    location = await redis_client.get(f'{settings.IP_LOCATION_REDIS_PREFIX}:{ip}')
-    if location:
-        country, region, city = location.split(' ')
-        return IpInfo(ip=ip, country=country, region=region, city=city)
+    country, region, city = await get_ip_location(ip, request.headers.get('User-Agent'))
+    return IpInfo(ip=ip, country=country, region=region, city=city)
 
-    # 根据配置选择在线或离线方式获取位置信息
-    if settings.IP_LOCATION_PARSE == 'online':
-        location_info = await get_location_online(ip, request.headers.get('User-Agent'))
-    elif settings.IP_LOCATION_PARSE == 'offline':
-        location_info = await get_location_offline(ip)
-    else:
-        location_info = None
 
-    if location_info:
-        country = location_info.get('country')
-        region = location_info.get('regionName')
-        city = location_info.get('city')
-        # 将位置信息存入 Redis 缓存
-        await redis_client.set(
-            f'{settings.IP_LOCATION_REDIS_PREFIX}:{ip}',
-            f'{country} {region} {city}',
-            ex=settings.IP_LOCATION_EXPIRE_SECONDS,
-        )
-    return IpInfo(ip=ip, country=country, region=region, city=city)
+@lru_cache(maxsize=settings.USER_AGENT_PARSE_CACHE_MAXSIZE)
+def _parse_user_agent(user_agent: str | None) -> UserAgentInfo:
+    """
+    解析用户代理字符串，User-Agent 种类远少于请求量，按原始字符串缓存解析结果
+
+    :param user_agent: 用户代理字符串
+    :return:
+    """
+    _user_agent = parse(user_agent or '')
+    os = _user_agent.get_os()
+    browser = _user_agent.get_browser()
+    device = _user_agent.get_device()
+    return UserAgentInfo(user_agent=user_agent or '', device=device, os=os, browser=browser)
 
 
 def parse_user_agent_info(request: Request) -> UserAgentInfo:
@@ -129,9 +238,32 @@ def parse_user_agent_info(request: Request) -> UserAgentInfo:
     :param request: FastAPI 的 Request 对象
     :return: UserAgentInfo 对象，包含用户代理、设备、操作系统和浏览器信息
     """
-    user_agent = request.headers.get('User-Agent')
-    _user_agent = parse(user_agent)
-    os = _user_agent.get_os()
-    browser = _user_agent.get_browser()
-    device = _user_agent.get_device()
-    return UserAgentInfo(user_agent=user_agent, device=device, os=os, browser=browser)
\ No newline at end of file
+    return _parse_user_agent(request.headers.get('User-Agent'))
+
+
+async def get_request_ip_info(request: Request) -> IpInfo:
+    """
+    获取请求的 IP 信息（包含地理位置），首次调用时解析并缓存到 request.state
+
+    :param request: FastAPI 的 Request 对象
+    :return:
+    """
+    ip_info = getattr(request.state, 'ip_info', None)
+    if ip_info is None:
+        ip = getattr(request.state, 'ip', None) or get_request_ip(request)
+        country, region, city = await get_ip_location(ip, request.headers.get('User-Agent'))
+        ip_info = request.state.ip_info = IpInfo(ip=ip, country=country, region=region, city=city)
+    return ip_info
+
+
+def get_request_ua_info(request: Request) -> UserAgentInfo:
+    """
+    获取请求的用户代理信息，首次调用时解析并缓存到 request.state
+
+    :param request: FastAPI 的 Request 对象
+    :return:
+    """
+    ua_info = getattr(request.state, 'ua_info', None)
+    if ua_info is None:
+        ua_info = request.state.ua_info = parse_user_agent_info(request)
+    return ua_info
@@ -8,11 +8,11 @@
 @Date    ：2024/12/7 16:51 
 '''
 from decimal import Decimal
-from typing import Any, Sequence, TypeVar
+from typing import Any, Callable, NamedTuple, Sequence, TypeVar
 
 from fastapi.encoders import decimal_encoder
 from msgspec import json
-from sqlalchemy import Row, RowMapping
+from sqlalchemy import Column, Row, RowMapping
 from sqlalchemy.orm import ColumnProperty, SynonymProperty, class_mapper
 from starlette.responses import JSONResponse
 
@@ -21,6 +21,72 @@ RowData = Row | RowMapping | Any
 R = TypeVar('R', bound=RowData)
 
 
+class SerializePlan(NamedTuple):
+    """模型序列化方案，按模型预先计算，避免逐行解析表结构"""
+
+    columns: tuple[str, ...]  # 表列名
+    converters: tuple[tuple[str, Callable[[Any], Any]], ...]  # 需要转换的列及其转换函数
+    properties: tuple[str, ...]  # 列及同义词属性名
+
+
+_serialize_plans: dict[type, SerializePlan] = {}
+
+
+def _maybe_decimal(value: Any) -> Any:
+    return decimal_encoder(value) if isinstance(value, Decimal) else value
+
+
+def _column_converter(column: Column) -> Callable[[Any], Any] | None:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        # 类型未知，逐值判断
+        return _maybe_decimal
+    return decimal_encoder if issubclass(python_type, Decimal) else None
+
+
+def get_serialize_plan(model: type) -> SerializePlan:
+    """
+    获取模型的序列化方案（按模型缓存）
+
+    :param model: SQLAlchemy 模型类
+    :return:
+    """
+    plan = _serialize_plans.get(model)
+    if plan is None:
+        table_columns = model.__table__.columns
+        converters = []
+        for column in table_columns:
+            converter = _column_converter(column)
+            if converter is not None:
+                converters.append((column.key, converter))
+        properties = tuple(
+            prop.key
+            for prop in class_mapper(model).iterate_properties
+            if isinstance(prop, (ColumnProperty, SynonymProperty))
+        )
+        plan = _serialize_plans[model] = SerializePlan(tuple(table_columns.keys()), tuple(converters), properties)
+    return plan
+
+
+def _convert(result: dict, converters: tuple[tuple[str, Callable[[Any], Any]], ...]) -> dict:
+    for key, converter in converters:
+        value = result[key]
+        if value is not None:
+            result[key] = converter(value)
+    return result
+
+
+def _serialize_instance(row: Any, plan: SerializePlan) -> dict:
+    values = row.__dict__
+    try:
+        result = {column: values[column] for column in plan.columns}
+    except KeyError:
+        # 未加载的列（延迟加载或已过期）通过属性访问加载
+        result = {column: values[column] if column in values else getattr(row, column) for column in plan.columns}
+    return _convert(result, plan.converters)
+
+
 def select_columns_serialize(row: R) -> dict:
     """
     序列化 SQLAlchemy 选择的表列，不包含关系列
@@ -28,24 +94,33 @@ def select_columns_serialize(row: R) -> dict:
     :param row: 行数据
     :return: 序列化后的字典
     """
-    result = {}
-    for column in row.__table__.columns.keys():
-        v = getattr(row, column)
-        if isinstance(v, Decimal):
-            v = decimal_encoder(v)
-        result[column] = v
-    return result
+    return _serialize_instance(row, get_serialize_plan(type(row)))
 
 
-def select_list_serialize(row: Sequence[R]) -> list:
+def select_list_serialize(row: Sequence[R], model: type | None = None) -> list:
     """
     序列化 SQLAlchemy 选择列表
 
+    支持模型实例，以及直接查询表列得到的 Row / RowMapping（例如 result.all()、result.mappings().all()），
+    后者无需实例化 ORM 对象，传入 model 时按模型的列类型转换，否则逐值判断 Decimal
+
     :param row: 行数据序列
+    :param model: Row / RowMapping 对应的 SQLAlchemy 模型类
     :return: 序列化后的列表
     """
-    result = [select_columns_serialize(_) for _ in row]
-    return result
+    if not row:
+        return []
+    first = row[0]
+    if isinstance(first, (Row, RowMapping)):
+        keys = tuple(first._fields if isinstance(first, Row) else first.keys())
+        if model is not None:
+            converters = tuple(item for item in get_serialize_plan(model).converters if item[0] in keys)
+        else:
+            converters = tuple((key, _maybe_decimal) for key in keys)
+        if isinstance(first, Row):
+            return [_convert(dict(zip(keys, _)), converters) for _ in row]
+        return [_convert(dict(zip(keys, _.values())), converters) for _ in row]
+    return [_serialize_instance(_, get_serialize_plan(type(_))) for _ in row]
 
 
 def select_as_dict(row: R, use_alias: bool = False) -> dict:
@@ -61,20 +136,20 @@ def select_as_dict(row: R, use_alias: bool = False) -> dict:
     :return: 转换后的字典
     """
     if not use_alias:
-        result = row.__dict__
-        if '_sa_instance_state' in result:
-            del result['_sa_instance_state']
+        result = {key: value for key, value in row.__dict__.items() if key != '_sa_instance_state'}
     else:
-        result = {}
-        mapper = class_mapper(row.__class__)
-        for prop in mapper.iterate_properties:
-            if isinstance(prop, (ColumnProperty, SynonymProperty)):
-                key = prop.key
-                result[key] = getattr(row, key)
+        result = {key: getattr(row, key) for key in get_serialize_plan(type(row)).properties}
 
     return result
 
 
+class EncodedJSON(NamedTuple):
+    """预编码的 JSON 数据"""
+
+    body: bytes  # JSON 字节
+    etag: str  # 实体标签
+
+
 class MsgSpecJSONResponse(JSONResponse):
     """使用高性能 msgspec 库将数据序列化为 JSON 的 JSON 响应。"""
 
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : struct_mirror.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/24 15:20
+'''
+import collections.abc
+import types
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Annotated, Any, Literal, Sequence, Union, get_args, get_origin
+from uuid import UUID
+
+import msgspec
+
+from pydantic import BaseModel, EmailStr, TypeAdapter
+from pydantic_core import PydanticUndefined, Url
+from sqlalchemy import Row
+
+_NATIVE_TYPES = (int, float, bool, str, bytes, datetime, date, time, timedelta, Decimal, UUID)
+_STR_TYPES = (EmailStr, Url)
+_SEQUENCE_ORIGINS = (list, collections.abc.Sequence, collections.abc.MutableSequence)
+
+# 进行中的镜像生成（用于识别自引用的 schema）
+_BUILDING = object()
+_mirrors: dict[type[BaseModel], Any] = {}
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _mirror_type(tp: Any) -> Any:
+    origin = get_origin(tp)
+    args = get_args(tp)
+    if origin is Annotated:
+        return _mirror_type(args[0])
+    if origin is Union or origin is types.UnionType:
+        return Union[tuple(_mirror_type(arg) for arg in args)]
+    if origin is Literal:
+        return tp
+    if origin in _SEQUENCE_ORIGINS:
+        return list[_mirror_type(args[0])] if args else list
+    if origin in (set, frozenset, collections.abc.Set):
+        return list[_mirror_type(args[0])] if args else list
+    if origin is tuple:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return tuple[_mirror_type(args[0]), ...]
+        return tuple[tuple(_mirror_type(arg) for arg in args)] if args else tuple
+    if origin in (dict, collections.abc.Mapping):
+        return dict[_mirror_type(args[0]), _mirror_type(args[1])] if args else dict
+    if tp is Any or tp is None or tp is type(None):
+        return tp
+    if origin is None and isinstance(tp, type):
+        if issubclass(tp, BaseModel):
+            mirror = struct_mirror(tp)
+            if mirror is None:
+                raise _Unsupported
+            return mirror
+        if issubclass(tp, Enum) or tp in _NATIVE_TYPES:
+            return tp
+        if tp in (list, dict, set, frozenset, tuple):
+            return list if tp in (set, frozenset) else tp
+        if issubclass(tp, str) or issubclass(tp, _STR_TYPES):
+            return str
+    raise _Unsupported
+
+
+def _has_custom_logic(schema: type[BaseModel]) -> bool:
+    decorators = schema.__pydantic_decorators__
+    return bool(
+        decorators.validators
+        or decorators.field_validators
+        or decorators.root_validators
+        or decorators.model_validators
+        or decorators.field_serializers
+        or decorators.model_serializers
+        or decorators.computed_fields
+    )
+
+
+def struct_mirror(schema: type[BaseModel]) -> type[msgspec.Struct] | None:
+    """
+    获取 pydantic schema 对应的 msgspec Struct 镜像（按 schema 缓存）
+
+    镜像保留字段名、别名、类型和默认值，用于将 ORM 对象、Row 和字典直接转换为可由 msgspec 编码的对象；
+    含自定义校验器 / 序列化器、自引用或无法映射的字段类型的 schema 不生成镜像
+
+    :param schema: pydantic schema
+    :return: 无法生成镜像时返回 None
+    """
+    mirror = _mirrors.get(schema)
+    if mirror is _BUILDING:
+        return None
+    if mirror is not None or schema in _mirrors:
+        return mirror
+    _mirrors[schema] = _BUILDING
+    mirror = None
+    if not _has_custom_logic(schema):
+        try:
+            fields = []
+            rename = {}
+            for name, field in schema.model_fields.items():
+                field_type = _mirror_type(field.annotation)
+                if field.default_factory is not None:
+                    fields.append((name, field_type, msgspec.field(default_factory=field.default_factory)))
+                elif field.default is not PydanticUndefined:
+                    if field.default is None:
+                        field_type = Union[field_type, None]
+                    fields.append((name, field_type, field.default))
+                else:
+                    fields.append((name, field_type))
+                alias = field.serialization_alias or field.alias
+                if alias:
+                    rename[name] = alias
+            mirror = msgspec.defstruct(
+                f'{schema.__name__}Struct',
+                fields,
+                kw_only=True,
+                rename=rename or None,
+                module=schema.__module__,
+            )
+        except _Unsupported:
+            mirror = None
+    _mirrors[schema] = mirror
+    return mirror
+
+
+def _adapter(tp: Any) -> TypeAdapter:
+    adapter = _adapters.get(tp)
+    if adapter is None:
+        adapter = _adapters[tp] = TypeAdapter(tp)
+    return adapter
+
+
+def to_encodable(data: Any, schema: type[BaseModel]) -> Any:
+    """
+    按 schema 将 ORM 对象、Row、字典或 schema 实例（及其列表）转换为可由 msgspec 直接编码的对象
+
+    可生成镜像时使用 msgspec 转换为 Struct，否则回退为 pydantic 校验并序列化为 JSON 字节（msgspec.Raw）
+
+    :param data: 单个对象或对象序列
+    :param schema: pydantic schema
+    :return:
+    """
+    many = isinstance(data, Sequence) and not isinstance(data, (str, bytes, Row))
+    mirror = struct_mirror(schema)
+    if mirror is not None:
+        return msgspec.convert(data, list[mirror] if many else mirror, strict=False, from_attributes=True)
+    adapter = _adapter(list[schema] if many else schema)
+    value = adapter.validate_python(data, from_attributes=True)
+    return msgspec.Raw(adapter.dump_json(value, by_alias=True))
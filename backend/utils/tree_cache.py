@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+@Project : PyCharm
+@File    : tree_cache.py
+@IDE     : Pycharm
+@Author  : imbalich
+@Time    : 2024/12/23 15:30
+'''
+import hashlib
+
+from typing import Any, Awaitable, Callable
+
+from msgspec import json
+
+from backend.core.conf import settings
+from backend.database.redis import redis_client
+from backend.utils.cache import LRUCache
+from backend.utils.serializers import EncodedJSON
+
+
+class TreeCache:
+    """
+    树形结构缓存
+
+    构建完成的树序列化为 JSON 后按 (版本号, 缓存键) 缓存在进程内（L1）和 redis（L2），
+    相关数据写入后递增全局版本号，旧版本的 redis 缓存自然过期，各进程的 L1 缓存通过广播清空
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: 缓存名称
+        """
+        self.name = name
+        self.prefix = f'{settings.TREE_CACHE_REDIS_PREFIX}:{name}'
+        self._local: LRUCache[str, EncodedJSON] = LRUCache(
+            maxsize=settings.TREE_CACHE_LOCAL_MAXSIZE, ttl=settings.TREE_CACHE_LOCAL_EXPIRE_SECONDS
+        )
+        # 失效版本号，防止并发请求将失效前读取的旧数据写回 L1 缓存
+        self._epoch = 0
+        _tree_caches[name] = self
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        根据查询条件生成缓存键
+
+        :param parts: 查询条件
+        :return:
+        """
+        return hashlib.md5(json.encode(parts)).hexdigest()
+
+    async def get(self, key: str, build: Callable[[], Awaitable[Any]]) -> EncodedJSON:
+        """
+        获取缓存的树，未命中时构建并缓存
+
+        :param key: 缓存键
+        :param build: 构建树的函数
+        :return:
+        """
+        cached = self._local.get(key)
+        if cached is not None:
+            return cached
+        epoch = self._epoch
+        version = await redis_client.get(f'{self.prefix}:version') or '0'
+        redis_key = f'{self.prefix}:{version}:{key}'
+        body = await redis_client.get(redis_key)
+        if body is None:
+            body = json.encode(await build())
+            await redis_client.set(redis_key, body, ex=settings.TREE_CACHE_EXPIRE_SECONDS)
+        else:
+            body = body.encode('utf-8')
+        encoded = EncodedJSON(body=body, etag=f'"{hashlib.md5(body).hexdigest()}"')
+        if epoch == self._epoch:
+            self._local.set(key, encoded)
+        return encoded
+
+    def _evict(self) -> None:
+        self._epoch += 1
+        self._local.clear()
+
+    async def invalidate(self) -> None:
+        """
+        递增版本号使缓存失效，并广播到所有 worker / 节点的进程内缓存，须在数据写入提交后调用
+
+        :return:
+        """
+        self._evict()
+        await redis_client.incr(f'{self.prefix}:version')
+        await redis_client.publish(settings.TREE_CACHE_REDIS_CHANNEL, self.name)
+
+
+_tree_caches: dict[str, TreeCache] = {}
+
+
+async def _on_tree_cache_invalidate(message: str) -> None:
+    cache = _tree_caches.get(message)
+    if cache is not None:
+        cache._evict()
+
+
+async def _on_tree_cache_reconnect() -> None:
+    # 断线期间可能遗漏失效广播，重新订阅后清空本地缓存
+    for cache in _tree_caches.values():
+        cache._evict()
+
+
+def init_tree_cache_listener() -> None:
+    """
+    启动树形结构缓存失效广播监听，仅在应用启动时调用
+
+    :return:
+    """
+    redis_client.add_listener(
+        settings.TREE_CACHE_REDIS_CHANNEL, _on_tree_cache_invalidate, on_reconnect=_on_tree_cache_reconnect
+    )
+
+
+menu_tree_cache: TreeCache = TreeCache('menu')
+dept_tree_cache: TreeCache = TreeCache('dept')